@@ -1,475 +1,89 @@
+import io
+import os
+from contextlib import nullcontext
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-import matplotlib.pyplot as plt
-from PIL import Image as PILImage
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from datetime import datetime
-import math
-
-# Funções auxiliares
-def format_with_comma(value, decimals=2):
-    return f"{value:.{decimals}f}".replace('.', ',')
-
-# Função para calcular S2 com valores normativos corrigidos
-def calculate_s2(z, v0, category, class_):
-    # Tabela de valores normativos
-    zg_values = {"I": 250, "II": 300, "III": 350, "IV": 420, "V": 500}
-    b_values = {
-        "I": {"A": 1.100, "B": 1.110, "C": 1.120},
-        "II": {"A": 1.000, "B": 1.000, "C": 1.000},
-        "III": {"A": 0.940, "B": 0.940, "C": 0.930},
-        "IV": {"A": 0.860, "B": 0.850, "C": 0.840},
-        "V": {"A": 0.740, "B": 0.730, "C": 0.710}
-    }
-    p_values = {
-        "I": {"A": 0.060, "B": 0.065, "C": 0.070},
-        "II": {"A": 0.085, "B": 0.090, "C": 0.100},
-        "III": {"A": 0.100, "B": 0.105, "C": 0.115},
-        "IV": {"A": 0.120, "B": 0.125, "C": 0.135},
-        "V": {"A": 0.150, "B": 0.160, "C": 0.175}
+
+from calculation import (
+    category_options,
+    complete_data,
+    cpi_cases,
+    format_with_comma,
+)
+from ce_tables import geometry_coefficients
+from combinations import default_factors
+from frame_loads import frame_load_columns, frame_member_labels, write_frame_loads
+from isopleths import lookup_v0, search_cities
+from pdf_cache import pdf_cache_key
+from pdf_jobs import PdfJobQueue
+from pipeline import evaluate_frame_loads, evaluate_results, graph
+import presentation
+from probabilistic import (
+    default_category_confidence,
+    default_exposure_cov,
+    default_v0_cov,
+    run_monte_carlo,
+)
+from project_store import ProjectStore
+from sweep import heatmap_figure, linear_range, run_sweep, sweep_frame
+from tracing import capture, span_rows
+from wind_profile import s2_parameters
+
+# Cache das tabelas e exportações: reruns com as mesmas entradas não refazem o trabalho.
+# As entradas (dicionários) são hasheadas pelo Streamlit; max_entries limita a memória (LRU).
+# Os resultados vêm do grafo incremental (pipeline.py), que só recalcula as etapas afetadas.
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_tables(results, wind_forces):
+    import pandas as pd
+
+    dp_tables = {
+        direction: pd.DataFrame(dp_data, columns=["Ce", "Cpi", "DP (kgf/m²)"])
+        for direction, dp_data in presentation.dp_tables(results["pressures"]).items()
     }
-    fr_values = {
-        "II": {"A": 1.000, "B": 0.980, "C": 0.950},
-        "III": {"A": 1.000, "B": 0.980, "C": 0.950},  # Assumindo Fr igual a II para III, IV, V onde não especificado
-        "IV": {"A": 1.000, "B": 0.980, "C": 0.950},
-        "V": {"A": 1.000, "B": 0.980, "C": 0.950}
+    force_tables = {
+        direction: pd.DataFrame(force_data, columns=["Ce", "Cpi", "DP (kgf/m²)", "Área (m²)", "F (kgf)"])
+        for direction, force_data in presentation.force_tables(results["pressures"], wind_forces).items()
     }
-    
-    b = b_values[category][class_]
-    p = p_values[category][class_]
-    fr = fr_values.get(category, {"A": 1.000, "B": 0.980, "C": 0.950})[class_]  # Usa 1.0 para I se não definido
-    zg = zg_values[category]
-    
-    s2 = b * (z / 10) ** p * fr if z > 0 else 0
-    return s2, b, p, fr
-
-# Função para criar gráfico de velocidade do vento em função da altura
-def create_velocity_height_graph(z_values, vk_values):
-    fig, ax = plt.subplots(figsize=(6, 4), dpi=100)
-    ax.plot(vk_values, z_values, 'b-', label='Velocidade do Vento (Vk)')
-    ax.set_xlabel('Velocidade do Vento (Vk) [m/s]', fontsize=10)
-    ax.set_ylabel('Altura (z) [m]', fontsize=10)
-    ax.set_title('Perfil de Velocidade do Vento em Função da Altura', fontsize=12, pad=15)
-    ax.grid(True, linestyle='--', alpha=0.7)
-    ax.legend()
-    
-    plt.tight_layout()
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', dpi=100)
-    plt.close()
-    buf.seek(0)
-    return buf
-
-# Função para adicionar cabeçalho e rodapé
-def add_header_footer(canvas, doc):
-    canvas.saveState()
-    canvas.setFont("Helvetica-Bold", 12)
-    canvas.setFillColor(colors.darkblue)
-    canvas.drawString(2*cm, A4[1] - 1.5*cm, "Memorial de Cálculo - Ações do Vento (NBR 6123:2023)")
-    canvas.line(2*cm, A4[1] - 1.8*cm, A4[0] - 2*cm, A4[1] - 1.8*cm)
-    canvas.setFont("Helvetica", 8)
-    canvas.setFillColor(colors.grey)
-    page_num = canvas.getPageNumber()
-    footer_text = f"Página {page_num} | Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-    canvas.drawString(2*cm, 1*cm, footer_text)
-    canvas.line(2*cm, 1.3*cm, A4[0] - 2*cm, 1.3*cm)
-    canvas.restoreState()
-
-# Função para gerar o PDF
-def generate_pdf(data, results, project_info, wind_forces, uploaded_image=None):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=3*cm,
-        bottomMargin=2*cm
-    )
-    story = []
-
-    # Estilos
-    heading_style = ParagraphStyle(
-        name='Heading',
-        fontName='Helvetica-Bold',
-        fontSize=16,
-        textColor=colors.darkblue,
-        spaceAfter=12,
-        leading=18
-    )
-    subheading_style = ParagraphStyle(
-        name='Subheading',
-        fontName='Helvetica-Bold',
-        fontSize=12,
-        textColor=colors.darkslategray,
-        spaceAfter=10
-    )
-    body_style = ParagraphStyle(
-        name='Body',
-        fontName='Helvetica',
-        fontSize=10,
-        textColor=colors.black,
-        spaceAfter=8
+    envelope_table = pd.DataFrame(
+        presentation.envelope_rows(results["envelope"]),
+        columns=["Superfície", "Extremo", "Direção", "Ce", "Cpi", "DP (kgf/m²)"],
     )
-    table_title_style = ParagraphStyle(
-        name='TableTitle',
-        fontName='Helvetica-Oblique',
-        fontSize=10,
-        textColor=colors.darkblue,
-        spaceAfter=6
+    return dp_tables, force_tables, envelope_table
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_exports(building_id, data, coefficients, results, wind_forces):
+    from io import BytesIO, StringIO
+
+    from result_schema import BuildingResult, write_json, write_xlsx
+
+    building = [BuildingResult.from_calculation(building_id, data, coefficients, results, wind_forces)]
+    json_buffer = StringIO()
+    write_json(building, json_buffer)
+    try:
+        xlsx_buffer = BytesIO()
+        write_xlsx(building, xlsx_buffer)
+    except ImportError:
+        return json_buffer.getvalue(), None  # openpyxl não instalado
+    return json_buffer.getvalue(), xlsx_buffer.getvalue()
+
+# A análise probabilística é refeita só quando as entradas ou o modelo de incertezas mudam
+@st.cache_data(max_entries=16, show_spinner="Executando a análise probabilística...")
+def cached_monte_carlo(data, coefficients, samples, seed, v0_cov, exposure_cov, category_confidence, thresholds):
+    return run_monte_carlo(
+        data, coefficients, samples=samples, seed=seed, v0_cov=v0_cov, exposure_cov=exposure_cov,
+        category_confidence=category_confidence, thresholds=thresholds,
     )
 
-    # Seção 1: Informações do Projeto
-    story.append(Paragraph("1. Informações do Projeto", heading_style))
-    project_data = [
-        ["Cliente", project_info["client"]],
-        ["Obra", project_info["project"]],
-        ["Localização", project_info["location"]],
-        ["Cálculo", project_info["calculator"]]
-    ]
-    project_table = Table(project_data, colWidths=[5*cm, 10*cm])
-    project_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
-        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.whitesmoke]),
-    ]))
-    story.append(project_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 2: Dados da Edificação
-    story.append(Paragraph("2. Dados da Edificação", heading_style))
-    building_data = [
-        ["Descrição", "Valor"],
-        ["Tipo de Cobertura", data['roof_type']],
-        ["Comprimento (l1)", f"{data['length']:.1f} m"],
-        ["Largura (l2)", f"{data['width']:.1f} m"],
-        ["Pé Direito", f"{data['height']:.1f} m"],
-        ["Inclinação da Cobertura", f"{data['slope']:.1f}%"],
-        ["Altura Média - Fechamento (h)", f"{data['z_fechamento']:.1f} m"],
-        ["Altura Média - Cobertura", f"{data['z_cobertura']:.1f} m"],
-    ]
-    building_table = Table(building_data, colWidths=[5*cm, 5*cm])
-    building_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
-    ]))
-    story.append(building_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 3: Parâmetros Meteorológicos
-    story.append(Paragraph("3. Parâmetros Meteorológicos", heading_style))
-    meteo_data = [
-        ["V0 (m/s)", f"{data['v0']:.1f} m/s"],
-        ["Categoria de Rugosidade", f"{data['category']}"],
-        ["Classe", data['class_']]
-    ]
-    meteo_table = Table(meteo_data, colWidths=[5*cm, 10*cm])
-    meteo_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
-        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.whitesmoke]),
-    ]))
-    story.append(meteo_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 4: Fatores S1, S2, S3
-    story.append(Paragraph("4. Fatores S1, S2, S3", heading_style))
-    factors_data = [
-        ["Fator Topográfico (S1)", f"{data['s1']}"],
-        ["Fator S2 - Fechamento", format_with_comma(results['s2_fechamento'])],
-        ["Fator S2 - Cobertura", format_with_comma(results['s2_cobertura'])],
-        ["Fator Estatístico (S3)", f"{data['s3']} (Tp: {data['s3_tp']} anos)"],
-        ["Parâmetro b", format_with_comma(results['b'])],
-        ["Parâmetro p", format_with_comma(results['p'])],
-        ["Parâmetro Fr", format_with_comma(results['fr'])]
-    ]
-    factors_table = Table(factors_data, colWidths=[5*cm, 5*cm])
-    factors_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
-        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.whitesmoke]),
-    ]))
-    story.append(factors_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 5: Velocidade Característica (Vk)
-    story.append(Paragraph("5. Velocidade Característica (Vk)", heading_style))
-    vk_data = [
-        ["Fechamento", f"{format_with_comma(results['vk_fechamento'])} m/s"],
-        ["Cobertura", f"{format_with_comma(results['vk_cobertura'])} m/s"]
-    ]
-    vk_table = Table(vk_data, colWidths=[5*cm, 5*cm])
-    vk_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
-        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.whitesmoke]),
-    ]))
-    story.append(vk_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 6: Velocidades e Pressões Características
-    story.append(Paragraph("6. Velocidades e Pressões Características", heading_style))
-    story.append(Paragraph("Tabela 1 – Velocidades e Pressões Características – NBR 6123:2023", table_title_style))
-    
-    z_values = np.arange(0, 76, 5)
-    vp_data = [["z (m)", "S1", "S2", "S3", "Vk (m/s)", "q (kN/m²)"]]
-    
-    for z in z_values:
-        s1 = data['s1']
-        s2, _, _, _ = calculate_s2(z, data['v0'], data['category'], data['class_'])
-        s3 = data['s3']
-        vk = data['v0'] * s1 * s2 * s3
-        q = 0.613 * vk**2 / 1000
-        
-        vp_data.append([
-            format_with_comma(z, 1),
-            format_with_comma(s1, 2),
-            format_with_comma(s2, 2),
-            format_with_comma(s3, 2),
-            format_with_comma(vk, 2),
-            format_with_comma(q, 3)
-        ])
-    
-    vp_table = Table(vp_data, colWidths=[2.5*cm, 2.5*cm, 2.5*cm, 2.5*cm, 2.5*cm, 2.5*cm])
-    vp_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 8),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightblue),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
-    ]))
-    story.append(vp_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 7: Pressão Dinâmica (q)
-    story.append(Paragraph("7. Pressão Dinâmica (q)", heading_style))
-    story.append(Paragraph("A pressão dinâmica é calculada pela fórmula: q = 0,613 * Vk²", body_style))
-    q_data = [
-        ["Fechamento", f"{format_with_comma(results['q_fechamento_nm2'])} N/m² ({format_with_comma(results['q_fechamento_kgfm2'])} kgf/m²)"],
-        ["Cobertura", f"{format_with_comma(results['q_cobertura_nm2'])} N/m² ({format_with_comma(results['q_cobertura_kgfm2'])} kgf/m²)"]
-    ]
-    q_table = Table(q_data, colWidths=[5*cm, 10*cm])
-    q_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
-        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.whitesmoke]),
-    ]))
-    story.append(q_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 8: Coeficientes de Pressão Interna (Cpi)
-    story.append(Paragraph("8. Coeficientes de Pressão Interna (Cpi)", heading_style))
-    story.append(Paragraph(f"Caso Selecionado: {results['cpi_case_description']}", subheading_style))
-    cpi_data = [[f"Cpi: {format_with_comma(val)}"] for val in results['cpi']]
-    cpi_table = Table(cpi_data, colWidths=[5*cm])
-    cpi_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
-    ]))
-    story.append(cpi_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 9: Pressão Efetiva (DP)
-    story.append(Paragraph("9. Pressão Efetiva (DP)", heading_style))
-    story.append(Paragraph("A pressão efetiva é calculada pela fórmula: DP = q * (Ce - Cpi)", body_style))
-    for direction, dp_data in results['dp_results'].items():
-        story.append(Paragraph(direction, subheading_style))
-        dp_table_data = [["Ce", "Cpi", "DP (kgf/m²)"]] + dp_data
-        dp_table = Table(dp_table_data, colWidths=[3*cm, 3*cm, 3*cm])
-        dp_table.setStyle(TableStyle([
-            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-            ('FONTSIZE', (0,0), (-1,-1), 8),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('BACKGROUND', (0,0), (-1,0), colors.lightblue),
-            ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-            ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
-        ]))
-        story.append(dp_table)
-        story.append(Spacer(1, 0.3*cm))
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 10: Forças de Vento na Cobertura de Duas Águas
-    if data['roof_type'] == "Duas Águas":
-        story.append(Paragraph("10. Forças de Vento na Cobertura de Duas Águas", heading_style))
-        story.append(Paragraph("As forças são calculadas pela fórmula: F = DP * A, onde A é a área de cada água.", body_style))
-        for direction, force_data in wind_forces.items():
-            story.append(Paragraph(direction, subheading_style))
-            force_table_data = [["Ce", "Cpi", "DP (kgf/m²)", "Área (m²)", "F (kgf)"]] + force_data
-            force_table = Table(force_table_data, colWidths=[2.5*cm, 2.5*cm, 2.5*cm, 2.5*cm, 2.5*cm])
-            force_table.setStyle(TableStyle([
-                ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-                ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-                ('FONTSIZE', (0,0), (-1,-1), 8),
-                ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-                ('BACKGROUND', (0,0), (-1,0), colors.lightblue),
-                ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-                ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
-            ]))
-            story.append(force_table)
-            story.append(Spacer(1, 0.3*cm))
-        story.append(Spacer(1, 0.5*cm))
-
-    # Seção 11: Metodologia de Cálculo
-    story.append(Paragraph("11. Metodologia de Cálculo", heading_style))
-    story.append(Paragraph("Velocidade Característica do Vento (Vk): Vk = V0 * S1 * S2 * S3", body_style))
-    story.append(Paragraph("Fator S2: S2 = b * (z/10)^p * Fr", body_style))
-    story.append(Paragraph("Pressão Dinâmica do Vento (q): q = 0,613 * Vk^2 (N/m²); q = (0,613 * Vk^2) / 9,81 (kgf/m²)", body_style))
-    story.append(Paragraph("Pressão Efetiva (DP): DP = (Ce - Cpi) * q", body_style))
-    if data['roof_type'] == "Duas Águas":
-        story.append(Paragraph("Força do Vento (F): F = DP * A", body_style))
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 12: Perfil de Velocidade do Vento
-    story.append(Paragraph("12. Perfil de Velocidade do Vento em Função da Altura", heading_style))
-    z_values = np.linspace(0, max(data['z_fechamento'], data['z_cobertura']) * 1.5, 100)
-    vk_values = [data['v0'] * data['s1'] * calculate_s2(z, data['v0'], data['category'], data['class_'])[0] * data['s3'] for z in z_values]
-    velocity_img = create_velocity_height_graph(z_values, vk_values)
-    story.append(Image(velocity_img, width=12*cm, height=8*cm))
-    story.append(Spacer(1, 0.5*cm))
-
-    # Seção 13: Imagem Inserida pelo Usuário
-    if uploaded_image is not None:
-        story.append(Paragraph("13. Imagem Inserida pelo Usuário", heading_style))
-        image = PILImage.open(uploaded_image)
-        img_buffer = BytesIO()
-        image.save(img_buffer, format="PNG")
-        img_buffer.seek(0)
-        story.append(Image(img_buffer, width=12*cm, height=8*cm))
-        story.append(Spacer(1, 0.5*cm))
-
-    # Seção 14: Força de Atrito Longitudinal (0° / 180°)
-    story.append(Paragraph("14. Força de Atrito Longitudinal (0° / 180°)", heading_style))
-    story.append(Paragraph("Esta seção verifica a força de atrito longitudinal conforme a NBR 6123:2023.", body_style))
-    
-    # Subseção: Verificação Inicial
-    story.append(Paragraph("Verificação Inicial", subheading_style))
-    story.append(Paragraph("Primeiro, verificamos as dimensões da edificação. Calculamos l2 dividido por h e l2 dividido por l1. O cálculo da força F' é necessário somente se l2 dividido por h for maior que 4 ou se l2 dividido por l1 for maior que 4.", body_style))
-    
-    # Usar valores do usuário
-    l1 = data['length']  # Comprimento
-    l2 = data['width']   # Largura
-    h = data['z_fechamento']  # Altura Média - Fechamento
-    Cfr = 0.04  # Valor fixo conforme NBR 6123
-    q_cob = results['q_cobertura_kgfm2']  # Pressão dinâmica da cobertura
-    q_fec = results['q_fechamento_kgfm2']  # Pressão dinâmica do fechamento
-    
-    # Verificação da condição
-    l2_h_ratio = l2 / h
-    l2_l1_ratio = l2 / l1
-    condition_met = l2_h_ratio > 4 or l2_l1_ratio > 4
-    
-    if condition_met:
-        # Subseção: Cálculo da Força
-        story.append(Paragraph("Cálculo da Força", subheading_style))
-        story.append(Paragraph("A condição foi atendida. Agora, calculamos a força F'. Ela é composta por duas partes: F' cob (para a cobertura) e F' fec (para o fechamento).", body_style))
-        
-        if h <= l1:
-            story.append(Paragraph("Como h é menor ou igual a l1, usamos as seguintes fórmulas:", body_style))
-            story.append(Paragraph("F' cob = Cfr vezes q cob vezes l1 vezes (l2 menos 4 vezes h).", body_style))
-            story.append(Paragraph("F' fec = Cfr vezes q fec vezes 2 vezes h vezes (l2 menos 4 vezes h).", body_style))
-            F_cob = Cfr * q_cob * l1 * (l2 - 4 * h)
-            F_fec = Cfr * q_fec * 2 * h * (l2 - 4 * h)
-            F_prime = F_cob + F_fec
-        else:
-            story.append(Paragraph("Como h é maior que l1, usamos as seguintes fórmulas:", body_style))
-            story.append(Paragraph("F' cob = Cfr vezes q cob vezes l1 vezes (l2 menos 4 vezes h).", body_style))
-            story.append(Paragraph("F' fec = Cfr vezes q fec vezes 2 vezes h vezes (l2 menos 4 vezes l1).", body_style))
-            F_cob = Cfr * q_cob * l1 * (l2 - 4 * h)
-            F_fec = Cfr * q_fec * 2 * h * (l2 - 4 * l1)
-            F_prime = F_cob + F_fec
-        
-        story.append(Paragraph("A força total F' é a soma de F' cob e F' fec.", body_style))
-    else:
-        F_prime = "Não Aplicável"
-        F_cob = "Não Aplicável"
-        F_fec = "Não Aplicável"
-        story.append(Paragraph("Resultado", subheading_style))
-        story.append(Paragraph("A condição não foi atendida. l2 dividido por h é menor ou igual a 4 e l2 dividido por l1 também é menor ou igual a 4. Portanto, o cálculo da força F' não é necessário.", body_style))
-    
-    # Subseção: Resultados na Tabela
-    story.append(Paragraph("Resultados", subheading_style))
-    friction_data = [
-        ["Parâmetro", "Valor"],
-        ["Comprimento (l1)", f"{format_with_comma(l1)} m"],
-        ["Largura (l2)", f"{format_with_comma(l2)} m"],
-        ["Altura Média (h)", f"{format_with_comma(h)} m"],
-        ["l2 dividido por h", f"{format_with_comma(l2_h_ratio)}"],
-        ["l2 dividido por l1", f"{format_with_comma(l2_l1_ratio)}"],
-        ["Fator Cfr", f"{format_with_comma(Cfr)}"],
-        ["Pressão q cob", f"{format_with_comma(q_cob)} kgf/m²"],
-        ["Pressão q fec", f"{format_with_comma(q_fec)} kgf/m²"],
-        ["Força F' cob", f"{format_with_comma(F_cob)} kgf" if F_cob != "Não Aplicável" else F_cob],
-        ["Força F' fec", f"{format_with_comma(F_fec)} kgf" if F_fec != "Não Aplicável" else F_fec],
-        ["Força Total F'", f"{format_with_comma(F_prime)} kgf" if F_prime != "Não Aplicável" else F_prime],
-    ]
-    
-    friction_table = Table(friction_data, colWidths=[5*cm, 5*cm])
-    friction_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
-        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.whitesmoke]),
-    ]))
-    story.append(friction_table)
-    story.append(Spacer(1, 0.5*cm))
-
-    doc.build(story, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
-    buffer.seek(0)
-    return buffer
+# Fila de geração dos PDFs em segundo plano, compartilhada por todas as sessões do servidor.
+# Um único processo de renderização: os recálculos interativos nunca esperam pelos PDFs.
+@st.cache_resource
+def pdf_jobs():
+    return PdfJobQueue(max_workers=1)
+
+# Banco de projetos salvos (C_VENTO_STORE ou o arquivo padrão), compartilhado pelas sessões
+@st.cache_resource
+def project_store():
+    return ProjectStore(os.environ.get("C_VENTO_STORE") or None)
 
 # Lista fixa de estados brasileiros
 brazilian_states = [
@@ -560,7 +174,20 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown('<div class="card"><div class="card-title">Seleção de Localização para Velocidade do Vento</div>', unsafe_allow_html=True)
 state = st.selectbox("Selecione o Estado", [""] + brazilian_states)
 city = st.text_input("Cidade", "São Paulo")
-v0 = st.number_input("V0 (m/s)", min_value=0.0, value=42.0)
+# Busca da isopleta no CSV de municípios (sugestões pelo início do nome)
+v0_isopleth = lookup_v0(state, city) if city else None
+if city and v0_isopleth is None:
+    city_matches = search_cities(city, state)
+    if city_matches:
+        city_match = st.selectbox("Municípios encontrados", [""] + city_matches)
+        if city_match:
+            city = city_match
+            v0_isopleth = lookup_v0(state, city)
+if v0_isopleth is not None:
+    st.caption(f"V0 obtido da lista de isopletas para {city}: {format_with_comma(v0_isopleth, 1)} m/s")
+elif city:
+    st.caption("Município não encontrado na lista de isopletas. Informe V0 manualmente.")
+v0 = st.number_input("V0 (m/s)", min_value=0.0, value=v0_isopleth if v0_isopleth is not None else 42.0)
 st.write(f"Velocidade Básica do Vento (V0): {v0} m/s")
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -581,13 +208,6 @@ st.markdown('</div>', unsafe_allow_html=True)
 
 # Card 3: Parâmetros Meteorológicos
 st.markdown('<div class="card"><div class="card-title">Parâmetros Meteorológicos</div>', unsafe_allow_html=True)
-category_options = {
-    "I": "I: Mar ou costa com poucos obstáculos",
-    "II": "II: Terrenos abertos, em nível ou aproximadamente em nível, com poucos obstáculos isolados, tais como árvores e edificações baixas",
-    "III": "III: Subúrbios ou áreas industriais com edificações de altura média",
-    "IV": "IV: Centros urbanos com edificações altas e densas",
-    "V": "V: Áreas com muitos obstáculos altos, como florestas densas ou centros urbanos muito desenvolvidos",
-}
 category = st.selectbox("Categoria de Rugosidade", list(category_options.keys()), format_func=lambda x: category_options[x])
 category_description = category_options[category]
 class_ = st.selectbox("Classe", ["A", "B", "C"], help="A: Dimensão frontal ≤ 20 m; B: 20 m < Dimensão ≤ 50 m; C: Dimensão > 50 m.")
@@ -604,23 +224,15 @@ s3_options = {
     0.83: "0,83 (Grupo 5: Edificações temporárias não reutilizáveis - Tp: 15 anos)",
 }
 s3 = st.selectbox("Fator Estatístico (S3)", list(s3_options.keys()), format_func=lambda x: s3_options[x], index=0)
-s3_tp = {1.11: 100, 1.06: 75, 1.00: 50, 0.95: 37, 0.83: 15}[s3]
 
-s2_fechamento, b, p, fr = calculate_s2(z_fechamento, v0, category, class_)
-s2_cobertura, _, _, _ = calculate_s2(z_cobertura, v0, category, class_)
+b, p, fr, _ = (float(value) for value in s2_parameters(category, class_))
 st.write(f"Parâmetros S2: b = {format_with_comma(b)}, p = {format_with_comma(p)}, Fr = {format_with_comma(fr)}")
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Card 5: Coeficientes de Pressão
 st.markdown('<div class="card"><div class="card-title">Coeficientes de Pressão</div>', unsafe_allow_html=True)
 st.subheader("Coeficiente de Pressão Interno (Cpi) - NBR 6123:2023 Item 6.3.2.1")
-cpi_cases = {
-    "a": "a) Duas faces opostas igualmente permeáveis; as outras faces impermeáveis",
-    "b": "b) Quatro faces igualmente permeáveis",
-    "c": "c) Abertura dominante em uma face; as outras faces de igual permeabilidade",
-}
 cpi_case = st.radio("Selecione o caso para Cpi:", list(cpi_cases.keys()), format_func=lambda x: cpi_cases[x])
-cpi_case_description = cpi_cases[cpi_case]
 
 if cpi_case == "a":
     st.write("- Vento perpendicular a uma face permeável: Cpi = +0,2")
@@ -639,105 +251,299 @@ else:
     cpi = st.multiselect("Selecione os valores de Cpi:", [0.1, 0.3, 0.5, 0.6, 0.8], default=[0.1, 0.3])
 
 st.subheader("Pressões Externas nas Paredes e Cobertura")
-st.write("Defina os coeficientes de pressão externa (Ce) para cada direção.")
-ce_fechamento_0 = st.multiselect("Ce - Fechamento (0°/180°)", [-0.9, -0.4625, -0.2820, -0.425, 0.7], default=[-0.9, -0.4625, -0.2820, -0.425, 0.7])
-ce_fechamento_90 = st.multiselect("Ce - Fechamento (90°/270°)", [-0.9, -0.5, -0.5375], default=[-0.9, -0.5, -0.5375])
-ce_cobertura_0 = st.multiselect("Ce - Cobertura (0°/180°)", [-0.9, -0.6, -0.325, 0.7], default=[-0.9, -0.6, -0.325, 0.7])
-ce_cobertura_90 = st.multiselect("Ce - Cobertura (90°/270°)", [-0.9284, -0.6, -0.5375], default=[-0.9284, -0.6, -0.5375])
+ce_modes = {"manual": "Informar manualmente", "auto": "Automático (tabelas da NBR 6123 pela geometria)"}
+ce_mode = st.radio("Origem dos coeficientes Ce:", list(ce_modes), format_func=lambda x: ce_modes[x], horizontal=True)
+if ce_mode == "auto":
+    # Ce das paredes por h/b e a/b e da cobertura por h/b e θ (ce_tables.py); os valores abaixo vão para o cálculo
+    ce_automatic = geometry_coefficients({"roof_type": roof_type, "height": height, "length": length, "width": width, "slope": slope})
+    ce_fechamento_0 = ce_automatic["ce_fechamento_0"]
+    ce_fechamento_90 = ce_automatic["ce_fechamento_90"]
+    ce_cobertura_0 = ce_automatic["ce_cobertura_0"]
+    ce_cobertura_90 = ce_automatic["ce_cobertura_90"]
+    for label, values in (
+        ("Ce - Fechamento (0°/180°)", ce_fechamento_0),
+        ("Ce - Fechamento (90°/270°)", ce_fechamento_90),
+        ("Ce - Cobertura (0°/180°)", ce_cobertura_0),
+        ("Ce - Cobertura (90°/270°)", ce_cobertura_90),
+    ):
+        if values:
+            st.write(f"{label}: {'; '.join(str(value).replace('.', ',') for value in values)}")
+else:
+    st.write("Defina os coeficientes de pressão externa (Ce) para cada direção.")
+    ce_fechamento_0 = st.multiselect("Ce - Fechamento (0°/180°)", [-0.9, -0.4625, -0.2820, -0.425, 0.7], default=[-0.9, -0.4625, -0.2820, -0.425, 0.7])
+    ce_fechamento_90 = st.multiselect("Ce - Fechamento (90°/270°)", [-0.9, -0.5, -0.5375], default=[-0.9, -0.5, -0.5375])
+    ce_cobertura_0 = st.multiselect("Ce - Cobertura (0°/180°)", [-0.9, -0.6, -0.325, 0.7], default=[-0.9, -0.6, -0.325, 0.7])
+    ce_cobertura_90 = st.multiselect("Ce - Cobertura (90°/270°)", [-0.9284, -0.6, -0.5375], default=[-0.9284, -0.6, -0.5375])
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Card 6: Resultados
-st.markdown('<div class="card"><div class="card-title">Resultados</div>', unsafe_allow_html=True)
+# Card: Edifício Alto (zoneamento vertical da fachada, com cortantes e momentos por pavimento)
+st.markdown('<div class="card"><div class="card-title">Edifício Alto - Zoneamento Vertical (Opcional)</div>', unsafe_allow_html=True)
+tall_building = st.checkbox("Calcular zoneamento vertical por pavimentos")
+if tall_building:
+    col_storeys, col_storey_height, col_tolerance = st.columns(3)
+    storeys = col_storeys.number_input("Número de Pavimentos", min_value=1, max_value=1000, value=30, step=1)
+    storey_height = col_storey_height.number_input("Pé-Direito (m)", min_value=0.1, value=3.0, step=0.1, format="%.2f")
+    zone_tolerance = col_tolerance.number_input("Variação Máxima de q por Zona (%)", min_value=0.1, max_value=100.0, value=5.0, step=0.5) / 100
+st.markdown('</div>', unsafe_allow_html=True)
 
-vk_fechamento = v0 * s1 * s2_fechamento * s3
-vk_cobertura = v0 * s1 * s2_cobertura * s3
+# Card: Combinações de Ações (vento com a carga permanente e a sobrecarga da cobertura, NBR 8681)
+st.markdown('<div class="card"><div class="card-title">Combinações de Ações (Opcional)</div>', unsafe_allow_html=True)
+combine_loads = st.checkbox("Combinar o vento com as cargas da cobertura (ELU e ELS)")
+if combine_loads:
+    col_permanent, col_live = st.columns(2)
+    permanent_load = col_permanent.number_input("Carga Permanente G (kgf/m² de telhado)", min_value=0.0, value=15.0)
+    live_load = col_live.number_input("Sobrecarga Q (kgf/m² em projeção)", min_value=0.0, value=25.0)
+    factor_labels = {
+        "gamma_g": "γg", "gamma_g_favorable": "γg favorável", "gamma_q": "γq", "gamma_w": "γw",
+        "psi0_q": "ψ0 Q", "psi0_w": "ψ0 W", "psi1_q": "ψ1 Q", "psi1_w": "ψ1 W", "psi2_q": "ψ2 Q", "psi2_w": "ψ2 W",
+    }
+    with st.expander("Coeficientes de ponderação e fatores de combinação"):
+        factor_columns = st.columns(5)
+        factors = {
+            key: factor_columns[i % 5].number_input(label, min_value=0.0, value=default_factors[key], step=0.05)
+            for i, (key, label) in enumerate(factor_labels.items())
+        }
+st.markdown('</div>', unsafe_allow_html=True)
 
-q_fechamento_nm2 = 0.613 * vk_fechamento**2
-q_cobertura_nm2 = 0.613 * vk_cobertura**2
-q_fechamento_kgfm2 = q_fechamento_nm2 / 9.81
-q_cobertura_kgfm2 = q_cobertura_nm2 / 9.81
+# Card 6: Resultados
+st.markdown('<div class="card"><div class="card-title">Resultados</div>', unsafe_allow_html=True)
 
-dp_results = {}
-wind_forces = {}
-if roof_type == "Duas Águas":
-    # Calcular o ângulo de inclinação (theta) a partir do percentual de inclinação
-    theta = math.atan(slope / 100)  # slope em % convertido para radianos
-    tan_theta = math.tan(theta)
-    
-    # Calcular coeficientes Ce para barlavento (CPb) e sotavento (CPs) conforme NBR 6123:2023 Tabela 25
-    if 0 <= tan_theta <= 0.07:
-        cpb = 1.4 - 3.5 * tan_theta
-        cps = -0.4
-    elif 0.07 < tan_theta <= 0.4:
-        cpb = -1.4 + 3.5 * tan_theta
-        cps = -0.4
-    else:
-        cpb = -0.9  # Valor padrão para ângulos fora da faixa (sucção máxima)
-        cps = -0.6  # Valor padrão para sotavento
-    
-    # Calcular a área de cada água
-    width_inclined = (width / 2) / math.cos(theta)  # Largura inclinada de cada água
-    area_per_water = length * width_inclined  # Área de cada água (barlavento e sotavento)
-
-    for direction, ce_values in [
-        ("Cobertura (0°/180°)", [cpb, cps]),  # Usando CPb e CPs para barlavento e sotavento
-        ("Cobertura (90°/270°)", [cpb, cps])  # Mesmos coeficientes para perpendicular
-    ]:
-        q = q_cobertura_kgfm2  # Pressão dinâmica em kgf/m²
-        dp_data = []
-        force_data = []
-        for i, ce in enumerate(ce_values):
-            for cp in cpi:
-                dp = q * (ce - cp)  # DP em kgf/m²
-                force = dp * area_per_water if i == 0 else dp * area_per_water  # Força para barlavento e sotavento
-                dp_data.append([format_with_comma(ce), format_with_comma(cp), format_with_comma(dp)])
-                force_data.append([
-                    format_with_comma(ce),
-                    format_with_comma(cp),
-                    format_with_comma(dp),
-                    format_with_comma(area_per_water, 2),
-                    format_with_comma(force, 2)
-                ])
-        dp_results[direction] = dp_data
-        wind_forces[direction] = force_data
-
-# Adicionar as pressões efetivas para o fechamento (que não têm forças calculadas aqui)
-for direction, ce_values in [
-    ("Fechamento (0°/180°)", ce_fechamento_0),
-    ("Fechamento (90°/270°)", ce_fechamento_90),
-]:
-    q = q_fechamento_kgfm2
-    dp_data = []
-    for ce in ce_values:
-        for cp in cpi:
-            dp = q * (ce - cp)
-            dp_data.append([format_with_comma(ce), format_with_comma(cp), format_with_comma(dp)])
-    dp_results[direction] = dp_data
+# Dados para o cálculo e para o PDF
+data = complete_data({
+    "roof_type": roof_type,
+    "length": length,
+    "width": width,
+    "height": height,
+    "slope": slope,
+    "z_fechamento": z_fechamento,
+    "z_cobertura": z_cobertura,
+    "portico_distance": portico_distance,
+    "v0": v0,
+    "category": category,
+    "category_description": category_description,
+    "class_": class_,
+    "s1": s1,
+    "s3": s3,
+})
+if tall_building:
+    data.update({"storeys": int(storeys), "storey_height": storey_height, "zone_tolerance": zone_tolerance})
+if combine_loads:
+    data.update({"permanent_load": permanent_load, "live_load": live_load, **factors})
+coefficients = {
+    "cpi_case": cpi_case,
+    "cpi": cpi,
+    "ce_fechamento_0": ce_fechamento_0,
+    "ce_fechamento_90": ce_fechamento_90,
+    "ce_cobertura_0": ce_cobertura_0,
+    "ce_cobertura_90": ce_cobertura_90,
+    "ce_mode": ce_mode,
+}
+# Modo de depuração (?debug=1 na URL ou C_VENTO_DEBUG=1): mede as etapas desta execução
+debug_mode = st.query_params.get("debug") == "1" or os.environ.get("C_VENTO_DEBUG") == "1"
+with capture() if debug_mode else nullcontext() as debug_spans:
+    try:
+        results, wind_forces = evaluate_results(data, coefficients)
+    except ValueError as exc:  # entradas sem solução (ex.: V0 nulo com zoneamento vertical)
+        st.error(f"Não foi possível calcular: {exc}")
+        st.stop()
+dp_tables, force_tables, envelope_table = cached_tables(results, wind_forces)
 
 st.subheader("Fator S2 Calculado")
-st.write(f"Fechamento: {format_with_comma(s2_fechamento)}")
-st.write(f"Cobertura: {format_with_comma(s2_cobertura)}")
+st.write(f"Fechamento: {format_with_comma(results['s2_fechamento'])}")
+st.write(f"Cobertura: {format_with_comma(results['s2_cobertura'])}")
 st.subheader("Velocidade Característica (Vk)")
-st.write(f"Fechamento: {format_with_comma(vk_fechamento)} m/s")
-st.write(f"Cobertura: {format_with_comma(vk_cobertura)} m/s")
+st.write(f"Fechamento: {format_with_comma(results['vk_fechamento'])} m/s")
+st.write(f"Cobertura: {format_with_comma(results['vk_cobertura'])} m/s")
 st.subheader("Pressão Dinâmica (q)")
-st.write(f"Fechamento: {format_with_comma(q_fechamento_nm2)} N/m² ({format_with_comma(q_fechamento_kgfm2)} kgf/m²)")
-st.write(f"Cobertura: {format_with_comma(q_cobertura_nm2)} N/m² ({format_with_comma(q_cobertura_kgfm2)} kgf/m²)")
+st.write(f"Fechamento: {format_with_comma(results['q_fechamento_nm2'])} N/m² ({format_with_comma(results['q_fechamento_kgfm2'])} kgf/m²)")
+st.write(f"Cobertura: {format_with_comma(results['q_cobertura_nm2'])} N/m² ({format_with_comma(results['q_cobertura_kgfm2'])} kgf/m²)")
 st.subheader("Pressão Efetiva (DP)")
-for direction, dp_data in dp_results.items():
+for direction, dp_df in dp_tables.items():
     st.write(f"{direction}")
-    dp_df = pd.DataFrame(dp_data, columns=["Ce", "Cpi", "DP (kgf/m²)"])
     st.dataframe(dp_df)
+st.write("Envoltória (valores extremos de DP)")
+st.dataframe(envelope_table, hide_index=True)
 
 # Exibir as forças de vento na cobertura de duas águas
 if roof_type == "Duas Águas":
     st.subheader("Forças de Vento na Cobertura de Duas Águas")
-    st.write(f"Área de cada água: {format_with_comma(area_per_water, 2)} m²")
-    for direction, force_data in wind_forces.items():
+    st.write(f"Área de cada água: {format_with_comma(results['area_per_water'], 2)} m²")
+    for direction, force_df in force_tables.items():
         st.write(f"{direction}")
-        force_df = pd.DataFrame(force_data, columns=["Ce", "Cpi", "DP (kgf/m²)", "Área (m²)", "F (kgf)"])
         st.dataframe(force_df)
 
+# Cargas distribuídas nos pórticos (frame_loads.py): pórticos com a mesma largura de influência agrupados
+frame_loads = evaluate_frame_loads(data, coefficients)
+if len(frame_loads["positions"]):
+    st.subheader("Carregamentos de Vento nos Pórticos")
+    st.write(f"Pórticos: {len(frame_loads['positions'])}; cargas em kgf/m (DP x largura de influência; positivo: sobrepressão).")
+    frame_table = frame_load_columns(frame_loads, grouped=True)
+    frame_labels = {"frames": "Pórticos", "tributary_width": "Largura (m)", "case": "Caso", "direction": "Direção",
+                    "ce": "Ce", "cpi": "Cpi", **frame_member_labels}
+    st.dataframe({frame_labels[name]: values for name, values in frame_table.items()}, hide_index=True)
+    frame_csv = io.StringIO()
+    write_frame_loads(frame_loads, frame_csv)
+    st.download_button("Baixar Cargas por Pórtico (CSV)", frame_csv.getvalue(), file_name="cargas_porticos.csv",
+                       mime="text/csv", on_click="ignore")
+
+# Combinações de ações: só os casos que governam cada superfície e cada barra dos pórticos
+if results.get("combinations"):
+    combinations = results["combinations"]
+    st.subheader("Combinações de Ações - Casos que Governam")
+    st.write(f"Casos de vento: {combinations['cases']}; extremos após a poda dos dominados: {combinations['candidates']}.")
+    st.dataframe([dict(zip(["Combinação", "Estado", "Fórmula"], row))
+                  for row in presentation.combination_descriptions(combinations)], hide_index=True)
+    combination_header = ["Estado", "Superfície/Barra", "Extremo", "Valor", "Combinação", "Caso de Vento", "Local"]
+    st.write("Envoltória por superfície (kgf/m²)")
+    st.dataframe([dict(zip(combination_header, row)) for row in presentation.combination_rows(combinations, "surfaces")],
+                 hide_index=True)
+    if combinations["members"]:
+        st.write("Envoltória por barra dos pórticos (kgf/m)")
+        st.dataframe([dict(zip(combination_header, row)) for row in presentation.combination_rows(combinations, "members")],
+                     hide_index=True)
+
+# Exportação dos resultados numéricos (esquema tipado de result_schema)
+export_json, export_xlsx = cached_exports(project_info["project"], data, coefficients, results, wind_forces)
+col_json, col_xlsx = st.columns(2)
+col_json.download_button("Exportar Resultados (JSON)", export_json, file_name="resultados_vento.json", mime="application/json", on_click="ignore")
+if export_xlsx is not None:
+    col_xlsx.download_button(
+        "Exportar Resultados (Excel)", export_xlsx, file_name="resultados_vento.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", on_click="ignore"
+    )
+
+# Zoneamento vertical: resumo por direção e tabela das zonas
+zoning = results.get("zoning")
+if zoning:
+    st.subheader("Zoneamento Vertical")
+    st.write(f"{zoning['storeys']} pavimentos, altura total {format_with_comma(zoning['height'])} m, {len(zoning['zones']['storeys'])} zonas")
+    for i, direction in enumerate(zoning["directions"]):
+        st.write(
+            f"{direction}: cortante na base {format_with_comma(zoning['base_shear'][i])} kgf; "
+            f"momento na base {format_with_comma(zoning['base_moment'][i])} kgf.m"
+        )
+    zone_columns = ["Zona", "Cotas (m)", "Pav.", "S2", "q (kgf/m²)"]
+    zone_columns += [f"V {direction} (kgf)" for direction in zoning["directions"]]
+    zone_columns += [f"M {direction} (kgf.m)" for direction in zoning["directions"]]
+    st.dataframe(dict(zip(zone_columns, zip(*presentation.zoning_rows(zoning)))), hide_index=True)
+
+st.markdown('</div>', unsafe_allow_html=True)
+
+# Card: Estudo Paramétrico (varia as entradas sobre uma grade e calcula todos os pontos de uma vez)
+st.markdown('<div class="card"><div class="card-title">Estudo Paramétrico (Opcional)</div>', unsafe_allow_html=True)
+sweep_labels = {
+    "length": "Comprimento (l1) (m)",
+    "width": "Largura (l2) (m)",
+    "height": "Pé-Direito (m)",
+    "z_fechamento": "Altura Média - Fechamento (h) (m)",
+    "z_cobertura": "Altura Média - Cobertura (m)",
+    "slope": "Inclinação da Cobertura (%)",
+    "v0": "V0 (m/s)",
+    "s1": "Fator Topográfico (S1)",
+    "s3": "Fator Estatístico (S3)",
+    "category": "Categoria de Rugosidade",
+    "class_": "Classe",
+}
+sweep_inputs = st.multiselect("Entradas a variar", list(sweep_labels), format_func=lambda x: sweep_labels[x])
+sweep_grid = {}
+for name in sweep_inputs:
+    if name == "category":
+        sweep_grid[name] = st.multiselect(sweep_labels[name], list(category_options), default=list(category_options))
+    elif name == "class_":
+        sweep_grid[name] = st.multiselect(sweep_labels[name], ["A", "B", "C"], default=["A", "B", "C"])
+    elif name == "s1":
+        sweep_grid[name] = st.multiselect(sweep_labels[name], [1.0, 0.9, 1.1], default=[1.0, 0.9, 1.1])
+    elif name == "s3":
+        sweep_grid[name] = st.multiselect(sweep_labels[name], list(s3_options), default=list(s3_options))
+    else:
+        col_start, col_stop, col_steps = st.columns(3)
+        start = col_start.number_input(f"{sweep_labels[name]} - início", value=float(data[name]) * 0.5, key=f"sweep_{name}_start")
+        stop = col_stop.number_input("Fim", value=float(data[name]) * 1.5, key=f"sweep_{name}_stop")
+        steps = col_steps.number_input("Pontos", min_value=2, max_value=2000, value=20, step=1, key=f"sweep_{name}_steps")
+        sweep_grid[name] = linear_range(start, stop, steps)
+
+if sweep_grid and all(len(values) for values in sweep_grid.values()) and st.toggle("Executar estudo paramétrico"):
+    sweep_result = run_sweep(data, coefficients, sweep_grid)
+    sweep_columns_labels = {
+        "vk_fechamento": "Vk - Fechamento (m/s)",
+        "vk_cobertura": "Vk - Cobertura (m/s)",
+        "q_fechamento_kgfm2": "q - Fechamento (kgf/m²)",
+        "q_cobertura_kgfm2": "q - Cobertura (kgf/m²)",
+        "dp_max_fechamento_0": "DP máx. - Fechamento (0°/180°) (kgf/m²)",
+        "dp_min_fechamento_0": "DP mín. - Fechamento (0°/180°) (kgf/m²)",
+        "dp_max_fechamento_90": "DP máx. - Fechamento (90°/270°) (kgf/m²)",
+        "dp_min_fechamento_90": "DP mín. - Fechamento (90°/270°) (kgf/m²)",
+        "dp_max_cobertura": "DP máx. - Cobertura (kgf/m²)",
+        "dp_min_cobertura": "DP mín. - Cobertura (kgf/m²)",
+        "F_max_cobertura": "F máx. - Cobertura (kgf)",
+        "F_min_cobertura": "F mín. - Cobertura (kgf)",
+        "F_prime": "Força Total F' (kgf)",
+    }
+    st.write(f"Pontos calculados: {sweep_result['size']}")
+    st.caption("Primeiros 1000 pontos; o CSV completo pode ser baixado abaixo.")
+    sweep_points = sweep_frame(sweep_result, rows=range(min(1000, sweep_result["size"])))
+    st.dataframe(sweep_points)
+    if len(sweep_inputs) >= 2:
+        heatmap_column = st.selectbox(
+            "Resultado no mapa de calor",
+            [c for c in sweep_columns_labels if c in sweep_result["columns"]],
+            format_func=lambda x: sweep_columns_labels[x],
+        )
+        heatmap_x = st.selectbox("Eixo horizontal", sweep_inputs, format_func=lambda x: sweep_labels[x])
+        heatmap_y = st.selectbox("Eixo vertical", [n for n in sweep_inputs if n != heatmap_x], format_func=lambda x: sweep_labels[x])
+        st.pyplot(heatmap_figure(sweep_result, heatmap_column, heatmap_x, heatmap_y, {**sweep_labels, **sweep_columns_labels}))
+    if st.toggle("Preparar CSV completo do estudo"):
+        st.download_button(
+            label="Baixar Estudo Paramétrico (CSV)",
+            data=sweep_frame(sweep_result).to_csv(index=False, sep=";", decimal=","),
+            file_name="estudo_parametrico.csv",
+            mime="text/csv",
+            on_click="ignore",
+        )
+st.markdown('</div>', unsafe_allow_html=True)
+
+# Card: Análise Probabilística (Monte Carlo sobre V0, categoria de rugosidade e exposição)
+st.markdown('<div class="card"><div class="card-title">Análise Probabilística (Opcional)</div>', unsafe_allow_html=True)
+if st.toggle("Executar análise probabilística (incluída no relatório)"):
+    col_samples, col_seed = st.columns(2)
+    mc_samples = col_samples.selectbox(
+        "Número de amostras", [100_000, 1_000_000, 5_000_000], index=1,
+        format_func=lambda x: f"{x:,}".replace(",", "."),
+    )
+    mc_seed = col_seed.number_input("Semente", min_value=0, value=0, step=1)
+    col_v0, col_exposure, col_category = st.columns(3)
+    mc_v0_cov = col_v0.number_input("Variação de V0 (%)", min_value=0.0, max_value=50.0, value=default_v0_cov * 100, step=1.0)
+    mc_exposure_cov = col_exposure.number_input("Variação da exposição (%)", min_value=0.0, max_value=50.0, value=default_exposure_cov * 100, step=1.0)
+    mc_confidence = col_category.number_input(
+        "Confiança na categoria (%)", min_value=0.0, max_value=100.0, value=default_category_confidence * 100, step=5.0
+    )
+    mc_threshold = st.number_input("q limite para excedência (kgf/m², opcional)", min_value=0.0, value=0.0)
+    probabilistic_summary = cached_monte_carlo(
+        data, coefficients, mc_samples, int(mc_seed), mc_v0_cov / 100, mc_exposure_cov / 100, mc_confidence / 100,
+        (mc_threshold,) if mc_threshold > 0 else (),
+    )
+    # O resumo segue junto dos resultados para o relatório (Seção 16)
+    results = dict(results, probabilistic=probabilistic_summary)
+    percentile_columns = [presentation.percentile_label(p) for p in probabilistic_summary["percentiles"]]
+    st.write("Percentis de q e DP (kgf/m²)")
+    st.dataframe(dict(zip(
+        ["Grandeza", "Determinístico", "Média", "Desvio"] + percentile_columns,
+        zip(*presentation.probabilistic_rows(probabilistic_summary)),
+    )), hide_index=True)
+    st.write("Probabilidade de excedência de q")
+    st.dataframe(dict(zip(
+        ["Superfície", "q limite (kgf/m²)", "P(q > limite)", "IC 95%"],
+        zip(*presentation.exceedance_rows(probabilistic_summary)),
+    )), hide_index=True)
+    top = percentile_columns[-1]
+    st.write("Diagnóstico de convergência")
+    st.dataframe(dict(zip(
+        ["Superfície", "EP média", f"EP {top}", f"EP relativo {top}", "Convergiu"],
+        zip(*presentation.convergence_rows(probabilistic_summary)),
+    )), hide_index=True)
+    convergence = probabilistic_summary["q"]["fechamento"]["convergence"]
+    st.caption(f"Convergência do {top} de q no fechamento")
+    st.line_chart({"Amostras": convergence["samples"], top: convergence[f"p{probabilistic_summary['percentiles'][-1]:g}"]}, x="Amostras")
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Card: Upload de Imagem
@@ -747,56 +553,149 @@ if uploaded_image is not None:
     st.image(uploaded_image, caption="Imagem Inserida", use_column_width=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Dados para o PDF
-data = {
-    "roof_type": roof_type,
-    "length": length,
-    "width": width,
-    "height": height,
-    "slope": slope,
-    "z_fechamento": z_fechamento,
-    "z_cobertura": z_cobertura,
-    "portico_distance": portico_distance,
-    "v0": v0,
-    "category": category,
-    "category_description": category_description,
-    "class_": class_,
-    "s1": s1,
-    "s3": s3,
-    "s3_tp": s3_tp,
-}
-results = {
-    "s2_fechamento": s2_fechamento,
-    "s2_cobertura": s2_cobertura,
-    "vk_fechamento": vk_fechamento,
-    "vk_cobertura": vk_cobertura,
-    "q_fechamento_nm2": q_fechamento_nm2,
-    "q_cobertura_nm2": q_cobertura_nm2,
-    "q_fechamento_kgfm2": q_fechamento_kgfm2,
-    "q_cobertura_kgfm2": q_cobertura_kgfm2,
-    "cpi_case_description": cpi_case_description,
-    "cpi": cpi,
-    "ce_fechamento_0": ce_fechamento_0,
-    "ce_fechamento_90": ce_fechamento_90,
-    "ce_cobertura_0": ce_cobertura_0,
-    "ce_cobertura_90": ce_cobertura_90,
-    "dp_results": dp_results,
-    "b": b,
-    "p": p,
-    "fr": fr
-}
-
 # Botão para gerar o relatório
 st.markdown("<div style='text-align: center; margin-top: 20px;'>", unsafe_allow_html=True)
 if st.button("Gerar Relatório PDF"):
-    pdf_buffer = generate_pdf(data, results, project_info, wind_forces, uploaded_image)
-    st.download_button(
-        label="Baixar Relatório PDF",
-        data=pdf_buffer,
-        file_name="relatorio_vento.pdf",
-        mime="application/pdf",
-        on_click="ignore",
-        icon=":material/download:",
-        type="primary"
-    )
+    image_bytes = uploaded_image.getvalue() if uploaded_image is not None else None
+    st.session_state["pdf_job"] = pdf_jobs().submit(data, results, project_info, wind_forces, image_bytes)
+elif "pdf_job" in st.session_state:
+    # O relatório pedido antes deixa de valer quando as entradas mudam
+    image_bytes = uploaded_image.getvalue() if uploaded_image is not None else None
+    if pdf_cache_key(data, results, project_info, wind_forces, image_bytes) != st.session_state["pdf_job"]:
+        del st.session_state["pdf_job"]
+
+# Acompanha o job do relatório sem bloquear a sessão: só este trecho é reexecutado a cada segundo
+@st.fragment(run_every=1)
+def pdf_job_status():
+    job_id = st.session_state.get("pdf_job")
+    if job_id is None:
+        return
+    status = pdf_jobs().status(job_id)
+    if status["state"] == "queued":
+        st.info(f"Relatório na fila (posição {status['position']})...")
+    elif status["state"] == "running":
+        st.info(f"Gerando relatório... ({status['elapsed']:.0f} s)")
+    elif status["state"] == "error":
+        st.error(f"Falha ao gerar o relatório: {status['error']}")
+    elif status["state"] == "done":
+        st.download_button(
+            label="Baixar Relatório PDF",
+            data=pdf_jobs().result(job_id),
+            file_name="relatorio_vento.pdf",
+            mime="application/pdf",
+            on_click="ignore",
+            icon=":material/download:",
+            type="primary"
+        )
+    else:
+        del st.session_state["pdf_job"]
+
+pdf_job_status()
 st.markdown("</div>", unsafe_allow_html=True)
+
+# Card: Projetos Salvos (revisões no banco local, consulta e reemissão do memorial sem recalcular)
+st.markdown('<div class="card"><div class="card-title">Projetos Salvos</div>', unsafe_allow_html=True)
+store = project_store()
+if st.button("Salvar Revisão"):
+    image_bytes = uploaded_image.getvalue() if uploaded_image is not None else None
+    current_pdf = pdf_cache_key(data, results, project_info, wind_forces, image_bytes)
+    saved = store.save(
+        data, coefficients, project_info, results, wind_forces,
+        pdf_key=current_pdf if st.session_state.get("pdf_job") == current_pdf else None,
+        image_bytes=image_bytes,
+    )
+    if saved["created"]:
+        st.success(f"Revisão {saved['number']} salva.")
+    else:
+        st.info(f"As entradas e a imagem são as da revisão {saved['number']}; nada foi salvo.")
+col_client, col_project, col_municipality = st.columns(3)
+filters = {
+    "client": col_client.text_input("Buscar cliente"),
+    "project": col_project.text_input("Buscar obra"),
+    "municipality": col_municipality.text_input("Buscar localização"),
+}
+# Paginação por cursor: pilha com o cursor de cada página visitada (reiniciada quando a busca muda)
+if st.session_state.get("store_filters") != filters:
+    st.session_state["store_filters"] = filters
+    st.session_state["store_pages"] = [None]
+pages = st.session_state["store_pages"]
+projects, next_page = store.list_projects(**filters, limit=20, after=pages[-1])
+col_previous, col_next = st.columns(2)
+if col_previous.button("Página anterior", disabled=len(pages) == 1):
+    pages.pop()
+    st.rerun()
+if col_next.button("Próxima página", disabled=next_page is None):
+    pages.append(next_page)
+    st.rerun()
+if projects:
+    st.dataframe({
+        "Cliente": [row["client"] for row in projects],
+        "Obra": [row["project"] for row in projects],
+        "Localização": [row["municipality"] for row in projects],
+        "Revisões": [row["revisions"] for row in projects],
+        "Atualizado em": [row["updated_at"].replace("T", " ") for row in projects],
+    }, hide_index=True)
+    selected = st.selectbox(
+        "Projeto", projects, format_func=lambda row: f"{row['client']} - {row['project']} ({row['revisions']} rev.)"
+    )
+    revisions = store.revisions(selected["id"])
+    st.dataframe({
+        "Revisão": [row["number"] for row in revisions],
+        "Data": [row["created_at"].replace("T", " ") for row in revisions],
+        "q Fechamento (kgf/m²)": [format_with_comma(row["summary"]["q_fechamento_kgfm2"]) for row in revisions],
+        "q Cobertura (kgf/m²)": [format_with_comma(row["summary"]["q_cobertura_kgfm2"]) for row in revisions],
+    }, hide_index=True)
+    numbers = [row["number"] for row in revisions]
+    if len(numbers) > 1:
+        col_old, col_new = st.columns(2)
+        old_number = col_old.selectbox("Comparar revisão", numbers, index=1)
+        new_number = col_new.selectbox("com a revisão", numbers, index=0)
+        changes = store.diff(selected["id"], old_number, new_number)
+        if changes:
+            st.dataframe({
+                "Campo": [field for field, _, _ in changes],
+                f"Revisão {old_number}": [str(old) for _, old, _ in changes],
+                f"Revisão {new_number}": [str(new) for _, _, new in changes],
+            }, hide_index=True)
+        else:
+            st.write("As revisões têm as mesmas entradas.")
+    reissue_number = st.selectbox("Revisão do memorial", numbers)
+    revision_id = next(row["id"] for row in revisions if row["number"] == reissue_number)
+    if st.button("Reemitir Memorial"):
+        with st.spinner("Reemitindo o memorial..."):
+            st.session_state["store_pdf"] = (revision_id, store.reissue(revision_id, cache=pdf_jobs().cache))
+    if st.session_state.get("store_pdf", (None,))[0] == revision_id:
+        st.download_button(
+            label=f"Baixar Memorial da Revisão {reissue_number}",
+            data=st.session_state["store_pdf"][1],
+            file_name=f"relatorio_vento_rev{reissue_number}.pdf",
+            mime="application/pdf",
+            on_click="ignore",
+            icon=":material/download:",
+        )
+else:
+    st.write("Nenhum projeto encontrado.")
+st.markdown('</div>', unsafe_allow_html=True)
+
+# Painel de depuração: tempos e contadores das etapas do cálculo, do memorial e do cache do grafo
+if debug_mode:
+    with st.expander("Depuração: Tempos de Execução", expanded=True):
+        if st.button("Medir Geração do Memorial"):
+            # Gerado nesta sessão (fora da fila) para que os spans das seções fiquem visíveis
+            from report import generate_pdf
+
+            with capture() as report_spans:
+                generate_pdf(data, results, project_info, wind_forces, uploaded_image)
+            debug_spans += report_spans
+        rows = span_rows(debug_spans)
+        st.dataframe({
+            "Etapa": ["· " * depth + name for depth, name, _, _ in rows],
+            "Tempo (ms)": [round(duration_ms, 3) for _, _, duration_ms, _ in rows],
+            "Detalhes": [", ".join(f"{key}={value}" for key, value in details.items()) for _, _, _, details in rows],
+        }, hide_index=True)
+        st.write("Cache do grafo de cálculo (acumulado no servidor)")
+        st.dataframe({
+            "Etapa": list(graph.stats),
+            "Acertos": [counters["hits"] for counters in graph.stats.values()],
+            "Recálculos": [counters["misses"] for counters in graph.stats.values()],
+        }, hide_index=True)
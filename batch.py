@@ -0,0 +1,378 @@
+import argparse
+import csv
+import io
+import json
+from datetime import datetime
+import os
+import re
+import sys
+import zipfile
+
+from calculation import (
+    automatic_ce,
+    calculate_results,
+    complete_data,
+    default_coefficients,
+    default_cpi_values,
+    default_data,
+    default_project_info,
+)
+from combinations import factor_fields
+from isopleths import lookup_v0
+from parallel import default_workers, run_parallel
+import tracing
+
+# Campos do manifesto que são números ou listas de números
+float_fields = {
+    "length", "width", "height", "slope", "z_fechamento", "z_cobertura",
+    "portico_distance", "v0", "s1", "s3", "storey_height", "zone_tolerance",
+    "v0_cov", "exposure_cov", "category_confidence",
+    "permanent_load", "live_load", *factor_fields,  # combinações de ações
+}
+int_fields = {"storeys", "max_zones", "mc_samples", "mc_seed"}  # modo edifício alto e análise probabilística
+list_fields = {"cpi", "ce_fechamento_0", "ce_fechamento_90", "ce_cobertura_0", "ce_cobertura_90"}
+
+# Colunas do CSV de resumo
+summary_fields = [
+    "id", "status", "error", "file", "client", "project", "location",
+    "s2_fechamento", "s2_cobertura", "vk_fechamento", "vk_cobertura",
+    "q_fechamento_kgfm2", "q_cobertura_kgfm2",
+    "dp_max_fechamento", "dp_min_fechamento", "dp_max_cobertura", "dp_min_cobertura",
+    "F_prime", "base_shear_0", "base_shear_90", "base_moment_0", "base_moment_90",
+    "q_p99_fechamento", "q_p99_cobertura", "revision",
+]
+
+# Aceita "48,5" ou "48.5"
+def parse_number(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).strip().replace(",", "."))
+
+# Listas no CSV são separadas por "|" (ex.: "0,2|-0,3")
+def parse_list(value):
+    if isinstance(value, (list, tuple)):
+        return [parse_number(v) for v in value]
+    return [parse_number(v) for v in str(value).split("|") if v.strip()]
+
+# Função para ler o manifesto (CSV com ";" ou "," ou JSON com uma lista de edificações)
+def read_manifest(path):
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows["buildings"]
+        return rows
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = f.readline()
+        f.seek(0)
+        delimiter = ";" if ";" in header else ","
+        return list(csv.DictReader(f, delimiter=delimiter))
+
+# Converte uma linha do manifesto nos dicionários data, project_info e coefficients
+def build_inputs(row):
+    row = {k.strip(): v for k, v in row.items() if k and v is not None and v != ""}
+    data = dict(default_data)
+    project_info = dict(default_project_info)
+    coefficients = dict(default_coefficients)
+
+    cpi_case = str(row.get("cpi_case", coefficients["cpi_case"])).strip().lower()
+    coefficients["cpi_case"] = cpi_case
+    coefficients["cpi"] = list(default_cpi_values[cpi_case])
+
+    for key, value in row.items():
+        if key in default_project_info:
+            project_info[key] = str(value)
+        elif key in list_fields:
+            coefficients[key] = parse_list(value)
+        elif key == "ce_mode":
+            # "auto": Ce pela geometria (tabelas da NBR 6123), ignorando as listas de Ce da linha
+            coefficients["ce_mode"] = str(value).strip().lower()
+        elif key in float_fields:
+            data[key] = parse_number(value)
+        elif key in int_fields:
+            data[key] = int(parse_number(value))
+        elif key in default_data:
+            data[key] = str(value).strip()
+
+    automatic_ce(coefficients)  # valida o modo de Ce
+
+    # Sem V0 no manifesto, usa a isopleta do município (state/city)
+    if "v0" not in row and row.get("city"):
+        v0 = lookup_v0(row.get("state", ""), row["city"])
+        if v0 is None:
+            raise ValueError(f"V0 não informado e município não encontrado na lista de isopletas: {row['city']}")
+        data["v0"] = v0
+    return complete_data(data), project_info, coefficients
+
+# Análise probabilística (Monte Carlo) quando a linha informa mc_samples; o resumo vai para a
+# Seção 16 do memorial
+def with_probabilistic(data, coefficients, results):
+    if not data.get("mc_samples"):
+        return results
+    import probabilistic
+
+    return dict(results, probabilistic=probabilistic.run_monte_carlo(
+        data, coefficients, samples=data["mc_samples"], seed=data.get("mc_seed", 0),
+        v0_cov=data.get("v0_cov", probabilistic.default_v0_cov),
+        exposure_cov=data.get("exposure_cov", probabilistic.default_exposure_cov),
+        category_confidence=data.get("category_confidence", probabilistic.default_category_confidence),
+    ))
+
+# Nome de arquivo seguro a partir do identificador da edificação
+def safe_file_name(value):
+    return re.sub(r"[^\w.-]+", "_", str(value)).strip("_") or "memorial"
+
+# Função para processar uma edificação do manifesto (cálculo + PDF opcional).
+# Sem output_dir, o PDF volta no próprio resumo (chave "pdf") em vez de ir para um arquivo.
+# Com keep_result, o resumo também leva o resultado tipado (chave "result") para exportação.
+@tracing.timed("batch.building")
+def process_building(index, row, output_dir, write_pdf=True, cache_dir=None, generated_at=None, keep_result=False,
+                     store_path=None):
+    building_id = row.get("id") or f"{index + 1:04d}"
+    summary = {"id": building_id, "status": "ok", "error": ""}
+    try:
+        data, project_info, coefficients = build_inputs(row)
+        # Com o banco de projetos, entradas já calculadas reaproveitam os resultados salvos
+        store = stored = None
+        if store_path:
+            # Linha sem projeto: a edificação é um projeto próprio, identificado pelo id da linha
+            # (senão edificações diferentes viram revisões do projeto padrão)
+            if not str(row.get("project") or "").strip():
+                project_info["project"] = building_id
+            from project_store import open_store
+
+            store = open_store(store_path)
+            stored = store.find(data, coefficients, project_info)
+        if stored is not None:
+            results, wind_forces = stored["results"], stored["wind_forces"]
+        else:
+            results, wind_forces = calculate_results(data, coefficients)
+            results = with_probabilistic(data, coefficients, results)
+        summary.update({
+            "client": project_info["client"],
+            "project": project_info["project"],
+            "location": project_info["location"],
+            "s2_fechamento": results["s2_fechamento"],
+            "s2_cobertura": results["s2_cobertura"],
+            "vk_fechamento": results["vk_fechamento"],
+            "vk_cobertura": results["vk_cobertura"],
+            "q_fechamento_kgfm2": results["q_fechamento_kgfm2"],
+            "q_cobertura_kgfm2": results["q_cobertura_kgfm2"],
+            "F_prime": results["friction"]["F_prime"],
+        })
+        if keep_result:
+            from result_schema import BuildingResult
+
+            summary["result"] = BuildingResult.from_calculation(building_id, data, coefficients, results, wind_forces)
+        # Envoltória de DP por superfície (vazio quando a superfície não se aplica)
+        for surface in ("fechamento", "cobertura"):
+            entry = results["envelope"].get(surface.capitalize()) or {}
+            for field, key in (("dp_max", "max_pressure"), ("dp_min", "max_suction")):
+                case = entry.get(key)
+                summary[f"{field}_{surface}"] = case["dp"] if case else ""
+        # Cortante e momento na base (somente no modo edifício alto)
+        zoning = results.get("zoning")
+        if zoning:
+            for i, direction in enumerate(("0", "90")):
+                summary[f"base_shear_{direction}"] = zoning["base_shear"][i]
+                summary[f"base_moment_{direction}"] = zoning["base_moment"][i]
+        if "probabilistic" in results:
+            for surface in ("fechamento", "cobertura"):
+                summary[f"q_p99_{surface}"] = results["probabilistic"]["q"][surface]["percentiles"].get(99.0, "")
+        pdf_key = image_bytes = None
+        if row.get("image") and (cache_dir or store is not None):
+            with open(row["image"], "rb") as f:
+                image_bytes = f.read()
+        if write_pdf:
+            file_name = f"memorial_{safe_file_name(building_id)}.pdf"
+            if cache_dir:
+                from pdf_cache import PdfCache, pdf_cache_key
+
+                pdf = PdfCache(cache_dir).get_or_render(
+                    data, results, project_info, wind_forces, image_bytes, generated_at=generated_at
+                )
+                pdf_key = pdf_cache_key(data, results, project_info, wind_forces, image_bytes)
+            else:
+                from report import generate_pdf
+
+                pdf = generate_pdf(
+                    data, results, project_info, wind_forces, row.get("image") or None, generated_at=generated_at
+                ).getvalue()
+            if output_dir is None:
+                summary["pdf"] = pdf
+            else:
+                with open(os.path.join(output_dir, file_name), "wb") as f:
+                    f.write(pdf)
+            summary["file"] = file_name
+        if store is not None:
+            saved = store.save(data, coefficients, project_info, results, wind_forces, pdf_key=pdf_key,
+                               image_bytes=image_bytes)
+            summary["revision"] = saved["number"]
+    except Exception as exc:
+        summary["status"] = "erro"
+        summary["error"] = f"{type(exc).__name__}: {exc}"
+    return summary
+
+# Função para escrever o CSV de resumo (em um caminho ou em um arquivo de texto aberto)
+def write_summary(path, summaries):
+    if not isinstance(path, (str, os.PathLike)):
+        writer = csv.DictWriter(path, fieldnames=summary_fields, delimiter=";", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(summaries)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        write_summary(f, summaries)
+
+# Resumo de uma edificação cujo processo falhou fora de process_building
+def failed_summary(rows, index, exc):
+    return {
+        "id": rows[index].get("id") or f"{index + 1:04d}",
+        "status": "erro",
+        "error": f"{type(exc).__name__}: {exc}",
+    }
+
+# Função para processar o manifesto inteiro (em série ou em um pool de processos)
+def run_batch(rows, output_dir, write_pdf=True, progress=None, workers=1, cache_dir=None, generated_at=None,
+              keep_results=False, store_path=None, ordered=False):
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    if workers > 1 and len(rows) > 1:
+        return run_parallel(
+            process_building,
+            [(index, row, output_dir, write_pdf, cache_dir, generated_at, keep_results, store_path)
+             for index, row in enumerate(rows)],
+            workers=min(workers, len(rows)),
+            progress=progress,
+            on_error=lambda index, exc: failed_summary(rows, index, exc),
+            warm_up=("report",) if write_pdf else (),
+            ordered=ordered,
+        )
+
+    summaries = []
+    for index, row in enumerate(rows):
+        summaries.append(process_building(index, row, output_dir, write_pdf, cache_dir, generated_at, keep_results,
+                                          store_path))
+        if progress is not None:
+            progress(index + 1, len(rows), summaries[-1])
+    return summaries
+
+# Arquivo ZIP de memoriais gravado à medida que cada PDF fica pronto. target é um caminho
+# ou um arquivo binário aberto, que pode não aceitar seek (saída padrão, resposta HTTP).
+# Cada PDF é gravado e descartado do resumo em add(); só o resumo fica na memória.
+class ZipExport:
+    def __init__(self, target, generated_at=None, summary_name="resumo.csv"):
+        # Com data fixa, as datas das entradas também são fixas; adicionando os PDFs na ordem do
+        # manifesto, o ZIP é reprodutível
+        self.date_time = (generated_at or datetime.now()).timetuple()[:6]
+        self.summary_name = summary_name
+        self.archive = zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED)
+        self.names = set()
+
+    def _entry(self, name):
+        info = zipfile.ZipInfo(name, self.date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    def add(self, summary):
+        pdf = summary.pop("pdf", None)
+        if pdf is None:
+            return
+        name = summary["file"]
+        stem, suffix = os.path.splitext(name)
+        count = 1
+        while name in self.names:  # identificadores repetidos no manifesto
+            count += 1
+            name = f"{stem}_{count}{suffix}"
+        self.names.add(name)
+        summary["file"] = name
+        self.archive.writestr(self._entry(name), pdf)
+
+    def close(self, summaries):
+        with self.archive.open(self._entry(self.summary_name), "w") as f:
+            with io.TextIOWrapper(f, encoding="utf-8", newline="") as text:
+                write_summary(text, summaries)
+        self.archive.close()
+
+# Função para exportar os memoriais e o resumo em um único ZIP, sem acumular os PDFs na memória:
+# só os que estão em andamento nos processos ou esperando a vez ocupam memória ao mesmo tempo.
+# As entradas seguem a ordem do manifesto, qualquer que seja o número de processos.
+def export_zip(rows, target, progress=None, workers=1, cache_dir=None, generated_at=None, summary_name="resumo.csv",
+               keep_results=False, store_path=None):
+    export = ZipExport(target, generated_at, summary_name)
+
+    def add(done, total, summary):
+        export.add(summary)
+        if progress is not None:
+            progress(done, total, summary)
+
+    summaries = run_batch(
+        rows, None, write_pdf=True, progress=add, workers=workers,
+        cache_dir=cache_dir, generated_at=generated_at, keep_results=keep_results, store_path=store_path,
+        ordered=True,
+    )
+    export.close(summaries)
+    return summaries
+
+def print_progress(done, total, summary):
+    status = summary["status"] if not summary["error"] else f"{summary['status']} ({summary['error']})"
+    print(f"[{done}/{total}] {summary['id']}: {status}", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera memoriais de cálculo de vento (NBR 6123:2023) em lote a partir de um manifesto CSV/JSON.")
+    parser.add_argument("manifest", help="Arquivo CSV (; ou ,) ou JSON com uma edificação por linha")
+    parser.add_argument("-o", "--output-dir", default="memoriais", help="Pasta de saída dos PDFs")
+    parser.add_argument("--summary", help="Caminho do CSV de resumo (padrão: <output-dir>/resumo.csv)")
+    parser.add_argument("--no-pdf", action="store_true", help="Apenas calcula e escreve o resumo")
+    parser.add_argument("--export", help="Exporta os resultados numéricos (.json, .jsonl, .xlsx ou .parquet para uma pasta de tabelas Parquet)")
+    parser.add_argument("--zip", help="Grava os memoriais e o resumo em um único arquivo ZIP (\"-\" para a saída padrão) em vez da pasta de saída")
+    parser.add_argument("-j", "--workers", type=int, default=default_workers(), help="Número de processos para gerar os PDFs (padrão: núcleos disponíveis)")
+    parser.add_argument("--cache-dir", help="Pasta do cache de PDFs; memoriais com as mesmas entradas não são gerados de novo")
+    parser.add_argument("--store", help="Banco de projetos (SQLite) onde cada edificação é salva como revisão; entradas já salvas não são recalculadas. Linhas sem project usam o id como nome do projeto")
+    parser.add_argument("--date", help="Data do rodapé (AAAA-MM-DD ou AAAA-MM-DDTHH:MM); torna os PDFs reprodutíveis")
+    parser.add_argument("--ce-mode", choices=("manual", "auto"), help="Modo de Ce das linhas sem a coluna ce_mode (auto: tabelas da NBR 6123 pela geometria; padrão: manual)")
+    parser.add_argument("--trace", help="Grava os tempos de cada etapa: log, json:ARQUIVO e/ou otlp:ARQUIVO (separados por vírgula)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Não mostra o progresso")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        # Também pela variável de ambiente, para os processos do pool
+        os.environ["C_VENTO_TRACE"] = args.trace
+        tracing.configure(args.trace)
+    rows = read_manifest(args.manifest)
+    if args.ce_mode:
+        for row in rows:
+            if not row.get("ce_mode"):
+                row["ce_mode"] = args.ce_mode
+    progress = None if args.quiet else print_progress
+    generated_at = datetime.fromisoformat(args.date) if args.date else None
+    keep_results = bool(args.export)
+    if args.zip:
+        target = sys.stdout.buffer if args.zip == "-" else args.zip
+        summaries = export_zip(
+            rows, target, progress=progress, workers=args.workers,
+            cache_dir=args.cache_dir, generated_at=generated_at, keep_results=keep_results, store_path=args.store
+        )
+        if args.summary:
+            write_summary(args.summary, summaries)
+    else:
+        summaries = run_batch(
+            rows, args.output_dir, write_pdf=not args.no_pdf,
+            progress=progress,
+            workers=args.workers,
+            cache_dir=args.cache_dir,
+            generated_at=generated_at,
+            keep_results=keep_results,
+            store_path=args.store
+        )
+        write_summary(args.summary or os.path.join(args.output_dir, "resumo.csv"), summaries)
+
+    if args.export:
+        from result_schema import export_results
+
+        export_results([s["result"] for s in summaries if s.get("result") is not None], args.export)
+    failures = sum(1 for s in summaries if s["status"] != "ok")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from batch import process_building
+from calculation import (
+    calculate_results,
+    complete_data,
+    default_coefficients,
+    default_data,
+    default_project_info,
+)
+
+# Data fixa do rodapé: o PDF gerado é sempre o mesmo, e o tamanho pode ser comparado
+FIXED_DATE = datetime(2024, 1, 1)
+
+# Tamanhos de lote medidos
+BATCH_SIZES = (1, 100, 10000)
+
+# Função para gerar edificações de teste reprodutíveis (mesma semente, mesmas entradas)
+def building_fixtures(count, seed=2023):
+    rng = np.random.default_rng(seed)
+    categories = np.array(["I", "II", "III", "IV", "V"])
+    classes = np.array(["A", "B", "C"])
+    s3_values = np.array([1.11, 1.06, 1.00, 0.95, 0.83])
+    rows = []
+    for i in range(count):
+        length = round(float(rng.uniform(20, 200)), 1)
+        width = round(float(rng.uniform(10, 60)), 1)
+        z_fechamento = round(float(rng.uniform(4, 20)), 1)
+        rows.append({
+            "id": f"B{i:05d}",
+            "roof_type": "Duas Águas" if i % 3 else "Uma Água",
+            "length": length,
+            "width": width,
+            "z_fechamento": z_fechamento,
+            "z_cobertura": round(z_fechamento + float(rng.uniform(0.2, 2.0)), 1),
+            "slope": round(float(rng.uniform(3, 30)), 1),
+            "v0": float(rng.choice([30.0, 35.0, 40.0, 45.0, 50.0])),
+            "category": str(rng.choice(categories)),
+            "class_": str(rng.choice(classes)),
+            "s3": float(rng.choice(s3_values)),
+        })
+    return rows
+
+# Função para medir uma chamada: `repeat` amostras de `number` execuções cada
+def time_call(func, repeat=5, number=1):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {"seconds": statistics.median(samples), "min": min(samples), "repeat": repeat, "number": number}
+
+def bench_single_building():
+    data = complete_data(default_data)
+    return time_call(lambda: calculate_results(data, default_coefficients), repeat=7, number=200)
+
+def bench_batch(size, rows):
+    rows = rows[:size]
+
+    def run():
+        for index, row in enumerate(rows):
+            process_building(index, row, None, write_pdf=False)
+
+    result = time_call(run, repeat=3 if size < 10000 else 1)
+    result["buildings"] = size
+    result["buildings_per_second"] = size / result["seconds"]
+    return result
+
+def bench_charts():
+    from velocity_chart import _velocity_profile_drawing, create_velocity_height_graph, velocity_profile
+
+    args = (42.0, 1.0, 1.11, "I", "A", 20.7)
+    z_values, vk_values = velocity_profile(*args)
+    return {
+        # Sem o cache, para medir a montagem do desenho em si
+        "chart_vector": time_call(lambda: _velocity_profile_drawing.__wrapped__(*args, 340.0, 227.0), repeat=5, number=10),
+        "chart_png": time_call(lambda: create_velocity_height_graph(z_values, vk_values), repeat=5, number=2),
+    }
+
+def bench_pdf():
+    from report import generate_pdf
+
+    results = {}
+    for roof_type in ("Duas Águas", "Uma Água"):
+        data = complete_data(dict(default_data, roof_type=roof_type))
+        calc, wind_forces = calculate_results(data, default_coefficients)
+
+        def build():
+            return generate_pdf(data, calc, default_project_info, wind_forces, generated_at=FIXED_DATE)
+
+        size = len(build().getvalue())
+        result = time_call(build, repeat=5, number=2)
+        result["bytes"] = size
+        results["pdf_duas_aguas" if roof_type == "Duas Águas" else "pdf_uma_agua"] = result
+    return results
+
+def bench_pdf_batch(size=20):
+    rows = building_fixtures(size)
+    with tempfile.TemporaryDirectory() as output_dir:
+        def run():
+            for index, row in enumerate(rows):
+                process_building(index, row, output_dir, generated_at=FIXED_DATE)
+
+        result = time_call(run, repeat=2)
+        result["bytes"] = sum(entry.stat().st_size for entry in os.scandir(output_dir))
+    result["buildings"] = size
+    result["buildings_per_second"] = size / result["seconds"]
+    return result
+
+# Função para executar todos os benchmarks e montar o resultado em JSON
+def run_benchmarks(quick=False):
+    sizes = [size for size in BATCH_SIZES if not (quick and size > 100)]
+    rows = building_fixtures(max(sizes))
+
+    results = {"single_building": bench_single_building()}
+    for size in sizes:
+        results[f"batch_{size}"] = bench_batch(size, rows)
+    results.update(bench_charts())
+    results.update(bench_pdf())
+    results["pdf_batch_20"] = bench_pdf_batch()
+
+    from import_budget import measure_import
+
+    for module in ("calculation", "batch", "report"):
+        results[f"import_{module}"] = {"seconds": measure_import(module)["seconds"]}
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+# Função para comparar com a linha de base: regressão quando o tempo cresce mais que `threshold`
+def compare(current, baseline, threshold=0.25):
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        result["baseline_seconds"] = base["seconds"]
+        result["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {result['seconds'] * 1000:.2f} ms vs {base['seconds'] * 1000:.2f} ms ({ratio:.2f}x)")
+        if "bytes" in result and "bytes" in base and result["bytes"] > base["bytes"] * (1 + threshold):
+            regressions.append(f"{name}: {result['bytes']} bytes vs {base['bytes']} bytes")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do cálculo e da geração do memorial em PDF.")
+    parser.add_argument("-o", "--output", help="Arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Aumento relativo tolerado antes de acusar regressão (padrão: 0,25)")
+    parser.add_argument("--quick", action="store_true", help="Omite o lote de 10 000 edificações")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(quick=args.quick)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        current["regressions"] = regressions
+
+    output = json.dumps(current, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    for name, result in current["results"].items():
+        print(f"{name:<18} {result['seconds'] * 1000:10.3f} ms", file=sys.stderr)
+    for regression in regressions:
+        print(f"REGRESSÃO: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
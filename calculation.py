@@ -0,0 +1,398 @@
+import math
+
+import numpy as np
+
+from ce_tables import geometry_coefficients
+from combinations import load_combinations
+from frame_loads import frame_loads
+from tracing import timed
+from wind_profile import AIR_FACTOR, GRAVITY, wind_profile
+from zoning import default_max_zones, default_storey_height, default_zone_tolerance, vertical_zoning
+
+# Funções auxiliares
+def format_with_comma(value, decimals=2):
+    return f"{value:.{decimals}f}".replace('.', ',')
+
+# Descrições das categorias de rugosidade
+category_options = {
+    "I": "I: Mar ou costa com poucos obstáculos",
+    "II": "II: Terrenos abertos, em nível ou aproximadamente em nível, com poucos obstáculos isolados, tais como árvores e edificações baixas",
+    "III": "III: Subúrbios ou áreas industriais com edificações de altura média",
+    "IV": "IV: Centros urbanos com edificações altas e densas",
+    "V": "V: Áreas com muitos obstáculos altos, como florestas densas ou centros urbanos muito desenvolvidos",
+}
+
+# Tempo de recorrência (Tp) para cada fator estatístico S3
+s3_tp_values = {1.11: 100, 1.06: 75, 1.00: 50, 0.95: 37, 0.83: 15}
+
+# Casos de Cpi - NBR 6123:2023 Item 6.3.2.1
+cpi_cases = {
+    "a": "a) Duas faces opostas igualmente permeáveis; as outras faces impermeáveis",
+    "b": "b) Quatro faces igualmente permeáveis",
+    "c": "c) Abertura dominante em uma face; as outras faces de igual permeabilidade",
+}
+
+# Valores de Cpi sugeridos para cada caso
+default_cpi_values = {
+    "a": [0.2, -0.3],
+    "b": [-0.3, 0.0],
+    "c": [0.1, 0.3],
+}
+
+# Valores padrão (os mesmos dos cards da interface)
+default_project_info = {
+    "client": "Construtora ABC",
+    "project": "Edifício Residencial",
+    "location": "São Paulo, SP",
+    "calculator": "João Silva",
+}
+default_data = {
+    "roof_type": "Duas Águas",
+    "length": 48.0,
+    "width": 16.0,
+    "height": 10.9,
+    "slope": 10.0,
+    "z_fechamento": 13.0,
+    "z_cobertura": 13.8,
+    "portico_distance": 5.0,
+    "v0": 42.0,
+    "category": "I",
+    "class_": "A",
+    "s1": 1.0,
+    "s3": 1.11,
+}
+default_coefficients = {
+    "cpi_case": "a",
+    "cpi": [0.2, -0.3],
+    "ce_fechamento_0": [-0.9, -0.4625, -0.2820, -0.425, 0.7],
+    "ce_fechamento_90": [-0.9, -0.5, -0.5375],
+    "ce_cobertura_0": [-0.9, -0.6, -0.325, 0.7],
+    "ce_cobertura_90": [-0.9284, -0.6, -0.5375],
+}
+
+# Completa os dados da edificação com os campos derivados (descrição e Tp)
+def complete_data(data):
+    data = dict(data)
+    data.setdefault("category_description", category_options[data["category"]])
+    data.setdefault("s3_tp", s3_tp_values[data["s3"]])
+    return data
+
+# Coeficientes de barlavento (CPb) e sotavento (CPs) da cobertura de duas águas
+def calculate_roof_coefficients(slope):
+    # Calcular o ângulo de inclinação (theta) a partir do percentual de inclinação
+    theta = math.atan(slope / 100)  # slope em % convertido para radianos
+    tan_theta = math.tan(theta)
+
+    # Calcular coeficientes Ce para barlavento (CPb) e sotavento (CPs) conforme NBR 6123:2023 Tabela 25
+    if 0 <= tan_theta <= 0.07:
+        cpb = 1.4 - 3.5 * tan_theta
+        cps = -0.4
+    elif 0.07 < tan_theta <= 0.4:
+        cpb = -1.4 + 3.5 * tan_theta
+        cps = -0.4
+    else:
+        cpb = -0.9  # Valor padrão para ângulos fora da faixa (sucção máxima)
+        cps = -0.6  # Valor padrão para sotavento
+    return theta, cpb, cps
+
+# Versão vetorizada de calculate_roof_coefficients (slope em array)
+def roof_coefficients_array(slope):
+    theta = np.arctan(np.asarray(slope, dtype=float) / 100)
+    tan_theta = np.tan(theta)
+    low = (tan_theta >= 0) & (tan_theta <= 0.07)
+    mid = (tan_theta > 0.07) & (tan_theta <= 0.4)
+    cpb = np.select([low, mid], [1.4 - 3.5 * tan_theta, -1.4 + 3.5 * tan_theta], -0.9)
+    cps = np.where(low | mid, -0.4, -0.6)
+    return theta, cpb, cps
+
+# Força de atrito longitudinal (0° / 180°) conforme NBR 6123:2023
+def calculate_friction(data, results):
+    l1 = data['length']  # Comprimento
+    l2 = data['width']   # Largura
+    h = data['z_fechamento']  # Altura Média - Fechamento
+    Cfr = 0.04  # Valor fixo conforme NBR 6123
+    q_cob = results['q_cobertura_kgfm2']  # Pressão dinâmica da cobertura
+    q_fec = results['q_fechamento_kgfm2']  # Pressão dinâmica do fechamento
+
+    # Verificação da condição
+    l2_h_ratio = l2 / h
+    l2_l1_ratio = l2 / l1
+    condition_met = l2_h_ratio > 4 or l2_l1_ratio > 4
+
+    if condition_met:
+        F_cob = Cfr * q_cob * l1 * (l2 - 4 * h)
+        if h <= l1:
+            F_fec = Cfr * q_fec * 2 * h * (l2 - 4 * h)
+        else:
+            F_fec = Cfr * q_fec * 2 * h * (l2 - 4 * l1)
+        F_prime = F_cob + F_fec
+    else:
+        F_prime = "Não Aplicável"
+        F_cob = "Não Aplicável"
+        F_fec = "Não Aplicável"
+
+    return {
+        "l1": l1,
+        "l2": l2,
+        "h": h,
+        "Cfr": Cfr,
+        "q_cob": q_cob,
+        "q_fec": q_fec,
+        "l2_h_ratio": l2_h_ratio,
+        "l2_l1_ratio": l2_l1_ratio,
+        "condition_met": condition_met,
+        "F_cob": F_cob,
+        "F_fec": F_fec,
+        "F_prime": F_prime,
+    }
+
+# Versão vetorizada da força de atrito F' (NaN onde a verificação não exige o cálculo)
+def friction_force_array(length, width, h, q_cob, q_fec, Cfr=0.04):
+    l1, l2, h = np.asarray(length, dtype=float), np.asarray(width, dtype=float), np.asarray(h, dtype=float)
+    q_cob, q_fec = np.asarray(q_cob, dtype=float), np.asarray(q_fec, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        condition_met = (l2 / h > 4) | (l2 / l1 > 4)
+    F_cob = Cfr * q_cob * l1 * (l2 - 4 * h)
+    F_fec = Cfr * q_fec * 2 * h * (l2 - 4 * np.where(h <= l1, h, l1))
+    F_cob = np.where(condition_met, F_cob, np.nan)
+    F_fec = np.where(condition_met, F_fec, np.nan)
+    return F_cob, F_fec, F_cob + F_fec
+
+# Direções da pressão efetiva, na ordem de apresentação (fechamento: direção e chave do Ce)
+roof_directions = ("Cobertura (0°/180°)", "Cobertura (90°/270°)")
+wall_directions = (
+    ("Fechamento (0°/180°)", "ce_fechamento_0"),
+    ("Fechamento (90°/270°)", "ce_fechamento_90"),
+)
+
+# Função para calcular DP = q * (Ce - Cpi) de todas as combinações de uma vez.
+# dp tem forma (direção, Ce, Cpi); direções com menos Ce são completadas com NaN.
+def pressure_tensor(q_by_direction, ce_by_direction, cpi):
+    directions = list(ce_by_direction)
+    n_ce = max((len(values) for values in ce_by_direction.values()), default=0)
+    ce = np.full((len(directions), n_ce), np.nan)
+    for i, values in enumerate(ce_by_direction.values()):
+        ce[i, :len(values)] = values
+    cpi = np.asarray(cpi, dtype=float)
+    q = np.asarray(q_by_direction, dtype=float).reshape(len(directions))
+    dp = q[:, None, None] * (ce[:, :, None] - cpi[None, None, :])
+    return {"directions": directions, "q": q, "ce": ce, "cpi": cpi, "dp": dp}
+
+# Forças nas águas da cobertura: F = DP * A, com a mesma forma (direção, Ce, Cpi)
+@timed("calc.roof_forces")
+def roof_forces(pressures, area_per_water):
+    index = [i for i, direction in enumerate(pressures["directions"]) if direction in roof_directions]
+    dp = pressures["dp"][index]
+    return {
+        "directions": [pressures["directions"][i] for i in index],
+        "area_per_water": area_per_water,
+        "dp": dp,
+        "force": dp * (area_per_water if area_per_water is not None else np.nan),
+    }
+
+# Envoltória da pressão efetiva: maior sobrepressão e maior sucção por direção e por superfície,
+# com o Ce e o Cpi que as produzem
+@timed("calc.envelope")
+def pressure_envelope(pressures):
+    dp = pressures["dp"]
+    directions = pressures["directions"]
+    n_directions = len(directions)
+    flat = dp.reshape(n_directions, -1)
+    finite = np.isfinite(flat)
+    # Extremos de todas as direções de uma vez (NaN excluídos)
+    top = np.where(finite, flat, -np.inf).argmax(axis=1) if flat.size else np.zeros(n_directions, dtype=np.intp)
+    bottom = np.where(finite, flat, np.inf).argmin(axis=1) if flat.size else np.zeros(n_directions, dtype=np.intp)
+    valid = finite.any(axis=1) if flat.size else np.zeros(n_directions, dtype=bool)
+    n_cpi = dp.shape[2] if dp.ndim == 3 else 0
+
+    def case(i, position):
+        j, k = divmod(int(position), n_cpi)
+        return {
+            "direction": directions[i],
+            "ce": float(pressures["ce"][i, j]),
+            "cpi": float(pressures["cpi"][k]),
+            "dp": float(flat[i, position]),
+        }
+
+    envelope = {}
+    groups = {}
+    for i, direction in enumerate(directions):
+        groups.setdefault(direction.split(" (")[0], []).append(i)
+        envelope[direction] = (
+            {"max_pressure": case(i, top[i]), "max_suction": case(i, bottom[i])} if valid[i]
+            else {"max_pressure": None, "max_suction": None}
+        )
+    for surface, index in groups.items():
+        index = [i for i in index if valid[i]]
+        if not index:
+            envelope[surface] = {"max_pressure": None, "max_suction": None}
+            continue
+        i_max = max(index, key=lambda i: flat[i, top[i]])
+        i_min = min(index, key=lambda i: flat[i, bottom[i]])
+        envelope[surface] = {"max_pressure": case(i_max, top[i_max]), "max_suction": case(i_min, bottom[i_min])}
+    return envelope
+
+# Etapas do cálculo. calculate_results as encadeia em sequência; pipeline.py usa as mesmas
+# etapas como nós de um grafo memorizado, recalculando só as que dependem do que mudou.
+
+# S2 (e b, p, Fr) no fechamento e na cobertura
+@timed("calc.s2")
+def surface_s2(z_fechamento, z_cobertura, category, class_):
+    return wind_profile([z_fechamento, z_cobertura], 1.0, 1.0, 1.0, category, class_)
+
+# Vk = V0 * S1 * S2 * S3 no fechamento e na cobertura
+@timed("calc.vk")
+def surface_vk(s2, v0, s1, s3):
+    return np.asarray(v0, dtype=float) * s1 * s2["s2"] * s3
+
+# q em N/m² e kgf/m² no fechamento e na cobertura
+@timed("calc.q")
+def surface_q(vk):
+    q_nm2 = AIR_FACTOR * vk**2
+    return {"q_nm2": q_nm2, "q_kgfm2": q_nm2 / GRAVITY}
+
+# Modos dos coeficientes Ce: informados à mão ou calculados pela geometria (tabelas da NBR 6123
+# em ce_tables.py, a partir de h/b, a/b e da inclinação da cobertura)
+ce_modes = ("manual", "auto")
+
+def automatic_ce(coefficients):
+    mode = coefficients.get("ce_mode") or "manual"
+    if mode not in ce_modes:
+        raise ValueError(f"Modo de Ce inválido: {mode} (use {' ou '.join(ce_modes)})")
+    return mode == "auto"
+
+# Coeficientes com os Ce das paredes e da cobertura calculados pela geometria (modo automático)
+@timed("calc.ce")
+def resolve_coefficients(data, coefficients):
+    if not automatic_ce(coefficients):
+        return coefficients
+    return dict(coefficients, **geometry_coefficients(data))
+
+# Ce da cobertura pela tabela de telhados (modo automático), por direção da cobertura:
+# a 90°/270° (vento perpendicular à cumeeira) EF e GH, a 0°/180° (paralelo) EG e FH
+def automatic_roof_ce(coefficients):
+    if not automatic_ce(coefficients):
+        return None
+    return {roof_directions[0]: coefficients["ce_cobertura_0"], roof_directions[1]: coefficients["ce_cobertura_90"]}
+
+# Geometria e coeficientes da cobertura de duas águas (None nas demais).
+# ce traz os Ce de cada direção da cobertura; sem roof_ce, CPb e CPs (regra por tan θ de
+# calculate_roof_coefficients) valem nas duas direções. Com roof_ce (automatic_roof_ce), CPb e
+# CPs são os de barlavento e sotavento do vento perpendicular à cumeeira.
+@timed("calc.roof")
+def roof_geometry(roof_type, slope, length, width, roof_ce=None):
+    if roof_type != "Duas Águas":
+        return None
+    theta, cpb, cps = calculate_roof_coefficients(slope)
+    if roof_ce:
+        cpb, cps = roof_ce[roof_directions[1]]
+    ce = {direction: list(roof_ce[direction]) if roof_ce else [cpb, cps] for direction in roof_directions}
+
+    # Calcular a área de cada água
+    width_inclined = (width / 2) / math.cos(theta)  # Largura inclinada de cada água
+    area_per_water = length * width_inclined  # Área de cada água (barlavento e sotavento)
+    return {"theta": theta, "cpb": cpb, "cps": cps, "ce": ce, "area_per_water": area_per_water}
+
+# DP de todas as direções, Ce e Cpi
+@timed("calc.pressures")
+def effective_pressures(q, roof, cpi, ce_fechamento_0, ce_fechamento_90):
+    q_fechamento_kgfm2, q_cobertura_kgfm2 = q["q_kgfm2"].tolist()
+    ce_walls = {"ce_fechamento_0": ce_fechamento_0, "ce_fechamento_90": ce_fechamento_90}
+    q_by_direction = []
+    ce_by_direction = {}
+    if roof is not None:
+        # Ce de cada direção da cobertura (CPb e CPs nas duas, fora do modo automático)
+        for direction in roof_directions:
+            ce_by_direction[direction] = roof["ce"][direction]
+            q_by_direction.append(q_cobertura_kgfm2)
+
+    for direction, key in wall_directions:
+        ce_by_direction[direction] = ce_walls[key]
+        q_by_direction.append(q_fechamento_kgfm2)
+    return pressure_tensor(q_by_direction, ce_by_direction, cpi)
+
+# Força de atrito a partir das dimensões e de q
+@timed("calc.friction")
+def friction_stage(length, width, z_fechamento, q):
+    q_fechamento_kgfm2, q_cobertura_kgfm2 = q["q_kgfm2"].tolist()
+    return calculate_friction(
+        {"length": length, "width": width, "z_fechamento": z_fechamento},
+        {"q_cobertura_kgfm2": q_cobertura_kgfm2, "q_fechamento_kgfm2": q_fechamento_kgfm2},
+    )
+
+# Dicionário de resultados usado pela interface, pelo lote e pelo memorial
+def assemble_results(coefficients, s2, vk, q, roof, pressures, envelope, friction, zoning=None, combinations=None):
+    s2_fechamento, s2_cobertura = s2["s2"].tolist()
+    vk_fechamento, vk_cobertura = vk.tolist()
+    q_fechamento_nm2, q_cobertura_nm2 = q["q_nm2"].tolist()
+    q_fechamento_kgfm2, q_cobertura_kgfm2 = q["q_kgfm2"].tolist()
+    results = {
+        "s2_fechamento": s2_fechamento,
+        "s2_cobertura": s2_cobertura,
+        "vk_fechamento": vk_fechamento,
+        "vk_cobertura": vk_cobertura,
+        "q_fechamento_nm2": q_fechamento_nm2,
+        "q_cobertura_nm2": q_cobertura_nm2,
+        "q_fechamento_kgfm2": q_fechamento_kgfm2,
+        "q_cobertura_kgfm2": q_cobertura_kgfm2,
+        "cpi_case_description": cpi_cases[coefficients["cpi_case"]],
+        "cpi": coefficients["cpi"],
+        "ce_fechamento_0": coefficients["ce_fechamento_0"],
+        "ce_fechamento_90": coefficients["ce_fechamento_90"],
+        "ce_cobertura_0": coefficients["ce_cobertura_0"],
+        "ce_cobertura_90": coefficients["ce_cobertura_90"],
+        "ce_mode": coefficients.get("ce_mode", "manual"),
+        "pressures": pressures,
+        "envelope": envelope,
+        "area_per_water": roof["area_per_water"] if roof is not None else None,
+        "b": float(s2["b"]),
+        "p": float(s2["p"]),
+        "fr": float(s2["fr"]),
+        "friction": friction,
+    }
+    if zoning is not None:
+        results["zoning"] = zoning
+    if combinations is not None:
+        results["combinations"] = combinations
+    return results
+
+# Modo edifício alto: zoneamento vertical da fachada quando o número de pavimentos é informado
+@timed("calc.zoning")
+def zoning_stage(data):
+    if not data.get("storeys"):
+        return None
+    return vertical_zoning(
+        data, data["storeys"],
+        data.get("storey_height", default_storey_height),
+        data.get("zone_tolerance", default_zone_tolerance),
+        data.get("max_zones", default_max_zones),
+    )
+
+# Combinações de ações (ELU/ELS) quando a carga permanente ou a sobrecarga da cobertura é informada;
+# loads são as cargas nos pórticos, se já calculadas
+def combination_stage(data, pressures, zoning=None, loads=None):
+    if data.get("permanent_load") is None and data.get("live_load") is None:
+        return None
+    if loads is None:
+        loads = frame_loads(data["length"], data["width"], data["height"], data.get("portico_distance"), pressures)
+    return load_combinations(data, pressures, loads, zoning)
+
+# Função para calcular os resultados (S2, Vk, q, DP, forças e atrito) sem interface
+@timed("calc.calculate_results")
+def calculate_results(data, coefficients):
+    coefficients = resolve_coefficients(data, coefficients)
+    s2 = surface_s2(data["z_fechamento"], data["z_cobertura"], data["category"], data["class_"])
+    vk = surface_vk(s2, data["v0"], data["s1"], data["s3"])
+    q = surface_q(vk)
+    roof = roof_geometry(data["roof_type"], data["slope"], data["length"], data["width"], automatic_roof_ce(coefficients))
+    pressures = effective_pressures(
+        q, roof, coefficients["cpi"], coefficients["ce_fechamento_0"], coefficients["ce_fechamento_90"]
+    )
+    wind_forces = roof_forces(pressures, roof["area_per_water"] if roof is not None else None)
+    zoning = zoning_stage(data)
+    results = assemble_results(
+        coefficients, s2, vk, q, roof, pressures, pressure_envelope(pressures),
+        friction_stage(data["length"], data["width"], data["z_fechamento"], q),
+        zoning, combination_stage(data, pressures, zoning),
+    )
+    return results, wind_forces
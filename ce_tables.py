@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+
+# Coeficientes de pressão externa (Ce) de edificações de planta retangular, NBR 6123:
+# paredes (em função de h/b e a/b) e telhados de duas águas simétricos (em função de h/b e θ).
+# a é a maior e b a menor dimensão em planta, h a altura da edificação.
+# As tabelas são montadas uma única vez como grades regulares e consultadas por interpolação
+# bilinear vetorizada; as faixas de h/b da norma (≤ 1/2, ≤ 3/2, ≤ 6) viram nós duplicados
+# (limite da faixa e o número seguinte), de modo que o valor é constante dentro de cada faixa.
+
+# Paredes: (faixa de h/b, faixa de a/b) -> α = 0°: A1 e B1, A2 e B2, C, D; α = 90°: A, B, C1 e D1, C2 e D2
+wall_table = {
+    (0.5, 1.5): (-0.8, -0.5, 0.7, -0.4, 0.7, -0.4, -0.8, -0.4),
+    (0.5, 4.0): (-0.8, -0.4, 0.7, -0.3, 0.7, -0.5, -0.9, -0.5),
+    (1.5, 1.5): (-0.9, -0.5, 0.7, -0.5, 0.7, -0.5, -0.9, -0.5),
+    (1.5, 4.0): (-0.9, -0.4, 0.7, -0.3, 0.7, -0.6, -0.9, -0.5),
+    (6.0, 1.5): (-1.0, -0.6, 0.8, -0.6, 0.8, -0.6, -1.0, -0.6),
+    (6.0, 4.0): (-1.0, -0.5, 0.8, -0.3, 0.8, -0.6, -1.0, -0.6),
+}
+wall_zones = {
+    0: ("A1/B1", "A2/B2", "C", "D"),
+    90: ("A", "B", "C1/D1", "C2/D2"),
+}
+
+# Telhados de duas águas: faixa de h/b -> {θ (graus): (EF, GH, EG, FH)}
+# α = 90° (vento perpendicular à cumeeira): EF barlavento, GH sotavento; α = 0°: EG e FH
+roof_table = {
+    0.5: {
+        0: (-0.8, -0.4, -0.8, -0.4), 5: (-0.9, -0.4, -0.8, -0.4), 10: (-1.2, -0.4, -0.8, -0.6),
+        15: (-1.0, -0.4, -0.8, -0.6), 20: (-0.4, -0.4, -0.7, -0.6), 30: (0.0, -0.4, -0.7, -0.6),
+        45: (0.3, -0.5, -0.7, -0.6), 60: (0.7, -0.6, -0.7, -0.6),
+    },
+    1.5: {
+        0: (-0.8, -0.6, -1.0, -0.6), 5: (-0.9, -0.6, -0.9, -0.6), 10: (-1.1, -0.6, -0.8, -0.6),
+        15: (-1.0, -0.6, -0.8, -0.6), 20: (-0.7, -0.5, -0.8, -0.6), 30: (-0.2, -0.5, -0.8, -0.8),
+        45: (0.2, -0.5, -0.8, -0.8), 60: (0.6, -0.5, -0.8, -0.8),
+    },
+    6.0: {
+        0: (-0.8, -0.6, -0.9, -0.7), 5: (-0.8, -0.6, -0.8, -0.8), 10: (-0.8, -0.6, -0.8, -0.8),
+        15: (-0.8, -0.6, -0.8, -0.8), 20: (-0.8, -0.6, -0.8, -0.8), 30: (-1.0, -0.5, -0.8, -0.7),
+        40: (-0.2, -0.5, -0.8, -0.7), 50: (0.2, -0.5, -0.8, -0.7), 60: (0.5, -0.5, -0.8, -0.7),
+    },
+}
+
+# Eixo de h/b com as faixas da norma: cada limite é seguido do número imediatamente maior
+def _banded_axis(limits):
+    nodes = [0.0]
+    for limit in limits[:-1]:
+        nodes += [limit, math.nextafter(limit, math.inf)]
+    return np.array(nodes + [limits[-1]])
+
+# Valores de cada faixa repetidos nos dois nós que a delimitam
+def _banded_values(values):
+    return np.repeat(np.asarray(values, dtype=float), 2, axis=0)
+
+def _wall_grid():
+    h_limits = sorted({h for h, _ in wall_table})
+    # a/b de 1 a 3/2 e de 2 a 4 constantes; entre 3/2 e 2, interpolação linear (como na norma)
+    ab_axis = np.array([1.0, 1.5, 2.0, 4.0])
+    values = [[wall_table[h, 1.5], wall_table[h, 1.5], wall_table[h, 4.0], wall_table[h, 4.0]] for h in h_limits]
+    return _banded_axis(h_limits), ab_axis, _banded_values(values)
+
+def _roof_grid():
+    h_limits = sorted(roof_table)
+    theta_axis = np.array(sorted({theta for band in roof_table.values() for theta in band}), dtype=float)
+    # Ângulos ausentes em uma faixa: interpolação linear entre os da própria faixa
+    values = []
+    for h in h_limits:
+        thetas = sorted(roof_table[h])
+        table = np.array([roof_table[h][theta] for theta in thetas])
+        values.append(np.column_stack([np.interp(theta_axis, thetas, table[:, k]) for k in range(table.shape[1])]))
+    return _banded_axis(h_limits), theta_axis, _banded_values(values)
+
+wall_grid = _wall_grid()
+roof_grid = _roof_grid()
+
+# Interpolação bilinear vetorizada em uma grade (eixo x, eixo y, valores[x, y, k]).
+# x e y são escalares ou arrays (com broadcasting); fora da grade, vale o valor da borda.
+# Retorna um array com forma broadcast(x, y) + (k,).
+def bilinear(grid, x, y):
+    x_axis, y_axis, values = grid
+    x, y = np.broadcast_arrays(
+        np.clip(np.asarray(x, dtype=float), x_axis[0], x_axis[-1]),
+        np.clip(np.asarray(y, dtype=float), y_axis[0], y_axis[-1]),
+    )
+    i = np.clip(np.searchsorted(x_axis, x, side="right") - 1, 0, len(x_axis) - 2)
+    j = np.clip(np.searchsorted(y_axis, y, side="right") - 1, 0, len(y_axis) - 2)
+    tx = ((x - x_axis[i]) / (x_axis[i + 1] - x_axis[i]))[..., None]
+    ty = ((y - y_axis[j]) / (y_axis[j + 1] - y_axis[j]))[..., None]
+    return ((1 - tx) * (1 - ty) * values[i, j] + tx * (1 - ty) * values[i + 1, j]
+            + (1 - tx) * ty * values[i, j + 1] + tx * ty * values[i + 1, j + 1])
+
+# Proporções da planta: h/b e a/b (arrays aceitos)
+def plan_ratios(height, length, width):
+    length = np.asarray(length, dtype=float)
+    width = np.asarray(width, dtype=float)
+    a = np.maximum(length, width)
+    b = np.minimum(length, width)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.asarray(height, dtype=float) / b, a / b
+
+# Ce das paredes nas direções do cálculo (0°: vento ao longo do comprimento l1; 90°: ao longo
+# da largura l2). Com l1 >= l2, 0° é o α = 0° da norma; com l2 > l1, as direções se invertem.
+# Retorna arrays com forma broadcast(entradas) + (4,).
+def wall_coefficients(height, length, width):
+    h_b, a_b = plan_ratios(height, length, width)
+    ce = bilinear(wall_grid, h_b, a_b)
+    along_length = (np.asarray(length) >= np.asarray(width))[..., None]
+    alpha_0, alpha_90 = ce[..., :4], ce[..., 4:]
+    return {
+        "ce_fechamento_0": np.where(along_length, alpha_0, alpha_90),
+        "ce_fechamento_90": np.where(along_length, alpha_90, alpha_0),
+    }
+
+# Coeficiente de força das paredes para as forças globais: Ce da parede de barlavento menos o da
+# de sotavento (α = 0°: C - D; α = 90°: A - B; as paredes laterais não entram), nas direções do
+# cálculo como em wall_coefficients. Retorna um array com forma broadcast(entradas) + (2,): 0°, 90°.
+def wall_force_coefficients(height, length, width):
+    h_b, a_b = plan_ratios(height, length, width)
+    ce = bilinear(wall_grid, h_b, a_b)
+    along_length = np.asarray(length) >= np.asarray(width)
+    alpha_0 = ce[..., 2] - ce[..., 3]
+    alpha_90 = ce[..., 4] - ce[..., 5]
+    return np.stack([np.where(along_length, alpha_0, alpha_90), np.where(along_length, alpha_90, alpha_0)], axis=-1)
+
+# Ce das paredes onde ficam as colunas dos pórticos (as de comprimento l1), por direção do cálculo,
+# como pares (coluna esquerda, coluna direita). A 0°/180° o vento é paralelo a essas paredes, que
+# são laterais: um par por zona (A1/B1 e A2/B2; C1/D1 e C2/D2 com l2 > l1), igual dos dois lados.
+# A 90°/270° são as paredes de barlavento e de sotavento (A e B; C e D com l2 > l1).
+def frame_wall_coefficients(height, length, width):
+    h_b, a_b = plan_ratios(height, length, width)
+    ce = [round(float(value), 4) for value in bilinear(wall_grid, h_b, a_b)]
+    side, front = (ce[0:2], ce[4:6]) if length >= width else (ce[6:8], ce[2:4])
+    return {"ce_fechamento_0": [(value, value) for value in side], "ce_fechamento_90": [tuple(front)]}
+
+# Ce do telhado de duas águas (cumeeira ao longo do comprimento l1): a 90° o vento é perpendicular
+# à cumeeira (EF barlavento, GH sotavento); a 0°, paralelo (EG, FH). Inclinação em %.
+def roof_coefficients(height, length, width, slope):
+    h_b, _ = plan_ratios(height, length, width)
+    theta = np.degrees(np.arctan(np.asarray(slope, dtype=float) / 100))
+    ce = bilinear(roof_grid, h_b, theta)
+    return {"ce_cobertura_90": ce[..., :2], "ce_cobertura_0": ce[..., 2:]}
+
+# Coeficientes Ce de uma edificação a partir da geometria (listas, como os informados à mão)
+def geometry_coefficients(data):
+    coefficients = {
+        key: [round(float(value), 4) for value in values]
+        for key, values in wall_coefficients(data["height"], data["length"], data["width"]).items()
+    }
+    if data["roof_type"] == "Duas Águas":
+        roof = roof_coefficients(data["height"], data["length"], data["width"], data["slope"])
+        coefficients.update({key: [round(float(value), 4) for value in values] for key, values in roof.items()})
+    else:
+        coefficients.update({"ce_cobertura_0": [], "ce_cobertura_90": []})
+    return coefficients
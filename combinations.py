@@ -0,0 +1,223 @@
+import math
+
+import numpy as np
+
+from frame_loads import frame_groups, frame_members, frame_numbers
+from tracing import timed
+
+# Combinações últimas (ELU) e de serviço (ELS) do vento com a carga permanente (G) e a
+# sobrecarga (Q) da cobertura, conforme a NBR 8681 (combinações normais). G e Q são dados em
+# kgf/m² (G por área de telhado, Q por área em projeção horizontal) e entram na direção
+# normal à cobertura; nas paredes só atua o vento.
+#
+# Todas as combinações são lineares em W com fator >= 0, então o caso de vento que governa o
+# máximo (mínimo) de uma barra é o de maior (menor) carga de vento nessa barra, qualquer que seja
+# a combinação. Por isso os casos de vento são reduzidos por barra antes de combinar: os casos
+# dominados são descartados em uma passada (argmax/argmin) e as combinações só são formadas com
+# os extremos, o que mantém o custo em O(casos x barras) mesmo com dezenas de milhares de casos.
+# Ação variável favorável não entra na combinação (NBR 8681): quando o vento extremo alivia a
+# barra (negativo no máximo, positivo no mínimo), a combinação é tomada sem vento.
+
+# Coeficientes de ponderação (γ) e fatores de combinação (ψ) padrão
+default_factors = {
+    "gamma_g": 1.25,  # permanente desfavorável (estruturas metálicas)
+    "gamma_g_favorable": 1.0,  # permanente favorável (sucção do vento)
+    "gamma_q": 1.5,
+    "gamma_w": 1.4,
+    "psi0_q": 0.5,
+    "psi0_w": 0.6,
+    "psi1_q": 0.4,
+    "psi1_w": 0.3,
+    "psi2_q": 0.3,
+    "psi2_w": 0.0,
+}
+factor_fields = tuple(default_factors)
+limit_states = ("ELU", "ELS")
+
+# Combinações: (nome, estado limite, fator de G, fator de Q, fator de W)
+def combination_table(factors=None):
+    f = dict(default_factors, **(factors or {}))
+    return [
+        ("ELU1", "ELU", f["gamma_g"], f["gamma_q"], f["gamma_w"] * f["psi0_w"]),  # sobrecarga principal
+        ("ELU2", "ELU", f["gamma_g"], f["gamma_q"] * f["psi0_q"], f["gamma_w"]),  # vento principal
+        ("ELU3", "ELU", f["gamma_g_favorable"], 0.0, f["gamma_w"]),  # vento principal, G favorável
+        ("ELS1", "ELS", 1.0, f["psi2_q"], f["psi1_w"]),  # frequente, vento principal
+        ("ELS2", "ELS", 1.0, f["psi1_q"], f["psi2_w"]),  # frequente, sobrecarga principal
+    ]
+
+# Extremos do vento por (local, barra): wind tem forma (locais, casos, barras), NaN onde o caso
+# não se aplica. Retorna os índices e valores do maior e do menor caso, a máscara de barras com
+# casos e quantos pares (local, caso) sobrevivem à poda.
+def _wind_extremes(wind):
+    finite = np.isfinite(wind)
+    valid = finite.any(axis=1)
+    top = np.where(finite, wind, -np.inf).argmax(axis=1)
+    bottom = np.where(finite, wind, np.inf).argmin(axis=1)
+    location = np.broadcast_to(np.arange(wind.shape[0])[:, None], valid.shape)[valid]
+    kept = np.unique(np.concatenate([location * wind.shape[1] + top[valid], location * wind.shape[1] + bottom[valid]]))
+    return {
+        "valid": valid,
+        "max": (top, np.take_along_axis(wind, top[:, None, :], axis=1)[:, 0]),
+        "min": (bottom, np.take_along_axis(wind, bottom[:, None, :], axis=1)[:, 0]),
+        "cases": wind.shape[0] * wind.shape[1],
+        "candidates": len(kept),
+    }
+
+# Envoltória por barra de um grupo de combinações: para cada barra, o maior e o menor valor
+# entre todas as combinações e locais, com a combinação, o local e o caso de vento que governam
+# (caso -1 quando o vento não entra na combinação ou é favorável)
+def _governing(extremes, permanent, live, combinations):
+    factors = np.array([row[2:] for row in combinations], dtype=float)
+    g, q, w = (factors[:, i, None, None] for i in range(3))
+    base = g * permanent[None] + q * live[None]
+    locations, members = permanent.shape
+    envelope = {}
+    for extreme, select, fill in (("max", np.argmax, -np.inf), ("min", np.argmin, np.inf)):
+        cases, wind = extremes[extreme]
+        wind = np.nan_to_num(wind)
+        favorable = wind < 0 if extreme == "max" else wind > 0
+        wind = np.where(favorable, 0.0, wind)
+        totals = np.where(extremes["valid"][None], base + w * wind, fill)
+        flat = select(totals.reshape(-1, members), axis=0)
+        combination, location = np.unravel_index(flat, (len(combinations), locations))
+        member = np.arange(members)
+        envelope[extreme] = {
+            "value": totals[combination, location, member],
+            "combination": combination,
+            "location": location,
+            "case": np.where((factors[combination, 2] != 0) & ~favorable[location, member], cases[location, member], -1),
+        }
+    return envelope
+
+# Envoltórias ELU e ELS; retorna {estado: {"max"/"min": arrays por barra}}
+def combination_envelope(permanent, live, wind, combinations):
+    extremes = _wind_extremes(wind)
+    result = {}
+    for state in limit_states:
+        rows = [row for row in combinations if row[1] == state]
+        envelope = _governing(extremes, permanent, live, rows)
+        for values in envelope.values():
+            values["combination"] = [rows[c][0] for c in values["combination"]]
+        result[state] = envelope
+    return result, extremes
+
+# Casos de vento de uma superfície a partir do tensor de DP: (direção, Ce, Cpi) de todas as
+# direções da superfície, com os valores de (Ce - Cpi) para aplicar a cada q
+def surface_cases(pressures, surface):
+    cases = {"direction": [], "ce": [], "cpi": [], "q": [], "delta": []}
+    cpi = np.asarray(pressures["cpi"], dtype=float)
+    for i, direction in enumerate(pressures["directions"]):
+        if not direction.startswith(surface):
+            continue
+        j = np.flatnonzero(~np.isnan(pressures["ce"][i]))
+        j, k = (index.reshape(-1) for index in np.meshgrid(j, np.arange(len(cpi)), indexing="ij"))
+        cases["direction"].extend([direction] * len(j))
+        cases["ce"].extend(pressures["ce"][i, j].tolist())
+        cases["cpi"].extend(cpi[k].tolist())
+        cases["q"].extend([float(pressures["q"][i])] * len(j))
+        cases["delta"].extend((pressures["ce"][i, j] - cpi[k]).tolist())
+    return cases
+
+def _case_fields(cases, index):
+    if index < 0:
+        return {"direction": None, "ce": None, "cpi": None}
+    return {"direction": cases["direction"][index], "ce": cases["ce"][index], "cpi": cases["cpi"][index]}
+
+# Resultado legível de uma envoltória: {estado: {barra: {"max"/"min": {valor, combinação, local, caso}}}}
+def _report(envelope, extremes, names, location_name, case_fields):
+    report = {}
+    for state, extremes_by_state in envelope.items():
+        report[state] = {}
+        for m, name in enumerate(names):
+            if not extremes["valid"][:, m].any():
+                continue
+            item = {}
+            for extreme, values in extremes_by_state.items():
+                location = int(values["location"][m])
+                item[extreme] = {
+                    "value": float(values["value"][m]),
+                    "combination": values["combination"][m],
+                    "location": location_name(location),
+                    **case_fields(int(values["case"][m])),
+                }
+            report[state][name] = item
+    return report
+
+# Envoltória de uma superfície (kgf/m²); com zoneamento, o fechamento usa o q de cada zona
+def _surface_envelope(pressures, surface, gravity, zoning, combinations):
+    cases = surface_cases(pressures, surface)
+    if not cases["delta"]:
+        return {}, None
+    delta = np.asarray(cases["delta"])
+    zones = zoning["zones"] if surface == "Fechamento" and zoning is not None else None
+    if zones is not None:
+        wind = np.asarray(zones["q_kgfm2"])[:, None, None] * delta[None, :, None]
+    else:
+        wind = (np.asarray(cases["q"]) * delta)[None, :, None]
+    locations = np.ones((wind.shape[0], 1))
+    envelope, extremes = combination_envelope(locations * gravity[0], locations * gravity[1], wind, combinations)
+
+    # Local: número da zona do zoneamento vertical (a partir de 1) ou None
+    def zone_number(location):
+        return location + 1 if zones is not None else None
+
+    return _report(envelope, extremes, [surface], zone_number, lambda index: _case_fields(cases, index)), extremes
+
+# Envoltória das barras dos pórticos (kgf/m), por grupo de pórticos com a mesma largura de influência
+def _frame_envelope(frame_loads, gravity, combinations):
+    if frame_loads is None or not len(frame_loads["positions"]) or not len(frame_loads["cases"]["case"]):
+        return {}, None
+    groups = frame_groups(frame_loads)
+    first = np.array([indices[0] for indices, _ in groups], dtype=np.intp)
+    widths = frame_loads["tributary"][first]
+    # G e Q nas águas (normais à cobertura); nas colunas, só o vento
+    rafter = np.array([member.endswith("rafter") for member in frame_members], dtype=float)
+    envelope, extremes = combination_envelope(
+        widths[:, None] * rafter * gravity[0], widths[:, None] * rafter * gravity[1],
+        frame_loads["loads"][first], combinations,
+    )
+    cases = frame_loads["cases"]
+
+    def frame_case(index):
+        if index < 0:
+            return {"case": None, "direction": None, "ce": None, "cpi": None}
+        return {"case": cases["case"][index], "direction": cases["direction"][index],
+                "ce": float(cases["ce"][index]), "cpi": float(cases["cpi"][index])}
+
+    return _report(envelope, extremes, frame_members, lambda g: frame_numbers(groups[g][0]), frame_case), extremes
+
+# Função para combinar o vento com G e Q: envoltórias por superfície (kgf/m²) e por barra dos
+# pórticos (kgf/m), só com os casos que governam
+@timed("calc.combinations")
+def load_combinations(data, pressures, frame_loads=None, zoning=None):
+    permanent = float(data.get("permanent_load") or 0.0)
+    live = float(data.get("live_load") or 0.0)
+    factors = dict(default_factors, **{key: data[key] for key in factor_fields if data.get(key) is not None})
+    combinations = combination_table(factors)
+    cos_theta = math.cos(math.atan(float(data.get("slope") or 0.0) / 100))
+    roof_gravity = (permanent * cos_theta, live * cos_theta ** 2)
+
+    surfaces = {state: {} for state in limit_states}
+    all_extremes = []
+    for surface in ("Cobertura", "Fechamento"):
+        gravity = roof_gravity if surface == "Cobertura" else (0.0, 0.0)
+        report, extremes = _surface_envelope(pressures, surface, gravity, zoning, combinations)
+        for state, items in report.items():
+            surfaces[state].update(items)
+        all_extremes.append(extremes)
+    members, extremes = _frame_envelope(frame_loads, roof_gravity, combinations)
+    all_extremes.append(extremes)
+    all_extremes = [extremes for extremes in all_extremes if extremes is not None]
+
+    return {
+        "permanent_load": permanent,
+        "live_load": live,
+        "factors": factors,
+        "combinations": [
+            {"name": name, "state": state, "g": g, "q": q, "w": w} for name, state, g, q, w in combinations
+        ],
+        "cases": sum(extremes["cases"] for extremes in all_extremes),
+        "candidates": sum(extremes["candidates"] for extremes in all_extremes),
+        "surfaces": surfaces,
+        "members": members,
+    }
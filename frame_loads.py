@@ -0,0 +1,153 @@
+import numpy as np
+
+from ce_tables import frame_wall_coefficients
+from tracing import timed
+
+# Carregamentos de vento nos pórticos transversais (galpões): cada caso de DP vira cargas
+# distribuídas (kgf/m) nas colunas e nas duas águas da cobertura de cada pórtico.
+# Os pórticos ficam ao longo do comprimento l1, a cada portico_distance, e vencem a largura l2.
+# A largura de influência é metade de cada vão vizinho: nos pórticos de extremidade, meio vão.
+# Convenção de sinais do DP: positivo é sobrepressão (carga para dentro da superfície),
+# negativo é sucção; nas águas, a carga é perpendicular à cobertura.
+
+# Barras do pórtico, da esquerda (barlavento nos casos de 0° e 90°) para a direita
+frame_members = ("left_column", "left_rafter", "right_rafter", "right_column")
+frame_member_labels = {
+    "left_column": "Coluna Esquerda",
+    "left_rafter": "Água Esquerda",
+    "right_rafter": "Água Direita",
+    "right_column": "Coluna Direita",
+}
+
+# Direções do fechamento e a chave dos seus Ce (as mesmas de calculation.wall_directions)
+frame_wall_directions = {
+    "Fechamento (0°/180°)": "ce_fechamento_0",
+    "Fechamento (90°/270°)": "ce_fechamento_90",
+}
+
+# Posição de cada pórtico (m) e largura de influência; o último vão fica menor quando
+# o comprimento não é múltiplo da distância entre pórticos
+def frame_layout(length, spacing):
+    if not spacing or spacing <= 0 or length <= 0:
+        return np.empty(0), np.empty(0)
+    bays = int(np.ceil(length / spacing - 1e-9))
+    positions = np.minimum(np.arange(bays + 1, dtype=float) * spacing, length)
+    half_bays = np.diff(positions) / 2
+    tributary = np.concatenate([half_bays, [0.0]]) + np.concatenate([[0.0], half_bays])
+    return positions, tributary
+
+# Casos de carga do pórtico. O q e o Cpi vêm do tensor de DP; o Ce das colunas vem da tabela de
+# paredes pela geometria (ce_tables.frame_wall_coefficients), porque os Ce informados à mão não
+# identificam as paredes das colunas. As direções do fechamento e da cobertura se correspondem pelo
+# nome ("Fechamento (0°/180°)" e "Cobertura (0°/180°)", como em calculation.effective_pressures).
+# - 90°/270° (vento no plano do pórtico): coluna de barlavento com o Ce de barlavento, a de
+#   sotavento com o de sotavento, e CPb/CPs nas águas de barlavento e sotavento. O caso de 270° é
+#   o espelhado (colunas e águas trocadas).
+# - 0°/180° (vento paralelo à cumeeira): o pórtico é simétrico; as duas colunas têm o Ce da zona
+#   lateral e as duas águas o mesmo Ce da cobertura (um caso por Ce de cada direção e Cpi).
+# O "ce" de cada caso é o da coluna de barlavento (0°/180°: o das colunas).
+# Retorna arrays com um item por caso e dp com forma (casos, barras), em kgf/m².
+def frame_cases(pressures, wall_ce):
+    directions = pressures["directions"]
+    cpi = np.asarray(pressures["cpi"], dtype=float)
+    names, ce, cpi_values, dp = [], [], [], []
+    for i, wall_direction in enumerate(directions):
+        key = frame_wall_directions.get(wall_direction)
+        if key is None or not len(cpi) or not wall_ce.get(key):
+            continue
+        roof_direction = wall_direction.replace("Fechamento", "Cobertura", 1)
+        if roof_direction in directions:
+            roof = pressures["dp"][directions.index(roof_direction)]
+            roof = roof[np.isfinite(roof).all(axis=1)]
+        else:
+            roof = np.full((1, len(cpi)), np.nan)
+        pairs = np.asarray(wall_ce[key], dtype=float)
+        # Colunas: DP = q * (Ce - Cpi) para cada par de Ce e cada Cpi
+        columns = pressures["q"][i] * (pairs[:, None, :] - cpi[None, :, None])
+        if key == "ce_fechamento_90":
+            p, k = (index.reshape(-1) for index in np.meshgrid(np.arange(len(pairs)), np.arange(len(cpi)), indexing="ij"))
+            values = np.column_stack([columns[p, k, 0], roof[0, k], roof[-1, k], columns[p, k, 1]])
+            angles = wall_direction[wall_direction.index("(") + 1:-1].split("/")
+            cases = [(angles[0], values), (angles[1], values[:, ::-1])]
+        else:
+            p, r, k = (index.reshape(-1) for index in np.meshgrid(
+                np.arange(len(pairs)), np.arange(len(roof)), np.arange(len(cpi)), indexing="ij"))
+            rafters = roof[r, k]
+            values = np.column_stack([columns[p, k, 0], rafters, rafters, columns[p, k, 1]])
+            cases = [(wall_direction[wall_direction.index("(") + 1:-1], values)]
+        for name, values in cases:
+            names.extend([name] * len(k))
+            ce.append(pairs[p, 0])
+            cpi_values.append(cpi[k])
+            dp.append(values)
+    if not dp:
+        return {"case": [], "direction": [], "ce": np.empty(0), "cpi": np.empty(0),
+                "dp": np.empty((0, len(frame_members)))}
+    return {
+        "case": [f"V{n + 1}" for n in range(len(names))],
+        "direction": names,
+        "ce": np.concatenate(ce),
+        "cpi": np.concatenate(cpi_values),
+        "dp": np.concatenate(dp),
+    }
+
+# Cargas de todos os pórticos e casos de uma vez: loads[pórtico, caso, barra] = DP * largura (kgf/m)
+@timed("calc.frame_loads")
+def frame_loads(length, width, height, spacing, pressures):
+    positions, tributary = frame_layout(length, spacing)
+    cases = frame_cases(pressures, frame_wall_coefficients(height, length, width))
+    return {
+        "positions": positions,
+        "tributary": tributary,
+        "cases": cases,
+        "loads": tributary[:, None, None] * cases["dp"][None, :, :],
+    }
+
+# Pórticos com a mesma largura de influência têm as mesmas cargas: grupos (índices dos pórticos, largura)
+def frame_groups(loads):
+    widths, inverse = np.unique(np.round(loads["tributary"], 6), return_inverse=True)
+    groups = [(np.flatnonzero(inverse == g), widths[g]) for g in range(len(widths))]
+    return sorted(groups, key=lambda group: group[0][0])
+
+# "1, 41" ou "2-40": números dos pórticos de um grupo (a partir de 1), com faixas contínuas abreviadas
+def frame_numbers(indices):
+    parts = []
+    for run in np.split(np.asarray(indices) + 1, np.flatnonzero(np.diff(indices) != 1) + 1):
+        if len(run):
+            parts.append(str(run[0]) if len(run) == 1 else f"{run[0]}-{run[-1]}")
+    return ", ".join(parts)
+
+# Tabela colunar: uma linha por (pórtico, caso) ou, com grouped, por (grupo de pórticos, caso)
+def frame_load_columns(loads, grouped=False):
+    cases = loads["cases"]
+    n_cases = len(cases["case"])
+    if grouped:
+        groups = frame_groups(loads)
+        first = np.array([indices[0] for indices, _ in groups], dtype=np.intp)
+        table = {"frames": np.repeat([frame_numbers(indices) for indices, _ in groups], n_cases)}
+    else:
+        first = np.arange(len(loads["positions"]))
+        table = {"frame": np.repeat(first + 1, n_cases), "x": np.repeat(loads["positions"], n_cases)}
+    table["tributary_width"] = np.repeat(loads["tributary"][first], n_cases)
+    table["case"] = np.tile(np.asarray(cases["case"], dtype=object), len(first))
+    table["direction"] = np.tile(np.asarray(cases["direction"], dtype=object), len(first))
+    table["ce"] = np.tile(cases["ce"], len(first))
+    table["cpi"] = np.tile(cases["cpi"], len(first))
+    values = loads["loads"][first].reshape(-1, len(frame_members))
+    for m, member in enumerate(frame_members):
+        table[member] = values[:, m]
+    return table
+
+# CSV para importação em programas de análise estrutural (";" como separador, ponto decimal,
+# cargas vazias quando a barra não se aplica)
+def write_frame_loads(loads, target, grouped=False):
+    import csv
+
+    if not hasattr(target, "write"):
+        with open(target, "w", newline="", encoding="utf-8") as f:
+            return write_frame_loads(loads, f, grouped)
+    table = frame_load_columns(loads, grouped)
+    writer = csv.writer(target, delimiter=";")
+    writer.writerow(list(table))
+    for row in zip(*(values.tolist() for values in table.values())):
+        writer.writerow(["" if isinstance(v, float) and np.isnan(v) else v for v in row])
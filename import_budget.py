@@ -0,0 +1,79 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+
+# Dependências pesadas que só devem ser carregadas no caminho que as usa
+heavy_modules = ("pandas", "matplotlib", "reportlab", "PIL")
+
+# Orçamento de importação a frio por módulo: tempo máximo (s) e dependências pesadas proibidas
+import_budgets = {
+    "wind_profile": {"seconds": 0.3, "forbidden": heavy_modules},
+    "calculation": {"seconds": 0.3, "forbidden": heavy_modules},
+    "isopleths": {"seconds": 0.1, "forbidden": heavy_modules},
+    "pdf_cache": {"seconds": 0.1, "forbidden": heavy_modules},
+    "batch": {"seconds": 0.4, "forbidden": heavy_modules},
+    "service": {"seconds": 0.4, "forbidden": heavy_modules},
+    "report": {"seconds": 0.6, "forbidden": ("pandas", "matplotlib")},
+    # A interface é um script do Streamlit: importá-lo executaria a página, então mede-se só o
+    # cabeçalho de importações de app.py (inclui o próprio streamlit)
+    "app": {"seconds": 1.2, "forbidden": heavy_modules, "script": "app.py"},
+}
+
+_probe = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+# Importações do nível superior de um script (sem executar o resto)
+def script_imports(path):
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    statements = [node for node in ast.parse(source).body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.get_source_segment(source, node) for node in statements)
+
+# Função para medir a importação de um módulo em um interpretador novo (melhor de `runs` execuções);
+# com script, mede as importações do cabeçalho do arquivo em vez de importar o módulo
+def measure_import(module, runs=3, script=None):
+    root = os.path.dirname(os.path.abspath(__file__))
+    imports = script_imports(os.path.join(root, script)) if script else f"import {module}"
+    best = None
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _probe.format(imports=imports, heavy=heavy_modules)],
+            cwd=root, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+# Função para verificar o orçamento; retorna as medições e a lista de violações
+def check_import_budget(budgets=None, runs=3):
+    budgets = budgets or import_budgets
+    measurements = {}
+    failures = []
+    for module, budget in budgets.items():
+        result = measure_import(module, runs, budget.get("script"))
+        measurements[module] = result
+        if result["seconds"] > budget["seconds"]:
+            failures.append(f"{module}: {result['seconds']:.3f} s > {budget['seconds']:.3f} s")
+        loaded = sorted(set(result["loaded"]) & set(budget["forbidden"]))
+        if loaded:
+            failures.append(f"{module}: carrega {', '.join(loaded)} na importação")
+    return measurements, failures
+
+def main():
+    measurements, failures = check_import_budget()
+    for module, result in measurements.items():
+        print(f"{module:<14} {result['seconds'] * 1000:7.1f} ms  {', '.join(result['loaded']) or '-'}")
+    for failure in failures:
+        print(f"FALHA: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import bisect
+import csv
+import os
+import unicodedata
+from functools import lru_cache
+
+# Lista de municípios com a isopleta de V0 (MUNICÍPIO;ESTADO;ISOPLETA)
+ISOPLETH_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lista_de_isopletas_por_região_elgin.csv")
+
+# Siglas das unidades federativas
+state_abbreviations = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas", "BA": "Bahia",
+    "CE": "Ceará", "DF": "Distrito Federal", "ES": "Espírito Santo", "GO": "Goiás",
+    "MA": "Maranhão", "MT": "Mato Grosso", "MS": "Mato Grosso do Sul", "MG": "Minas Gerais",
+    "PA": "Pará", "PB": "Paraíba", "PR": "Paraná", "PE": "Pernambuco", "PI": "Piauí",
+    "RJ": "Rio de Janeiro", "RN": "Rio Grande do Norte", "RS": "Rio Grande do Sul",
+    "RO": "Rondônia", "RR": "Roraima", "SC": "Santa Catarina", "SP": "São Paulo",
+    "SE": "Sergipe", "TO": "Tocantins",
+}
+
+# Nome sem acentos, em maiúsculas e com espaços simples ("São José d'Oeste" -> "SAO JOSE D OESTE")
+def normalize_name(value):
+    value = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode("ascii")
+    for separator in "-'`.":
+        value = value.replace(separator, " ")
+    return " ".join(value.upper().split())
+
+# Estado normalizado, aceitando o nome completo ou a sigla
+def normalize_state(value):
+    value = str(value or "").strip()
+    return normalize_name(state_abbreviations.get(value.upper(), value))
+
+# Converte "30m/s" em 30.0
+def parse_isopleth(value):
+    return float(str(value).lower().replace("m/s", "").replace(",", ".").strip())
+
+# Função para ler o CSV uma única vez e montar os índices de busca
+@lru_cache(maxsize=None)
+def load_isopleths(path=ISOPLETH_CSV):
+    index = {}  # (estado, município) normalizados -> (município, estado, V0)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.reader(f, delimiter=";"):
+            if len(row) < 3:
+                continue
+            try:
+                v0 = parse_isopleth(row[2])
+            except ValueError:
+                continue  # cabeçalho ou linha inválida
+            city, state = row[0].strip(), row[1].strip()
+            index[(normalize_state(state), normalize_name(city))] = (city, state, v0)
+
+    by_state = sorted(index)  # (estado, município) para busca por prefixo dentro de um estado
+    by_city = sorted((key[1], key[0]) for key in index)  # (município, estado) para busca em todos os estados
+    return {"index": index, "by_state": by_state, "by_city": by_city}
+
+# Função para obter V0 de um município; sem estado, só retorna se o nome for único
+def lookup_v0(state, city):
+    table = load_isopleths()
+    city_key = normalize_name(city)
+    if state:
+        entry = table["index"].get((normalize_state(state), city_key))
+        return entry[2] if entry else None
+
+    matches = _prefix_range(table["by_city"], (city_key,), city_key)
+    matches = [(name, st) for name, st in matches if name == city_key]
+    if len(matches) == 1:
+        return table["index"][(matches[0][1], matches[0][0])][2]
+    return None
+
+# Chaves ordenadas cujo campo de busca começa com o prefixo
+def _prefix_range(keys, start, prefix, field=0):
+    position = bisect.bisect_left(keys, start)
+    found = []
+    while position < len(keys) and keys[position][field].startswith(prefix):
+        found.append(keys[position])
+        position += 1
+    return found
+
+# Função para sugerir municípios pelo início do nome (sem acento e sem diferenciar maiúsculas)
+def search_cities(prefix, state=None, limit=10):
+    table = load_isopleths()
+    prefix = normalize_name(prefix)
+    if state:
+        state_key = normalize_state(state)
+        keys = _prefix_range(table["by_state"], (state_key, prefix), prefix, field=1)
+        keys = [key for key in keys if key[0] == state_key]
+    else:
+        keys = [(st, name) for name, st in _prefix_range(table["by_city"], (prefix,), prefix)]
+    return [table["index"][key][0] for key in keys[:limit]]
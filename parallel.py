@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Número padrão de processos: um por núcleo disponível
+def default_workers():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+# Importa os módulos pesados uma vez em cada processo, antes do primeiro job
+def _warm_up(modules):
+    for name in modules:
+        __import__(name)
+
+# Executa func(*job) para cada job em um pool de processos.
+# O resultado mantém a ordem dos jobs, independente da ordem de término; uma falha
+# vira on_error(index, exc) sem interromper os demais jobs. No máximo
+# max_pending jobs ficam na fila ao mesmo tempo, limitando a memória em lotes grandes.
+# Com ordered=True, progress recebe os resultados na ordem dos jobs (quem termina antes
+# espera) e só são enviados jobs até max_pending depois do mais antigo ainda não repassado,
+# o que também limita os resultados em espera.
+# Se um processo morre (ex.: encerrado pelo sistema por falta de memória), o pool inteiro
+# quebra e não se sabe qual job o derrubou: o pool é recriado e os jobs que estavam em
+# andamento são repetidos um de cada vez. Só o job que derruba o pool de novo vira falha.
+def run_parallel(func, jobs, workers=None, progress=None, on_error=None, warm_up=(), max_pending=None,
+                 ordered=False):
+    jobs = list(jobs)
+    total = len(jobs)
+    workers = max(1, workers or default_workers())
+    max_pending = max_pending or workers * 4
+    results = [None] * total
+    finished_jobs = [False] * total
+    done = 0
+
+    def finish(index, result):
+        nonlocal done
+        results[index] = result
+        finished_jobs[index] = True
+        if not ordered:
+            done += 1
+            if progress is not None:
+                progress(done, total, result)
+            return
+        while done < total and finished_jobs[done]:
+            done += 1
+            if progress is not None:
+                progress(done, total, results[done - 1])
+
+    def fail(index, exc):
+        if on_error is None:
+            raise exc
+        finish(index, on_error(index, exc))
+
+    def new_executor():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_warm_up, initargs=(tuple(warm_up),))
+
+    executor = new_executor()
+    broken = False
+    suspects = []  # jobs em andamento quando o pool quebrou
+    try:
+        pending = {}
+        next_job = 0
+        while next_job < total or pending or suspects:
+            if suspects and not pending:
+                if broken:
+                    executor.shutdown(wait=True)
+                    executor = new_executor()
+                    broken = False
+                # Repetição isolada: se o pool quebrar agora, o culpado é este job
+                index = suspects.pop(0)
+                try:
+                    result = executor.submit(func, *jobs[index]).result()
+                except BrokenProcessPool as exc:
+                    broken = True
+                    fail(index, exc)
+                except Exception as exc:
+                    fail(index, exc)
+                else:
+                    finish(index, result)
+                continue
+            while (not suspects and next_job < total and len(pending) < max_pending
+                   and (not ordered or next_job < done + max_pending)):
+                try:
+                    pending[executor.submit(func, *jobs[next_job])] = next_job
+                except BrokenProcessPool:
+                    broken = True
+                    suspects.append(next_job)
+                next_job += 1
+            if not pending:
+                continue
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    suspects.append(index)
+                except Exception as exc:
+                    fail(index, exc)
+                else:
+                    finish(index, result)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return results
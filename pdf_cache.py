@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import tempfile
+from io import BytesIO
+
+from serialization import json_default
+from tracing import span
+
+# Versão do layout do memorial; alterar quando o conteúdo do PDF mudar para invalidar o cache
+# (inclusive o tratamento da imagem em report_image, que não entra na chave)
+CACHE_VERSION = 3
+
+# Pasta padrão do cache ($XDG_CACHE_HOME/c_vento/pdf)
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "c_vento", "pdf")
+
+# Chave de conteúdo: hash das entradas normalizadas (JSON ordenado) e dos bytes da imagem.
+# A data do rodapé não entra na chave.
+def pdf_cache_key(data, results, project_info, wind_forces, image_bytes=None):
+    payload = json.dumps(
+        {
+            "version": CACHE_VERSION,
+            "data": data,
+            "results": results,
+            "project_info": project_info,
+            "wind_forces": wind_forces,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=json_default,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8"))
+    digest.update(b"\0image\0")
+    if image_bytes is not None:
+        digest.update(hashlib.sha256(image_bytes).digest())
+    return digest.hexdigest()
+
+# Cache persistente de memoriais em PDF, endereçado pelo conteúdo das entradas.
+# Cada PDF é um arquivo <chave>.pdf; o mtime marca o último uso e, quando o total
+# passa de max_bytes, os arquivos menos usados recentemente são removidos (LRU).
+class PdfCache:
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                pdf = f.read()
+            os.utime(path)  # marca como usado recentemente
+        except FileNotFoundError:
+            return None
+        return pdf
+
+    def put(self, key, pdf):
+        # Escrita atômica: vários processos podem gravar a mesma chave ao mesmo tempo
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".pdf"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    # Retorna o PDF do cache ou gera com o ReportLab e guarda
+    def get_or_render(self, data, results, project_info, wind_forces, image_bytes=None, generated_at=None):
+        with span("pdf_cache.get_or_render") as trace:
+            key = pdf_cache_key(data, results, project_info, wind_forces, image_bytes)
+            pdf = self.get(key)
+            trace.set(hit=pdf is not None)
+            if pdf is None:
+                from report import generate_pdf
+
+                image = BytesIO(image_bytes) if image_bytes is not None else None
+                pdf = generate_pdf(data, results, project_info, wind_forces, image, generated_at=generated_at).getvalue()
+                self.put(key, pdf)
+            return pdf
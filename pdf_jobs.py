@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from parallel import _warm_up
+from pdf_cache import PdfCache, pdf_cache_key
+
+# Renderização executada nos processos do pool (o PDF também fica no cache em disco)
+def _render(directory, data, results, project_info, wind_forces, image_bytes):
+    return PdfCache(directory).get_or_render(data, results, project_info, wind_forces, image_bytes)
+
+# Fila de geração de memoriais em segundo plano, compartilhada por todas as sessões.
+# No máximo max_workers PDFs são gerados ao mesmo tempo, em processos separados, para que
+# a renderização não dispute o interpretador com os recálculos da interface.
+# O identificador do job é a chave do PdfCache: pedidos iguais compartilham o mesmo job,
+# e PDFs já presentes no cache ficam prontos imediatamente.
+# Se um processo morre (ex.: falta de memória em uma imagem grande), o pool quebrado é
+# trocado por outro. Como não se sabe qual job derrubou o processo, os jobs interrompidos são
+# repetidos um de cada vez em um processo separado; só o que derruba esse processo fica com erro.
+class PdfJobQueue:
+    def __init__(self, max_workers=1, cache=None, max_jobs=64):
+        self.max_workers = max_workers
+        self.cache = cache or PdfCache()
+        self.max_jobs = max_jobs
+        self.executor = None
+        self.isolation = None  # pool de um processo para repetir jobs interrompidos
+        self.suspects = deque()
+        self.isolating = None
+        self.jobs = OrderedDict()  # id -> {"future", "pdf", "error", "submitted", "finished", "args", "isolated"}
+        self.lock = threading.RLock()  # o callback pode rodar dentro de submit
+
+    def _pool(self, max_workers):
+        return ProcessPoolExecutor(max_workers=max_workers, initializer=_warm_up, initargs=(("report",),))
+
+    def _start(self):
+        if self.executor is None:
+            self.executor = self._pool(self.max_workers)
+
+    # Descarta um pool quebrado; pode rodar na thread do próprio pool (callback), então não espera
+    def _discard(self, executor):
+        if self.executor is executor:
+            self.executor = None
+        elif self.isolation is executor:
+            self.isolation = None
+        else:
+            return
+        executor.shutdown(wait=False)
+
+    def _run(self, job, executor):
+        job["future"] = executor.submit(_render, *job["args"])
+        job["future"].add_done_callback(lambda future: self._finish(job, future, executor))
+
+    def submit(self, data, results, project_info, wind_forces, image_bytes=None):
+        job_id = pdf_cache_key(data, results, project_info, wind_forces, image_bytes)
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job["error"] is None:
+                self.jobs.move_to_end(job_id)
+                return job_id
+
+            job = {"future": None, "pdf": self.cache.get(job_id), "error": None,
+                   "submitted": time.monotonic(), "finished": None,
+                   "args": (self.cache.directory, data, results, project_info, wind_forces, image_bytes),
+                   "isolated": False}
+            self.jobs[job_id] = job
+            if job["pdf"] is None:
+                self._start()
+                try:
+                    self._run(job, self.executor)
+                except BrokenProcessPool:  # o processo morreu e o callback ainda não trocou o pool
+                    self._discard(self.executor)
+                    self._start()
+                    self._run(job, self.executor)
+            else:
+                job["finished"] = job["submitted"]
+            self._trim()
+        return job_id
+
+    def _finish(self, job, future, executor):
+        with self.lock:
+            try:
+                job["pdf"] = future.result()
+            except BrokenProcessPool as exc:
+                self._discard(executor)
+                if not job["isolated"]:
+                    job["isolated"] = True
+                    self.suspects.append(job)
+                    self._isolate()
+                    return
+                job["error"] = f"{type(exc).__name__}: {exc}"
+            except Exception as exc:
+                job["error"] = f"{type(exc).__name__}: {exc}"
+            job["finished"] = time.monotonic()
+            job["future"] = None
+            job["args"] = None
+            if job is self.isolating:
+                self.isolating = None
+                self._isolate()
+
+    # Repete o próximo job interrompido sozinho no pool de isolamento
+    def _isolate(self):
+        if self.isolating is not None or not self.suspects:
+            return
+        if self.isolation is None:
+            self.isolation = self._pool(1)
+        self.isolating = self.suspects.popleft()
+        self._run(self.isolating, self.isolation)
+
+    # Descarta os jobs concluídos mais antigos (os PDFs continuam no cache em disco)
+    def _trim(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["finished"] is not None]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[job_id]
+
+    # Estado do job: "queued", "running", "done", "error" ou "unknown"
+    def status(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return {"state": "unknown"}
+            now = job["finished"] or time.monotonic()
+            status = {"state": "done", "elapsed": now - job["submitted"]}
+            if job["error"] is not None:
+                status.update(state="error", error=job["error"])
+            elif job["future"] is not None:
+                if job["future"].running():
+                    status["state"] = "running"
+                else:
+                    waiting = [j for j in self.jobs.values() if j["future"] is not None and not j["future"].running()]
+                    position = next((i for i, j in enumerate(waiting) if j is job), 0)
+                    status.update(state="queued", position=position + 1)
+            return status
+
+    def result(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job["pdf"] if job is not None else None
+
+    def shutdown(self):
+        for executor in (self.executor, self.isolation):
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        self.executor = self.isolation = None
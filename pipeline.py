@@ -0,0 +1,175 @@
+import json
+import threading
+from collections import OrderedDict
+
+from calculation import (
+    assemble_results,
+    automatic_roof_ce,
+    combination_stage,
+    effective_pressures,
+    friction_stage,
+    pressure_envelope,
+    resolve_coefficients,
+    roof_forces,
+    roof_geometry,
+    surface_q,
+    surface_s2,
+    surface_vk,
+    zoning_stage,
+)
+from combinations import factor_fields
+from frame_loads import frame_loads
+from serialization import json_default
+from tracing import span
+
+# Grafo de recálculo incremental: entradas -> S2 -> Vk -> q -> DP/forças -> resultados.
+# Cada nó é uma etapa de calculation.py com as dependências declaradas. A chave de um nó é a
+# tupla do seu nome com as chaves das dependências, e a chave de uma entrada é o seu valor em
+# JSON ordenado; assim as chaves são calculadas sem executar nenhuma etapa e só os nós cuja chave
+# mudou são recalculados. Ex.: alterar o Cpi recalcula DP, forças e resultados, mas não S2/Vk/q.
+# Os valores ficam em memória (LRU por nó), compartilhados entre sessões: não devem ser alterados.
+class Graph:
+    def __init__(self, cache_size=256):
+        self.cache_size = cache_size
+        self.nodes = OrderedDict()  # nome -> (função, dependências)
+        self.values = {}  # nome -> OrderedDict(chave -> valor)
+        self.stats = {}  # nome -> {"hits", "misses"}
+        self.lock = threading.Lock()
+
+    # Decorador para registrar uma etapa; a função recebe os valores das dependências na ordem
+    def node(self, *dependencies, name=None):
+        def register(function):
+            node_name = name or function.__name__
+            self.nodes[node_name] = (function, dependencies)
+            self.values[node_name] = OrderedDict()
+            self.stats[node_name] = {"hits": 0, "misses": 0}
+            return function
+        return register
+
+    # Avalia os nós pedidos a partir das entradas (dicionário plano); entradas ausentes valem None
+    def evaluate(self, inputs, targets):
+        with span("pipeline.evaluate") as trace:
+            return self._evaluate(inputs, targets, trace)
+
+    def _evaluate(self, inputs, targets, trace):
+        keys = {}
+        values = {}
+
+        def key(name):
+            if name not in keys:
+                if name in self.nodes:
+                    keys[name] = (name, *(key(dependency) for dependency in self.nodes[name][1]))
+                else:
+                    keys[name] = (name, _fingerprint(inputs.get(name)))
+            return keys[name]
+
+        def value(name):
+            if name in values:
+                return values[name]
+            if name not in self.nodes:
+                values[name] = inputs.get(name)
+                return values[name]
+
+            node_key = key(name)
+            cache = self.values[name]
+            with self.lock:
+                hit = node_key in cache
+                if hit:
+                    cache.move_to_end(node_key)
+                    result = cache[node_key]
+                    self.stats[name]["hits"] += 1
+            trace.count("hits" if hit else "misses")
+            if not hit:
+                function, dependencies = self.nodes[name]
+                result = function(*(value(dependency) for dependency in dependencies))
+                with self.lock:
+                    cache[node_key] = result
+                    while len(cache) > self.cache_size:
+                        cache.popitem(last=False)
+                    self.stats[name]["misses"] += 1
+            values[name] = result
+            return result
+
+        return {target: value(target) for target in targets}
+
+    def clear(self):
+        with self.lock:
+            for cache in self.values.values():
+                cache.clear()
+            for counters in self.stats.values():
+                counters.update(hits=0, misses=0)
+
+def _fingerprint(value):
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=json_default)
+
+# Entradas do modo edifício alto: só as informadas, para valerem os padrões de zoning.py
+zoning_fields = ("storeys", "storey_height", "zone_tolerance", "max_zones")
+
+# Coeficientes Ce: os informados ou, com ce_mode "auto", os calculados pela geometria
+ce_fields = ("ce_fechamento_0", "ce_fechamento_90", "ce_cobertura_0", "ce_cobertura_90")
+
+graph = Graph()
+
+@graph.node("ce_mode", "roof_type", "height", "length", "width", "slope", *ce_fields, name="ce")
+def _ce(ce_mode, roof_type, height, length, width, slope, *ce_values):
+    data = {"roof_type": roof_type, "height": height, "length": length, "width": width, "slope": slope}
+    coefficients = dict(zip(ce_fields, ce_values), ce_mode=ce_mode or "manual")
+    return resolve_coefficients(data, coefficients)
+
+graph.node("z_fechamento", "z_cobertura", "category", "class_", name="s2")(surface_s2)
+graph.node("s2", "v0", "s1", "s3", name="vk")(surface_vk)
+graph.node("vk", name="q")(surface_q)
+
+@graph.node("roof_type", "slope", "length", "width", "ce", name="roof")
+def _roof(roof_type, slope, length, width, ce):
+    return roof_geometry(roof_type, slope, length, width, automatic_roof_ce(ce))
+
+@graph.node("q", "roof", "cpi", "ce", name="pressures")
+def _pressures(q, roof, cpi, ce):
+    return effective_pressures(q, roof, cpi, ce["ce_fechamento_0"], ce["ce_fechamento_90"])
+
+graph.node("pressures", name="envelope")(pressure_envelope)
+graph.node("length", "width", "z_fechamento", "q", name="friction")(friction_stage)
+graph.node("length", "width", "height", "portico_distance", "pressures", name="frame_loads")(frame_loads)
+
+@graph.node("pressures", "roof", name="wind_forces")
+def _wind_forces(pressures, roof):
+    return roof_forces(pressures, roof["area_per_water"] if roof is not None else None)
+
+@graph.node(*zoning_fields, "v0", "s1", "s3", "category", "class_", "length", "width", name="zoning")
+def _zoning(storeys, storey_height, zone_tolerance, max_zones, v0, s1, s3, category, class_, length, width):
+    data = {"v0": v0, "s1": s1, "s3": s3, "category": category, "class_": class_, "length": length, "width": width}
+    for field, value in zip(zoning_fields, (storeys, storey_height, zone_tolerance, max_zones)):
+        if value is not None:
+            data[field] = value
+    return zoning_stage(data)
+
+# Entradas das combinações de ações: cargas da cobertura e coeficientes de ponderação
+combination_fields = ("permanent_load", "live_load", "slope", *factor_fields)
+
+@graph.node(*combination_fields, "length", "width", "height", "portico_distance", "pressures", "frame_loads", "zoning",
+            name="combinations")
+def _combinations(*values):
+    data = dict(zip(combination_fields, values))
+    length, width, height, portico_distance, pressures, loads, zoning = values[len(combination_fields):]
+    data.update(length=length, width=width, height=height, portico_distance=portico_distance)
+    return combination_stage(data, pressures, zoning, loads)
+
+@graph.node("cpi_case", "cpi", "ce", "s2", "vk", "q", "roof", "pressures", "envelope", "friction", "zoning",
+            "combinations", name="results")
+def _results(cpi_case, cpi, ce, s2, vk, q, roof, pressures, envelope, friction, zoning, combinations):
+    coefficients = {"cpi_case": cpi_case, "cpi": cpi, "ce_mode": ce["ce_mode"], **{field: ce[field] for field in ce_fields}}
+    return assemble_results(coefficients, s2, vk, q, roof, pressures, envelope, friction, zoning, combinations)
+
+# Mesmo retorno de calculation.calculate_results, recalculando só as etapas afetadas
+def evaluate_results(data, coefficients):
+    inputs = dict(data)
+    inputs.update(coefficients)
+    values = graph.evaluate(inputs, ("results", "wind_forces"))
+    return values["results"], values["wind_forces"]
+
+# Cargas nos pórticos (frame_loads.py), reaproveitando o DP já calculado pelo grafo
+def evaluate_frame_loads(data, coefficients):
+    inputs = dict(data)
+    inputs.update(coefficients)
+    return graph.evaluate(inputs, ("frame_loads",))["frame_loads"]
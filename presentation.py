@@ -0,0 +1,172 @@
+import numpy as np
+
+from calculation import format_with_comma
+from frame_loads import frame_member_labels
+
+# Superfícies exibidas na envoltória, na ordem do memorial
+envelope_surfaces = ("Cobertura", "Fechamento")
+
+# Linhas da tabela de DP de uma direção (Ce, Cpi, DP), já formatadas
+def dp_rows(pressures, direction):
+    i = pressures["directions"].index(direction)
+    rows = []
+    for j, ce in enumerate(pressures["ce"][i]):
+        if np.isnan(ce):
+            continue
+        for k, cp in enumerate(pressures["cpi"]):
+            rows.append([format_with_comma(ce), format_with_comma(cp), format_with_comma(pressures["dp"][i, j, k])])
+    return rows
+
+# Tabelas de DP de todas as direções
+def dp_tables(pressures):
+    return {direction: dp_rows(pressures, direction) for direction in pressures["directions"]}
+
+# Linhas da tabela de forças de uma direção da cobertura (Ce, Cpi, DP, área, F)
+def force_rows(wind_forces, ce, cpi, direction):
+    i = wind_forces["directions"].index(direction)
+    area = format_with_comma(wind_forces["area_per_water"], 2)
+    rows = []
+    for j, ce_value in enumerate(ce):
+        if np.isnan(ce_value):
+            continue
+        for k, cp in enumerate(cpi):
+            rows.append([
+                format_with_comma(ce_value),
+                format_with_comma(cp),
+                format_with_comma(wind_forces["dp"][i, j, k]),
+                area,
+                format_with_comma(wind_forces["force"][i, j, k], 2),
+            ])
+    return rows
+
+# Tabelas de forças de todas as direções da cobertura
+def force_tables(pressures, wind_forces):
+    tables = {}
+    for direction in wind_forces["directions"]:
+        ce = pressures["ce"][pressures["directions"].index(direction)]
+        tables[direction] = force_rows(wind_forces, ce, pressures["cpi"], direction)
+    return tables
+
+# Linhas da envoltória (superfície, extremo, direção, Ce, Cpi, DP)
+def envelope_rows(envelope):
+    rows = []
+    for surface in envelope_surfaces:
+        entry = envelope.get(surface)
+        if not entry:
+            continue
+        for key, label in (("max_pressure", "DP máximo"), ("max_suction", "DP mínimo")):
+            case = entry[key]
+            if case is None:
+                continue
+            rows.append([
+                surface,
+                label,
+                case["direction"].split(" (")[1].rstrip(")"),
+                format_with_comma(case["ce"]),
+                format_with_comma(case["cpi"]),
+                format_with_comma(case["dp"]),
+            ])
+    return rows
+
+# Linhas do resumo das zonas do edifício alto (uma linha por zona, do topo para a base)
+def zoning_rows(zoning):
+    zones = zoning["zones"]
+    rows = []
+    for i in range(len(zones["storeys"]) - 1, -1, -1):
+        rows.append(
+            [str(i + 1),
+             f"{format_with_comma(zones['z_bottom'][i], 1)} - {format_with_comma(zones['z_top'][i], 1)}",
+             str(zones["storeys"][i]),
+             format_with_comma(zones["s2"][i], 3),
+             format_with_comma(zones["q_kgfm2"][i])]
+            + [format_with_comma(value, 0) for value in zones["shear"][:, i]]
+            + [format_with_comma(value, 0) for value in zones["moment"][:, i]]
+        )
+    return rows
+
+# Rótulos das direções de DP na análise probabilística
+probabilistic_dp_labels = {"fechamento_0": "Fech. 0°/180°", "fechamento_90": "Fech. 90°/270°", "cobertura": "Cobertura"}
+
+# Rótulo de um percentil (P5, P99,9)
+def percentile_label(p):
+    return f"P{format_with_comma(p, 0 if float(p).is_integer() else 1)}"
+
+def _probability(value):
+    return f"{format_with_comma(value * 100, 2)}%"
+
+# Linhas dos percentis da análise probabilística (grandeza, determinístico, média, desvio, percentis)
+def probabilistic_rows(summary):
+    def row(label, stats):
+        return ([label, format_with_comma(stats["deterministic"]), format_with_comma(stats["mean"]),
+                 format_with_comma(stats["std"])]
+                + [format_with_comma(stats["percentiles"][p]) for p in summary["percentiles"]])
+
+    rows = [row(f"q {surface.capitalize()}", summary["q"][surface]) for surface in ("fechamento", "cobertura")]
+    for name, extremes in summary["dp"].items():
+        rows.append(row(f"DP máx. {probabilistic_dp_labels[name]}", extremes["max"]))
+        rows.append(row(f"DP mín. {probabilistic_dp_labels[name]}", extremes["min"]))
+    return rows
+
+# Linhas das probabilidades de excedência de q (valor determinístico e limites informados)
+def exceedance_rows(summary):
+    rows = []
+    for surface in ("fechamento", "cobertura"):
+        stats = summary["q"][surface]
+        cases = [(f"{format_with_comma(stats['deterministic'])} (determinístico)", stats["exceedance_deterministic"])]
+        cases += [(format_with_comma(threshold), case) for threshold, case in stats["exceedance"].items()]
+        for label, case in cases:
+            rows.append([
+                surface.capitalize(),
+                label,
+                _probability(case["probability"]),
+                f"{_probability(case['ci95'][0])} - {_probability(case['ci95'][1])}",
+            ])
+    return rows
+
+# Linhas dos diagnósticos de convergência (erro padrão da média e do maior percentil)
+def convergence_rows(summary):
+    top = summary["percentiles"][-1]
+    rows = []
+    for surface in ("fechamento", "cobertura"):
+        diagnostics = summary["q"][surface]["diagnostics"]
+        rows.append([
+            surface.capitalize(),
+            format_with_comma(diagnostics["mean_stderr"], 3),
+            format_with_comma(diagnostics["percentile_stderr"][top], 3),
+            _probability(diagnostics["relative_stderr"]),
+            "Sim" if diagnostics["converged"] else "Não",
+        ])
+    return rows
+
+# Fórmulas das combinações de ações (ex.: "1,25 G + 1,50 Q + 0,84 W"), omitindo as parcelas nulas
+def combination_descriptions(combinations):
+    rows = []
+    for combination in combinations["combinations"]:
+        terms = [f"{format_with_comma(combination[key])} {key.upper()}" for key in ("g", "q", "w") if combination[key]]
+        rows.append([combination["name"], combination["state"], " + ".join(terms)])
+    return rows
+
+def _wind_case(case):
+    if case["direction"] is None:
+        return "Sem vento"
+    label = case["direction"].split(" (")[1].rstrip(")") if "(" in case["direction"] else case["direction"]
+    prefix = f"{case['case']}: " if case.get("case") else ""
+    return f"{prefix}{label}, Ce {format_with_comma(case['ce'])}, Cpi {format_with_comma(case['cpi'])}"
+
+# Linhas das envoltórias das combinações (estado, superfície ou barra, extremo, valor, combinação,
+# caso de vento e local que governam); group é "surfaces" (kgf/m²) ou "members" (kgf/m)
+def combination_rows(combinations, group):
+    rows = []
+    for state, items in combinations[group].items():
+        for name, extremes in items.items():
+            for extreme, label in (("max", "Máximo"), ("min", "Mínimo")):
+                case = extremes[extreme]
+                if group == "members":
+                    location = f"Pórticos {case['location']}"
+                else:
+                    location = f"Zona {case['location']}" if case["location"] is not None else "-"
+                rows.append([
+                    state, frame_member_labels.get(name, name), label, format_with_comma(case["value"]),
+                    case["combination"], _wind_case(case), location,
+                ])
+    return rows
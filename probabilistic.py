@@ -0,0 +1,240 @@
+import math
+
+import numpy as np
+
+from calculation import automatic_roof_ce, resolve_coefficients, roof_coefficients_array
+from tracing import span
+from wind_profile import CATEGORIES, wind_profile
+
+# Modelo de incertezas padrão da análise probabilística
+default_samples = 1_000_000
+default_chunk_size = 1 << 18  # amostras por lote: a memória não depende do total de amostras
+default_v0_cov = 0.10  # coeficiente de variação de V0 (distribuição de Gumbel com média no V0 da isopleta)
+default_exposure_cov = 0.10  # coeficiente de variação do fator de exposição (lognormal, média 1)
+default_category_confidence = 0.6  # probabilidade da categoria informada; o restante vai para as vizinhas
+default_percentiles = (5.0, 50.0, 95.0, 99.0, 99.9)
+default_tolerance = 0.005  # erro padrão relativo do maior percentil para considerar a análise convergida
+
+# Lotes mínimos: o erro padrão dos percentis é estimado pela dispersão entre lotes
+minimum_chunks = 8
+
+# Histograma em escala logarítmica usado para os percentis sem guardar as amostras
+histogram_bins = 1 << 14
+histogram_margin = math.log(10)  # folga em torno da faixa do primeiro lote
+
+# Pontos guardados da curva de convergência
+convergence_points = 50
+
+# Probabilidades das categorias de rugosidade: `confidence` na categoria informada e o
+# restante dividido igualmente entre as categorias vizinhas
+def category_probabilities(category, confidence=default_category_confidence):
+    index = CATEGORIES.index(category)
+    neighbours = [i for i in (index - 1, index + 1) if 0 <= i < len(CATEGORIES)]
+    probabilities = np.zeros(len(CATEGORIES))
+    probabilities[index] = confidence
+    probabilities[neighbours] = (1 - confidence) / len(neighbours)
+    return probabilities
+
+# Sorteio de um lote: V0 (Gumbel), categoria (discreta) e fator de exposição (lognormal, média 1).
+# O fator de exposição representa a incerteza do perfil S2 no local (obstáculos, efeito de
+# vizinhança) e multiplica a velocidade característica.
+def _draw(rng, size, v0_mean, v0_cov, probabilities, exposure_cov):
+    scale = v0_cov * v0_mean * math.sqrt(6) / math.pi
+    v0 = np.maximum(rng.gumbel(v0_mean - np.euler_gamma * scale, scale, size), 0.0)
+    category = rng.choice(len(CATEGORIES), size=size, p=probabilities)
+    sigma = math.sqrt(math.log1p(exposure_cov**2))
+    exposure = rng.lognormal(-sigma**2 / 2, sigma, size)
+    return v0, category, exposure
+
+# Estatísticas acumuladas de uma grandeza ao longo dos lotes: soma e soma dos quadrados
+# (em torno de uma referência, para estabilidade), histograma logarítmico, contagens de
+# excedência e percentis de cada lote (erro padrão por médias de lotes)
+class _Accumulator:
+    def __init__(self, first_chunk, reference, thresholds, percentiles):
+        positive = first_chunk[first_chunk > 0]
+        low, high = (np.log(positive.min()), np.log(positive.max())) if len(positive) else (0.0, 1.0)
+        self.log_low = low - histogram_margin
+        self.log_step = (high - low + 2 * histogram_margin) / histogram_bins
+        self.counts = np.zeros(histogram_bins, dtype=np.int64)
+        self.shift = float(np.mean(first_chunk))
+        self.n = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.reference = reference
+        self.thresholds = np.asarray(thresholds, dtype=float)
+        self.reference_exceeded = 0
+        self.threshold_exceeded = np.zeros(len(self.thresholds), dtype=np.int64)
+        self.percentiles = percentiles
+        self.chunk_percentiles = []
+        self.trace = []  # (amostras, média, maior percentil)
+
+    def add(self, values):
+        self.n += len(values)
+        centered = values - self.shift
+        self.sum += float(centered.sum())
+        self.sum_squares += float(np.dot(centered, centered))
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        with np.errstate(divide="ignore"):
+            bins = np.floor((np.log(values) - self.log_low) / self.log_step)
+        bins = np.clip(np.nan_to_num(bins, neginf=0), 0, histogram_bins - 1).astype(np.intp)
+        self.counts += np.bincount(bins, minlength=histogram_bins)
+        self.reference_exceeded += int(np.count_nonzero(values > self.reference))
+        if len(self.thresholds):
+            self.threshold_exceeded += np.count_nonzero(values[:, None] > self.thresholds[None, :], axis=0)
+        self.chunk_percentiles.append(np.percentile(values, self.percentiles))
+        self.trace.append((self.n, self.mean(), self.percentile(self.percentiles[-1])))
+
+    def mean(self):
+        return self.shift + self.sum / self.n
+
+    def std(self):
+        variance = (self.sum_squares - self.sum**2 / self.n) / max(self.n - 1, 1)
+        return math.sqrt(max(variance, 0.0))
+
+    # Percentil pelo histograma, interpolado no logaritmo dentro da classe
+    def percentile(self, p):
+        target = p / 100 * self.n
+        cumulative = np.cumsum(self.counts)
+        index = min(int(np.searchsorted(cumulative, target)), histogram_bins - 1)
+        before = cumulative[index - 1] if index else 0
+        fraction = (target - before) / self.counts[index] if self.counts[index] else 0.0
+        value = math.exp(self.log_low + (index + fraction) * self.log_step)
+        return min(max(value, self.minimum), self.maximum)
+
+# Resumo de uma grandeza (percentis, excedências e diagnósticos de convergência)
+def _summary(accumulator, tolerance):
+    n = accumulator.n
+    percentiles = {p: accumulator.percentile(p) for p in accumulator.percentiles}
+    chunks = np.array(accumulator.chunk_percentiles)
+    if len(chunks) > 1:
+        percentile_stderr = chunks.std(axis=0, ddof=1) / math.sqrt(len(chunks))
+    else:
+        percentile_stderr = np.full(len(accumulator.percentiles), math.nan)
+
+    def exceedance(count):
+        probability = count / n
+        stderr = math.sqrt(probability * (1 - probability) / n)
+        return {"probability": probability, "stderr": stderr,
+                "ci95": [max(probability - 1.96 * stderr, 0.0), min(probability + 1.96 * stderr, 1.0)]}
+
+    std = accumulator.std()
+    top = accumulator.percentiles[-1]
+    relative_stderr = float(percentile_stderr[-1] / percentiles[top]) if percentiles[top] else math.nan
+    step = max(1, len(accumulator.trace) // convergence_points)
+    trace = accumulator.trace[::step]
+    if trace[-1] is not accumulator.trace[-1]:
+        trace.append(accumulator.trace[-1])
+    return {
+        "deterministic": accumulator.reference,
+        "mean": accumulator.mean(),
+        "std": std,
+        "min": accumulator.minimum,
+        "max": accumulator.maximum,
+        "percentiles": percentiles,
+        "exceedance_deterministic": exceedance(accumulator.reference_exceeded),
+        "exceedance": {float(t): exceedance(int(c)) for t, c in zip(accumulator.thresholds, accumulator.threshold_exceeded)},
+        "diagnostics": {
+            "mean_stderr": std / math.sqrt(n),
+            "percentile_stderr": {p: float(e) for p, e in zip(accumulator.percentiles, percentile_stderr)},
+            "relative_stderr": relative_stderr,
+            "converged": bool(relative_stderr < tolerance),
+        },
+        "convergence": {
+            "samples": [item[0] for item in trace],
+            "mean": [item[1] for item in trace],
+            f"p{top:g}": [item[2] for item in trace],
+        },
+    }
+
+# Coeficientes (Ce - Cpi) extremos de cada superfície/direção: DP = q * coeficiente
+def _dp_coefficients(data, coefficients):
+    coefficients = resolve_coefficients(data, coefficients)
+    cpi = np.asarray(coefficients["cpi"], dtype=float)
+    surfaces = {}
+    if not len(cpi):
+        return surfaces
+    for direction, key in (("fechamento_0", "ce_fechamento_0"), ("fechamento_90", "ce_fechamento_90")):
+        ce = np.asarray(coefficients[key], dtype=float)
+        if len(ce):
+            delta = ce[:, None] - cpi[None, :]
+            surfaces[direction] = ("fechamento", float(delta.max()), float(delta.min()))
+    if data["roof_type"] == "Duas Águas":
+        roof_ce = automatic_roof_ce(coefficients)
+        ce = ([value for values in roof_ce.values() for value in values] if roof_ce
+              else roof_coefficients_array(data["slope"])[1:])
+        surfaces["cobertura"] = ("cobertura", float(max(ce) - cpi.min()), float(min(ce) - cpi.max()))
+    return surfaces
+
+# Estatísticas de DP a partir das de q: DP = c * q é monótona em q (decrescente para c < 0,
+# quando o percentil p de DP vem do percentil 100 - p de q)
+def _scaled(accumulator, coefficient):
+    return {
+        "deterministic": coefficient * accumulator.reference,
+        "mean": coefficient * accumulator.mean(),
+        "std": abs(coefficient) * accumulator.std(),
+        "percentiles": {
+            p: coefficient * accumulator.percentile(p if coefficient >= 0 else 100 - p)
+            for p in accumulator.percentiles
+        },
+    }
+
+# Função para a análise probabilística (Monte Carlo) de q e DP no fechamento e na cobertura.
+# V0, a categoria de rugosidade e a exposição são sorteados; S1, S3, a classe, as alturas
+# e os coeficientes Ce/Cpi ficam fixos. A cadeia S2 -> Vk -> q é avaliada em lotes vetorizados
+# de chunk_size amostras; como DP = q * (Ce - Cpi), as estatísticas de DP saem das de q.
+# O resultado é reprodutível para o mesmo seed, samples e chunk_size (cada lote tem o seu
+# gerador, derivado do seed por SeedSequence.spawn).
+def run_monte_carlo(data, coefficients, samples=default_samples, seed=0, v0_cov=default_v0_cov,
+                    exposure_cov=default_exposure_cov, category_confidence=default_category_confidence,
+                    chunk_size=default_chunk_size, percentiles=default_percentiles, thresholds=(),
+                    tolerance=default_tolerance):
+    samples = int(samples)
+    if samples < 2:
+        raise ValueError("A análise probabilística requer pelo menos 2 amostras")
+    if v0_cov < 0 or exposure_cov < 0 or not 0 <= category_confidence <= 1:
+        raise ValueError("Coeficientes de variação devem ser não negativos e a confiança na categoria entre 0 e 1")
+    percentiles = tuple(sorted(float(p) for p in percentiles))
+    probabilities = category_probabilities(data["category"], category_confidence)
+    heights = np.array([data["z_fechamento"], data["z_cobertura"]], dtype=float)
+    deterministic = wind_profile(heights, data["v0"], data["s1"], data["s3"], data["category"], data["class_"])["q_kgfm2"]
+
+    chunk_size = max(1, min(int(chunk_size), math.ceil(samples / minimum_chunks)))
+    chunks = math.ceil(samples / chunk_size)
+    generators = [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(chunks)]
+    accumulators = None
+    with span("probabilistic.run_monte_carlo", samples=samples, chunks=chunks):
+        for i, rng in enumerate(generators):
+            size = min(chunk_size, samples - i * chunk_size)
+            v0, category, exposure = _draw(rng, size, float(data["v0"]), v0_cov, probabilities, exposure_cov)
+            # Vk = (V0 * exposição) * S1 * S2 * S3, com S2 da categoria sorteada; forma (superfície, amostra)
+            q = wind_profile(heights[:, None], v0 * exposure, data["s1"], data["s3"], category, data["class_"])["q_kgfm2"]
+            if accumulators is None:
+                accumulators = [_Accumulator(q[k], float(deterministic[k]), thresholds, percentiles) for k in range(2)]
+            for k in range(2):
+                accumulators[k].add(q[k])
+
+    surfaces = {"fechamento": _summary(accumulators[0], tolerance), "cobertura": _summary(accumulators[1], tolerance)}
+    dp = {}
+    for name, (surface, delta_max, delta_min) in _dp_coefficients(data, coefficients).items():
+        accumulator = accumulators[0 if surface == "fechamento" else 1]
+        dp[name] = {"max": _scaled(accumulator, delta_max), "min": _scaled(accumulator, delta_min)}
+    return {
+        "samples": samples,
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "chunks": chunks,
+        "model": {
+            "v0_mean": float(data["v0"]),
+            "v0_cov": float(v0_cov),
+            "exposure_cov": float(exposure_cov),
+            "category_probabilities": dict(zip(CATEGORIES, probabilities.tolist())),
+        },
+        "percentiles": list(percentiles),
+        "tolerance": float(tolerance),
+        "q": surfaces,
+        "dp": dp,
+        "converged": all(s["diagnostics"]["converged"] for s in surfaces.values()),
+    }
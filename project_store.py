@@ -0,0 +1,347 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from serialization import json_default
+from tracing import span
+
+# Banco local (SQLite) de projetos: entradas, resultados numéricos e referência do PDF de cada
+# revisão. Um projeto é identificado pelo par (cliente, projeto); salvar de novo com entradas
+# diferentes cria uma revisão, e com entradas já salvas reaproveita a revisão (sem recalcular).
+# Os resultados ficam serializados como JSON compactado (arrays numpy preservados) e a imagem do
+# memorial é guardada uma vez por conteúdo, de modo que o memorial de uma revisão pode ser
+# reemitido igual ao original sem refazer o cálculo.
+# Cliente, projeto e município têm índices com a data (COLLATE NOCASE: busca por prefixo
+# usa o índice), e as listagens são paginadas por cursor (data, id), sem OFFSET.
+
+# Arquivo padrão ($XDG_DATA_HOME/c_vento/projetos.sqlite3)
+def default_store_path():
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "c_vento", "projetos.sqlite3")
+
+schema = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    client TEXT NOT NULL COLLATE NOCASE,
+    project TEXT NOT NULL COLLATE NOCASE,
+    municipality TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    revisions INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (client, project)
+);
+CREATE INDEX IF NOT EXISTS projects_client ON projects (client, updated_at);
+CREATE INDEX IF NOT EXISTS projects_project ON projects (project, updated_at);
+CREATE INDEX IF NOT EXISTS projects_municipality ON projects (municipality, updated_at);
+CREATE INDEX IF NOT EXISTS projects_updated ON projects (updated_at);
+
+CREATE TABLE IF NOT EXISTS revisions (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    inputs_key TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    results BLOB NOT NULL,
+    pdf_key TEXT,
+    image_key TEXT REFERENCES images (key),
+    UNIQUE (project_id, number)
+);
+CREATE INDEX IF NOT EXISTS revisions_inputs ON revisions (inputs_key);
+
+CREATE TABLE IF NOT EXISTS images (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+# Grandezas escalares do resumo de cada revisão (comparadas nas diferenças entre revisões)
+summary_fields = (
+    "s2_fechamento", "s2_cobertura", "vk_fechamento", "vk_cobertura",
+    "q_fechamento_kgfm2", "q_cobertura_kgfm2",
+)
+
+# Chave das entradas de uma revisão (mesma normalização do cache de PDFs)
+def inputs_key(data, coefficients, project_info):
+    payload = json.dumps({"data": data, "coefficients": coefficients, "project_info": project_info},
+                         sort_keys=True, ensure_ascii=False, default=json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Serialização dos resultados em JSON sem perder tipos: arrays numpy, tuplas e dicionários com
+# chaves não textuais (ex.: percentis 99.0) são marcados e restaurados na leitura
+def _encode(value):
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: _encode(item) for key, item in value.items()}
+        return {"__items__": [[_encode(key), _encode(item)] for key, item in value.items()]}
+    if isinstance(value, np.ndarray):
+        return {"__array__": value.tolist(), "dtype": value.dtype.str, "shape": list(value.shape)}
+    if isinstance(value, (list, tuple)):
+        items = [_encode(item) for item in value]
+        return {"__tuple__": items} if isinstance(value, tuple) else items
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _decode(value):
+    if "__array__" in value:
+        return np.array(value["__array__"], dtype=value["dtype"]).reshape(value["shape"])
+    if "__tuple__" in value:
+        return tuple(value["__tuple__"])
+    if "__items__" in value:
+        return {(tuple(key) if isinstance(key, list) else key): item for key, item in value["__items__"]}
+    return value
+
+def pack_results(results, wind_forces):
+    payload = json.dumps(_encode({"results": results, "wind_forces": wind_forces}), ensure_ascii=False)
+    return zlib.compress(payload.encode("utf-8"), 1)
+
+def unpack_results(blob):
+    payload = json.loads(zlib.decompress(blob).decode("utf-8"), object_hook=_decode)
+    return payload["results"], payload["wind_forces"]
+
+def _summary(results):
+    return {field: results.get(field) for field in summary_fields}
+
+# Campos planos ("data.length", "coefficients.cpi") para comparar revisões
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for key, item in value.items():
+            items.update(_flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    return {prefix: value}
+
+class ProjectStore:
+    def __init__(self, path=None):
+        self.path = path or default_store_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Uma conexão por instância, protegida por lock (a interface usa várias threads);
+        # WAL permite leituras durante a gravação de outro processo do lote
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA foreign_keys=ON")
+            # Bancos criados antes da coluna image_key
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(revisions)")]
+            if columns and "image_key" not in columns:
+                self.connection.execute("ALTER TABLE revisions ADD COLUMN image_key TEXT REFERENCES images (key)")
+            self.connection.executescript(schema)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    # Salva uma revisão do projeto (cliente, projeto) com a imagem do memorial, se houver. Se o
+    # projeto já tiver uma revisão com as mesmas entradas e a mesma imagem, nada é gravado e essa
+    # revisão é retornada (created=False).
+    def save(self, data, coefficients, project_info, results, wind_forces, municipality=None, pdf_key=None,
+             image_bytes=None):
+        with span("project_store.save") as trace:
+            key = inputs_key(data, coefficients, project_info)
+            image_key = hashlib.sha256(image_bytes).hexdigest() if image_bytes is not None else None
+            now = datetime.now().isoformat(timespec="seconds")
+            municipality = municipality if municipality is not None else project_info.get("location", "")
+            with self.lock, self.connection:
+                # Trava de escrita antes da leitura: processos do lote gravando no mesmo projeto
+                # não numeram duas revisões iguais
+                self.connection.execute("BEGIN IMMEDIATE")
+                project = self.connection.execute(
+                    "SELECT id, revisions FROM projects WHERE client = ? AND project = ?",
+                    (project_info["client"], project_info["project"]),
+                ).fetchone()
+                if project is not None:
+                    existing = self.connection.execute(
+                        "SELECT id, number, pdf_key FROM revisions WHERE project_id = ? AND inputs_key = ? "
+                        "AND image_key IS ? ORDER BY number DESC LIMIT 1",
+                        (project["id"], key, image_key),
+                    ).fetchone()
+                    if existing is not None:
+                        if pdf_key and pdf_key != existing["pdf_key"]:
+                            self.connection.execute("UPDATE revisions SET pdf_key = ? WHERE id = ?", (pdf_key, existing["id"]))
+                        trace.set(created=False)
+                        return {"project_id": project["id"], "revision_id": existing["id"], "number": existing["number"],
+                                "created": False}
+                    project_id, number = project["id"], project["revisions"] + 1
+                    self.connection.execute(
+                        "UPDATE projects SET municipality = ?, updated_at = ?, revisions = ? WHERE id = ?",
+                        (municipality, now, number, project_id),
+                    )
+                else:
+                    project_id = self.connection.execute(
+                        "INSERT INTO projects (client, project, municipality, created_at, updated_at, revisions) "
+                        "VALUES (?, ?, ?, ?, ?, 1)",
+                        (project_info["client"], project_info["project"], municipality, now, now),
+                    ).lastrowid
+                    number = 1
+                inputs = json.dumps({"data": data, "coefficients": coefficients, "project_info": project_info},
+                                    ensure_ascii=False, default=json_default)
+                summary = json.dumps(_summary(results), default=json_default)
+                if image_key is not None:
+                    self.connection.execute("INSERT OR IGNORE INTO images (key, data) VALUES (?, ?)",
+                                            (image_key, image_bytes))
+                revision_id = self.connection.execute(
+                    "INSERT INTO revisions (project_id, number, created_at, inputs_key, inputs, summary, results, "
+                    "pdf_key, image_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (project_id, number, now, key, inputs, summary, pack_results(results, wind_forces), pdf_key,
+                     image_key),
+                ).lastrowid
+            trace.set(created=True)
+            return {"project_id": project_id, "revision_id": revision_id, "number": number, "created": True}
+
+    def set_pdf(self, revision_id, pdf_key):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE revisions SET pdf_key = ? WHERE id = ?", (pdf_key, revision_id))
+
+    # Revisão completa (entradas, resultados e chave do PDF): pelo id da revisão ou, com
+    # project_id, a de número `number` (padrão: a última). None se não existir.
+    def open(self, revision_id=None, project_id=None, number=None):
+        with span("project_store.open"):
+            if revision_id is not None:
+                query, parameters = "SELECT * FROM revisions WHERE id = ?", (revision_id,)
+            elif number is not None:
+                query, parameters = "SELECT * FROM revisions WHERE project_id = ? AND number = ?", (project_id, number)
+            else:
+                query = "SELECT * FROM revisions WHERE project_id = ? ORDER BY number DESC LIMIT 1"
+                parameters = (project_id,)
+            with self.lock:
+                row = self.connection.execute(query, parameters).fetchone()
+            if row is None:
+                return None
+            return self._revision(row)
+
+    def _revision(self, row):
+        inputs = json.loads(row["inputs"])
+        results, wind_forces = unpack_results(row["results"])
+        return {
+            "id": row["id"],
+            "project_id": row["project_id"],
+            "number": row["number"],
+            "created_at": row["created_at"],
+            "inputs_key": row["inputs_key"],
+            "pdf_key": row["pdf_key"],
+            "image_key": row["image_key"],
+            "data": inputs["data"],
+            "coefficients": inputs["coefficients"],
+            "project_info": inputs["project_info"],
+            "results": results,
+            "wind_forces": wind_forces,
+        }
+
+    # Revisão já calculada com exatamente estas entradas (em qualquer projeto), ou None
+    def find(self, data, coefficients, project_info):
+        key = inputs_key(data, coefficients, project_info)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM revisions WHERE inputs_key = ? ORDER BY id DESC LIMIT 1", (key,)
+            ).fetchone()
+        return self._revision(row) if row is not None else None
+
+    # Lista de projetos, do mais recente para o mais antigo. client, project e municipality
+    # filtram por prefixo (sem diferenciar maiúsculas); since/until pela data da última revisão
+    # (AAAA-MM-DD). after é o cursor retornado pela página anterior. Retorna (linhas, cursor).
+    def list_projects(self, client=None, project=None, municipality=None, since=None, until=None,
+                      limit=50, after=None):
+        conditions, parameters = [], []
+        for column, value in (("client", client), ("project", project), ("municipality", municipality)):
+            if value:
+                conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+                parameters.append(_like_prefix(value))
+        if since:
+            conditions.append("updated_at >= ?")
+            parameters.append(str(since))
+        if until:
+            conditions.append("updated_at < ?")
+            parameters.append(f"{until}~")  # inclui o dia inteiro (~ vem depois de "T" e dos dígitos)
+        if after:
+            conditions.append("(updated_at, id) < (?, ?)")
+            parameters.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with span("project_store.list"), self.lock:
+            rows = self.connection.execute(
+                "SELECT id, client, project, municipality, created_at, updated_at, revisions FROM projects "
+                f"{where} ORDER BY updated_at DESC, id DESC LIMIT ?",
+                (*parameters, int(limit)),
+            ).fetchall()
+        rows = [dict(row) for row in rows]
+        cursor = (rows[-1]["updated_at"], rows[-1]["id"]) if len(rows) == int(limit) else None
+        return rows, cursor
+
+    # Revisões de um projeto (sem os resultados), da mais recente para a mais antiga
+    def revisions(self, project_id):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, number, created_at, inputs_key, pdf_key, image_key, summary FROM revisions "
+                "WHERE project_id = ? ORDER BY number DESC",
+                (project_id,),
+            ).fetchall()
+        return [dict(row, summary=json.loads(row["summary"])) for row in rows]
+
+    # Diferenças entre duas revisões de um projeto: entradas e resumo dos resultados, como
+    # linhas (campo, valor antigo, valor novo). Lê só as entradas e o resumo, não os resultados.
+    def diff(self, project_id, old_number, new_number):
+        with self.lock:
+            rows = {
+                row["number"]: row for row in self.connection.execute(
+                    "SELECT number, inputs, summary FROM revisions WHERE project_id = ? AND number IN (?, ?)",
+                    (project_id, old_number, new_number),
+                )
+            }
+        if old_number not in rows or new_number not in rows:
+            raise KeyError(f"Revisão não encontrada no projeto {project_id}: {old_number} ou {new_number}")
+        old, new = ({**_flatten(json.loads(rows[n]["inputs"])), **_flatten(json.loads(rows[n]["summary"]), "results")}
+                    for n in (old_number, new_number))
+        return [(field, old.get(field), new.get(field))
+                for field in sorted(old.keys() | new.keys()) if old.get(field) != new.get(field)]
+
+    # Imagem do memorial de uma revisão (bytes), ou None se a revisão não tiver imagem
+    def image(self, revision_id):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT images.data FROM revisions JOIN images ON images.key = revisions.image_key "
+                "WHERE revisions.id = ?",
+                (revision_id,),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    # Memorial de uma revisão sem recalcular: o PDF guardado no cache ou, se já removido,
+    # gerado de novo a partir dos resultados e da imagem salvos
+    def reissue(self, revision_id, cache=None, generated_at=None):
+        from pdf_cache import PdfCache
+
+        cache = cache or PdfCache()
+        revision = self.open(revision_id)
+        if revision is None:
+            raise KeyError(f"Revisão não encontrada: {revision_id}")
+        if revision["pdf_key"]:
+            pdf = cache.get(revision["pdf_key"])
+            if pdf is not None:
+                return pdf
+        from pdf_cache import pdf_cache_key
+
+        image_bytes = self.image(revision_id)
+        pdf = cache.get_or_render(revision["data"], revision["results"], revision["project_info"],
+                                  revision["wind_forces"], image_bytes, generated_at=generated_at)
+        self.set_pdf(revision_id, pdf_cache_key(revision["data"], revision["results"], revision["project_info"],
+                                                revision["wind_forces"], image_bytes))
+        return pdf
+
+def _like_prefix(value):
+    escaped = str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+# Banco compartilhado por processo (lote com vários processos: um por processo)
+@functools.lru_cache(maxsize=None)
+def open_store(path=None):
+    return ProjectStore(path)
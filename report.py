@@ -0,0 +1,537 @@
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from datetime import datetime
+
+import numpy as np
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+
+from calculation import calculate_friction, format_with_comma
+from presentation import (
+    combination_descriptions,
+    combination_rows,
+    convergence_rows,
+    dp_tables,
+    envelope_rows,
+    exceedance_rows,
+    force_tables,
+    percentile_label,
+    probabilistic_rows,
+    zoning_rows,
+)
+from report_image import prepare_image, read_image
+from report_theme import (
+    body_style,
+    data_table,
+    header_table,
+    heading_style,
+    key_value_table,
+    subheading_style,
+    table_title_style,
+)
+from serialization import json_default
+from tracing import count, enabled, span
+from velocity_chart import velocity_profile_drawing
+from wind_profile import wind_profile
+
+# Função para adicionar cabeçalho e rodapé
+def add_header_footer(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica-Bold", 12)
+    canvas.setFillColor(colors.darkblue)
+    canvas.drawString(2*cm, A4[1] - 1.5*cm, "Memorial de Cálculo - Ações do Vento (NBR 6123:2023)")
+    canvas.line(2*cm, A4[1] - 1.8*cm, A4[0] - 2*cm, A4[1] - 1.8*cm)
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColor(colors.grey)
+    page_num = canvas.getPageNumber()
+    generated_at = getattr(doc, "generated_at", None) or datetime.now()
+    footer_text = f"Página {page_num} | Data: {generated_at.strftime('%d/%m/%Y %H:%M')}"
+    canvas.drawString(2*cm, 1*cm, footer_text)
+    canvas.line(2*cm, 1.3*cm, A4[0] - 2*cm, 1.3*cm)
+    canvas.restoreState()
+
+# Seção 1: Informações do Projeto
+def project_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("1. Informações do Projeto", heading_style))
+    project_data = [
+        ["Cliente", project_info["client"]],
+        ["Obra", project_info["project"]],
+        ["Localização", project_info["location"]],
+        ["Cálculo", project_info["calculator"]]
+    ]
+    project_table = key_value_table(project_data, [5*cm, 10*cm])
+    story.append(project_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 2: Dados da Edificação
+def building_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("2. Dados da Edificação", heading_style))
+    building_data = [
+        ["Descrição", "Valor"],
+        ["Tipo de Cobertura", data['roof_type']],
+        ["Comprimento (l1)", f"{data['length']:.1f} m"],
+        ["Largura (l2)", f"{data['width']:.1f} m"],
+        ["Pé Direito", f"{data['height']:.1f} m"],
+        ["Inclinação da Cobertura", f"{data['slope']:.1f}%"],
+        ["Altura Média - Fechamento (h)", f"{data['z_fechamento']:.1f} m"],
+        ["Altura Média - Cobertura", f"{data['z_cobertura']:.1f} m"],
+    ]
+    building_table = header_table(building_data, [5*cm, 5*cm])
+    story.append(building_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 3: Parâmetros Meteorológicos
+def meteo_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("3. Parâmetros Meteorológicos", heading_style))
+    meteo_data = [
+        ["V0 (m/s)", f"{data['v0']:.1f} m/s"],
+        ["Categoria de Rugosidade", f"{data['category']}"],
+        ["Classe", data['class_']]
+    ]
+    meteo_table = key_value_table(meteo_data, [5*cm, 10*cm])
+    story.append(meteo_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 4: Fatores S1, S2, S3
+def factors_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("4. Fatores S1, S2, S3", heading_style))
+    factors_data = [
+        ["Fator Topográfico (S1)", f"{data['s1']}"],
+        ["Fator S2 - Fechamento", format_with_comma(results['s2_fechamento'])],
+        ["Fator S2 - Cobertura", format_with_comma(results['s2_cobertura'])],
+        ["Fator Estatístico (S3)", f"{data['s3']} (Tp: {data['s3_tp']} anos)"],
+        ["Parâmetro b", format_with_comma(results['b'])],
+        ["Parâmetro p", format_with_comma(results['p'])],
+        ["Parâmetro Fr", format_with_comma(results['fr'])]
+    ]
+    factors_table = key_value_table(factors_data, [5*cm, 5*cm])
+    story.append(factors_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 5: Velocidade Característica (Vk)
+def vk_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("5. Velocidade Característica (Vk)", heading_style))
+    vk_data = [
+        ["Fechamento", f"{format_with_comma(results['vk_fechamento'])} m/s"],
+        ["Cobertura", f"{format_with_comma(results['vk_cobertura'])} m/s"]
+    ]
+    vk_table = key_value_table(vk_data, [5*cm, 5*cm])
+    story.append(vk_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 6: Velocidades e Pressões Características
+def profile_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("6. Velocidades e Pressões Características", heading_style))
+    story.append(Paragraph("Tabela 1 – Velocidades e Pressões Características – NBR 6123:2023", table_title_style))
+    
+    # Até 75 m de 5 em 5 m; em edifícios mais altos, até o topo com cerca de 16 linhas
+    zoning = results.get('zoning')
+    z_limit = max(75, zoning['height']) if zoning else 75
+    z_step = 5 if z_limit <= 75 else 5 * np.ceil(z_limit / 75)
+    z_values = np.arange(0, z_limit + z_step, z_step)
+    vp_data = []
+    s1 = data['s1']
+    s3 = data['s3']
+    profile = wind_profile(z_values, data['v0'], s1, s3, data['category'], data['class_'])
+    
+    for z, s2, vk, q_nm2 in zip(z_values, profile['s2'], profile['vk'], profile['q_nm2']):
+        vp_data.append([
+            format_with_comma(z, 1),
+            format_with_comma(s1, 2),
+            format_with_comma(s2, 2),
+            format_with_comma(s3, 2),
+            format_with_comma(vk, 2),
+            format_with_comma(q_nm2 / 1000, 3)
+        ])
+    
+    vp_table = data_table(["z (m)", "S1", "S2", "S3", "Vk (m/s)", "q (kN/m²)"], vp_data, [2.5*cm] * 6)
+    story.append(vp_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 7: Pressão Dinâmica (q)
+def q_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("7. Pressão Dinâmica (q)", heading_style))
+    story.append(Paragraph("A pressão dinâmica é calculada pela fórmula: q = 0,613 * Vk²", body_style))
+    q_data = [
+        ["Fechamento", f"{format_with_comma(results['q_fechamento_nm2'])} N/m² ({format_with_comma(results['q_fechamento_kgfm2'])} kgf/m²)"],
+        ["Cobertura", f"{format_with_comma(results['q_cobertura_nm2'])} N/m² ({format_with_comma(results['q_cobertura_kgfm2'])} kgf/m²)"]
+    ]
+    q_table = key_value_table(q_data, [5*cm, 10*cm])
+    story.append(q_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 8: Coeficientes de Pressão Interna (Cpi)
+def cpi_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("8. Coeficientes de Pressão Interna (Cpi)", heading_style))
+    story.append(Paragraph(f"Caso Selecionado: {results['cpi_case_description']}", subheading_style))
+    cpi_data = [[f"Cpi: {format_with_comma(val)}"] for val in results['cpi']]
+    cpi_table = key_value_table(cpi_data, [5*cm], striped=False)
+    story.append(cpi_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 9: Pressão Efetiva (DP)
+def pressure_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("9. Pressão Efetiva (DP)", heading_style))
+    story.append(Paragraph("A pressão efetiva é calculada pela fórmula: DP = q * (Ce - Cpi)", body_style))
+    if results.get('ce_mode') == "auto":
+        story.append(Paragraph("Os coeficientes Ce foram obtidos das tabelas da NBR 6123 para edificações de planta "
+                               "retangular, em função das proporções h/b e a/b e da inclinação da cobertura.", body_style))
+    for direction, dp_data in dp_tables(results['pressures']).items():
+        story.append(Paragraph(direction, subheading_style))
+        dp_table = data_table(["Ce", "Cpi", "DP (kgf/m²)"], dp_data, [3*cm] * 3)
+        story.append(dp_table)
+        story.append(Spacer(1, 0.3*cm))
+    envelope_data = envelope_rows(results['envelope'])
+    if envelope_data:
+        story.append(Paragraph("Envoltória (valores extremos de DP)", subheading_style))
+        envelope_table = data_table(["Superfície", "Extremo", "Direção", "Ce", "Cpi", "DP (kgf/m²)"], envelope_data,
+                                    [2.6*cm, 2.4*cm, 2.4*cm, 2*cm, 2*cm, 2.6*cm])
+        story.append(envelope_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 10: Forças de Vento na Cobertura de Duas Águas
+def roof_force_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    if data['roof_type'] == "Duas Águas":
+        story.append(Paragraph("10. Forças de Vento na Cobertura de Duas Águas", heading_style))
+        story.append(Paragraph("As forças são calculadas pela fórmula: F = DP * A, onde A é a área de cada água.", body_style))
+        for direction, force_data in force_tables(results['pressures'], wind_forces).items():
+            story.append(Paragraph(direction, subheading_style))
+            force_table = data_table(["Ce", "Cpi", "DP (kgf/m²)", "Área (m²)", "F (kgf)"], force_data, [2.5*cm] * 5)
+            story.append(force_table)
+            story.append(Spacer(1, 0.3*cm))
+        story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 11: Metodologia de Cálculo
+def methodology_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("11. Metodologia de Cálculo", heading_style))
+    story.append(Paragraph("Velocidade Característica do Vento (Vk): Vk = V0 * S1 * S2 * S3", body_style))
+    story.append(Paragraph("Fator S2: S2 = b * (z/10)^p * Fr", body_style))
+    story.append(Paragraph("Pressão Dinâmica do Vento (q): q = 0,613 * Vk^2 (N/m²); q = (0,613 * Vk^2) / 9,81 (kgf/m²)", body_style))
+    story.append(Paragraph("Pressão Efetiva (DP): DP = (Ce - Cpi) * q", body_style))
+    if data['roof_type'] == "Duas Águas":
+        story.append(Paragraph("Força do Vento (F): F = DP * A", body_style))
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 12: Perfil de Velocidade do Vento
+def velocity_chart_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("12. Perfil de Velocidade do Vento em Função da Altura", heading_style))
+    z_max = max(data['z_fechamento'], data['z_cobertura']) * 1.5
+    story.append(velocity_profile_drawing(data['v0'], data['s1'], data['s3'], data['category'], data['class_'], z_max))
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 13: Imagem Inserida pelo Usuário
+def image_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    if uploaded_image is not None:
+        story.append(Paragraph("13. Imagem Inserida pelo Usuário", heading_style))
+        image_bytes = read_image(uploaded_image)
+        image_data, image_width, image_height = prepare_image(image_bytes)
+        count("image_bytes_in", len(image_bytes))
+        count("image_bytes_out", len(image_data))
+        story.append(Image(BytesIO(image_data), width=image_width, height=image_height))
+        story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 14: Força de Atrito Longitudinal (0° / 180°)
+def friction_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    story.append(Paragraph("14. Força de Atrito Longitudinal (0° / 180°)", heading_style))
+    story.append(Paragraph("Esta seção verifica a força de atrito longitudinal conforme a NBR 6123:2023.", body_style))
+    
+    # Subseção: Verificação Inicial
+    story.append(Paragraph("Verificação Inicial", subheading_style))
+    story.append(Paragraph("Primeiro, verificamos as dimensões da edificação. Calculamos l2 dividido por h e l2 dividido por l1. O cálculo da força F' é necessário somente se l2 dividido por h for maior que 4 ou se l2 dividido por l1 for maior que 4.", body_style))
+    
+    # Usar valores calculados em calculation.calculate_friction
+    friction = results.get('friction') or calculate_friction(data, results)
+    l1 = friction['l1']  # Comprimento
+    l2 = friction['l2']  # Largura
+    h = friction['h']  # Altura Média - Fechamento
+    Cfr = friction['Cfr']  # Valor fixo conforme NBR 6123
+    q_cob = friction['q_cob']  # Pressão dinâmica da cobertura
+    q_fec = friction['q_fec']  # Pressão dinâmica do fechamento
+    l2_h_ratio = friction['l2_h_ratio']
+    l2_l1_ratio = friction['l2_l1_ratio']
+    condition_met = friction['condition_met']
+    F_cob = friction['F_cob']
+    F_fec = friction['F_fec']
+    F_prime = friction['F_prime']
+    
+    if condition_met:
+        # Subseção: Cálculo da Força
+        story.append(Paragraph("Cálculo da Força", subheading_style))
+        story.append(Paragraph("A condição foi atendida. Agora, calculamos a força F'. Ela é composta por duas partes: F' cob (para a cobertura) e F' fec (para o fechamento).", body_style))
+        
+        if h <= l1:
+            story.append(Paragraph("Como h é menor ou igual a l1, usamos as seguintes fórmulas:", body_style))
+            story.append(Paragraph("F' cob = Cfr vezes q cob vezes l1 vezes (l2 menos 4 vezes h).", body_style))
+            story.append(Paragraph("F' fec = Cfr vezes q fec vezes 2 vezes h vezes (l2 menos 4 vezes h).", body_style))
+        else:
+            story.append(Paragraph("Como h é maior que l1, usamos as seguintes fórmulas:", body_style))
+            story.append(Paragraph("F' cob = Cfr vezes q cob vezes l1 vezes (l2 menos 4 vezes h).", body_style))
+            story.append(Paragraph("F' fec = Cfr vezes q fec vezes 2 vezes h vezes (l2 menos 4 vezes l1).", body_style))
+        
+        story.append(Paragraph("A força total F' é a soma de F' cob e F' fec.", body_style))
+    else:
+        story.append(Paragraph("Resultado", subheading_style))
+        story.append(Paragraph("A condição não foi atendida. l2 dividido por h é menor ou igual a 4 e l2 dividido por l1 também é menor ou igual a 4. Portanto, o cálculo da força F' não é necessário.", body_style))
+    
+    # Subseção: Resultados na Tabela
+    story.append(Paragraph("Resultados", subheading_style))
+    friction_data = [
+        ["Parâmetro", "Valor"],
+        ["Comprimento (l1)", f"{format_with_comma(l1)} m"],
+        ["Largura (l2)", f"{format_with_comma(l2)} m"],
+        ["Altura Média (h)", f"{format_with_comma(h)} m"],
+        ["l2 dividido por h", f"{format_with_comma(l2_h_ratio)}"],
+        ["l2 dividido por l1", f"{format_with_comma(l2_l1_ratio)}"],
+        ["Fator Cfr", f"{format_with_comma(Cfr)}"],
+        ["Pressão q cob", f"{format_with_comma(q_cob)} kgf/m²"],
+        ["Pressão q fec", f"{format_with_comma(q_fec)} kgf/m²"],
+        ["Força F' cob", f"{format_with_comma(F_cob)} kgf" if F_cob != "Não Aplicável" else F_cob],
+        ["Força F' fec", f"{format_with_comma(F_fec)} kgf" if F_fec != "Não Aplicável" else F_fec],
+        ["Força Total F'", f"{format_with_comma(F_prime)} kgf" if F_prime != "Não Aplicável" else F_prime],
+    ]
+    
+    friction_table = key_value_table(friction_data, [5*cm, 5*cm])
+    story.append(friction_table)
+    story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 15: Zoneamento Vertical (modo edifício alto)
+def zoning_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    zoning = results.get('zoning')
+    if zoning:
+        story.append(Paragraph("15. Zoneamento Vertical - Edifício Alto", heading_style))
+        story.append(Paragraph(
+            "A fachada é dividida em zonas de altura nas quais a pressão dinâmica varia no máximo "
+            f"{format_with_comma(zoning['tolerance'] * 100, 1)}%. Em cada zona, S2 e q são calculados no topo da zona. "
+            "A força em cada pavimento é F = Ca * q * b * h, com Ca = Ce (barlavento) - Ce (sotavento) e b a largura da fachada. "
+            "As cortantes e os momentos de tombamento são obtidos pela soma das forças acima de cada cota.",
+            body_style
+        ))
+        summary_data = [
+            ["Número de Pavimentos", str(zoning['storeys'])],
+            ["Altura Total", f"{format_with_comma(zoning['height'])} m"],
+            ["Número de Zonas", str(len(zoning['zones']['storeys']))],
+        ]
+        for i, direction in enumerate(zoning['directions']):
+            summary_data += [
+                [f"Ca / b ({direction})", f"{format_with_comma(zoning['force_coefficient'][i])} / {format_with_comma(zoning['breadth'][i])} m"],
+                [f"Cortante na Base ({direction})", f"{format_with_comma(zoning['base_shear'][i])} kgf"],
+                [f"Momento na Base ({direction})", f"{format_with_comma(zoning['base_moment'][i])} kgf.m"],
+            ]
+        story.append(key_value_table(summary_data, [6*cm, 6*cm]))
+        story.append(Spacer(1, 0.3*cm))
+        story.append(Paragraph("Tabela 2 – Zonas de Altura (cortante e momento na base de cada zona)", table_title_style))
+        header = ["Zona", "Cotas (m)", "Pav.", "S2", "q (kgf/m²)"]
+        header += [f"V {direction.split('/')[0]} (kgf)" for direction in zoning['directions']]
+        header += [f"M {direction.split('/')[0]} (kgf.m)" for direction in zoning['directions']]
+        story.append(data_table(header, zoning_rows(zoning), [1*cm, 2.6*cm, 1*cm, 1.3*cm, 1.7*cm, 2.1*cm, 2.1*cm, 2.6*cm, 2.6*cm]))
+        story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 16: Análise Probabilística (Monte Carlo)
+def probabilistic_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    summary = results.get('probabilistic')
+    if summary:
+        model = summary['model']
+        categories = ", ".join(
+            f"{category}: {format_with_comma(probability * 100, 0)}%"
+            for category, probability in model['category_probabilities'].items() if probability
+        )
+        samples = f"{summary['samples']:,}".replace(",", ".")
+        story.append(Paragraph("16. Análise Probabilística (Monte Carlo)", heading_style))
+        story.append(Paragraph(
+            f"Foram avaliadas {samples} amostras (semente {summary['seed']}) da cadeia S2 → Vk → q → DP. "
+            f"V0 segue uma distribuição de Gumbel com média {format_with_comma(model['v0_mean'], 1)} m/s e coeficiente de "
+            f"variação de {format_with_comma(model['v0_cov'] * 100, 0)}%; a categoria de rugosidade é sorteada ({categories}); "
+            f"o fator de exposição é lognormal com média 1 e coeficiente de variação de {format_with_comma(model['exposure_cov'] * 100, 0)}%. "
+            "S1, S3, a classe, as alturas e os coeficientes Ce e Cpi são mantidos fixos.",
+            body_style
+        ))
+        story.append(Paragraph("Tabela 3 – Percentis de q e DP (kgf/m²)", table_title_style))
+        header = ["Grandeza", "Determ.", "Média", "Desvio"] + [percentile_label(p) for p in summary['percentiles']]
+        widths = [3.6*cm] + [13.4*cm / (len(header) - 1)] * (len(header) - 1)
+        story.append(data_table(header, probabilistic_rows(summary), widths))
+        story.append(Spacer(1, 0.3*cm))
+        story.append(Paragraph("Probabilidade de excedência de q", subheading_style))
+        story.append(data_table(["Superfície", "q limite (kgf/m²)", "P(q > limite)", "IC 95%"], exceedance_rows(summary),
+                                [3*cm, 5*cm, 3*cm, 5*cm]))
+        story.append(Spacer(1, 0.3*cm))
+        top = percentile_label(summary['percentiles'][-1])
+        story.append(Paragraph("Diagnóstico de convergência", subheading_style))
+        story.append(Paragraph(
+            f"Erros padrão estimados pela dispersão entre os {summary['chunks']} lotes de amostras. "
+            f"A análise é considerada convergida quando o erro padrão relativo do {top} é inferior a "
+            f"{format_with_comma(summary['tolerance'] * 100, 1)}%.",
+            body_style
+        ))
+        story.append(data_table(["Superfície", "EP média", f"EP {top}", f"EP relativo {top}", "Convergiu"],
+                                convergence_rows(summary), [3*cm, 3*cm, 3*cm, 4*cm, 3*cm]))
+        story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seção 17: Combinações de Ações (somente quando G ou Q da cobertura são informados)
+def combination_section(data, results, project_info, wind_forces, uploaded_image):
+    story = []
+    combinations = results.get('combinations')
+    if combinations:
+        factors = combinations['factors']
+        story.append(Paragraph("17. Combinações de Ações e Envoltórias", heading_style))
+        story.append(Paragraph(
+            f"Combinações normais da NBR 8681 do vento (W) com a carga permanente da cobertura "
+            f"G = {format_with_comma(combinations['permanent_load'])} kgf/m² e a sobrecarga "
+            f"Q = {format_with_comma(combinations['live_load'])} kgf/m², aplicadas na direção normal ao telhado "
+            f"(G por área de telhado, Q por área em projeção). Coeficientes: γg = {format_with_comma(factors['gamma_g'])} "
+            f"(favorável {format_with_comma(factors['gamma_g_favorable'])}), γq = {format_with_comma(factors['gamma_q'])}, "
+            f"γw = {format_with_comma(factors['gamma_w'])}; ψ0 = {format_with_comma(factors['psi0_q'])} (Q) e "
+            f"{format_with_comma(factors['psi0_w'])} (W); ψ1 = {format_with_comma(factors['psi1_q'])} (Q) e "
+            f"{format_with_comma(factors['psi1_w'])} (W); ψ2 = {format_with_comma(factors['psi2_q'])} (Q) e "
+            f"{format_with_comma(factors['psi2_w'])} (W).",
+            body_style
+        ))
+        story.append(data_table(["Combinação", "Estado", "Fórmula"], combination_descriptions(combinations),
+                                [3*cm, 2.5*cm, 8*cm]))
+        story.append(Spacer(1, 0.3*cm))
+        story.append(Paragraph(
+            f"Dos {combinations['cases']} casos de vento, {combinations['candidates']} são extremos de alguma "
+            "superfície ou barra; os demais são dominados e foram descartados. Abaixo, apenas os casos que governam. "
+            "Valores positivos são sobrepressão (para dentro da superfície) e negativos, sucção.",
+            body_style
+        ))
+        header = ["Estado", "Superfície", "Extremo", "Valor", "Comb.", "Caso de vento", "Local"]
+        widths = [1.4*cm, 2.5*cm, 1.7*cm, 1.8*cm, 1.4*cm, 5.8*cm, 2.4*cm]
+        story.append(Paragraph("Envoltória por superfície (kgf/m²)", subheading_style))
+        story.append(data_table(header, combination_rows(combinations, "surfaces"), widths))
+        if combinations['members']:
+            story.append(Spacer(1, 0.3*cm))
+            story.append(Paragraph("Envoltória por barra dos pórticos (kgf/m)", subheading_style))
+            story.append(data_table(["Estado", "Barra"] + header[2:], combination_rows(combinations, "members"), widths))
+        story.append(Spacer(1, 0.5*cm))
+    return story
+
+# Seções do memorial na ordem de impressão, com os campos de cada origem que a seção lê
+# (None: a origem inteira). A seção montada fica em cache pelo conteúdo desses campos, de modo
+# que uma revisão remonta só as seções afetadas (ex.: trocar o cliente remonta só a Seção 1).
+# A Seção 13 não entra no cache: o Image lê do próprio buffer, e prepare_image já guarda a
+# imagem processada.
+report_sections = (
+    (project_section, {"project_info": ("client", "project", "location", "calculator")}),
+    (building_section, {"data": ("roof_type", "length", "width", "height", "slope", "z_fechamento", "z_cobertura")}),
+    (meteo_section, {"data": ("v0", "category", "class_")}),
+    (factors_section, {"data": ("s1", "s3", "s3_tp"), "results": ("s2_fechamento", "s2_cobertura", "b", "p", "fr")}),
+    (vk_section, {"results": ("vk_fechamento", "vk_cobertura")}),
+    (profile_section, {"data": ("v0", "s1", "s3", "category", "class_"), "results": ("zoning",)}),
+    (q_section, {"results": ("q_fechamento_nm2", "q_fechamento_kgfm2", "q_cobertura_nm2", "q_cobertura_kgfm2")}),
+    (cpi_section, {"results": ("cpi_case_description", "cpi")}),
+    (pressure_section, {"results": ("ce_mode", "pressures", "envelope")}),
+    (roof_force_section, {"data": ("roof_type",), "results": ("pressures",), "wind_forces": None}),
+    (methodology_section, {"data": ("roof_type",)}),
+    (velocity_chart_section, {"data": ("v0", "s1", "s3", "category", "class_", "z_fechamento", "z_cobertura")}),
+    (image_section, None),
+    (friction_section, {"data": ("length", "width", "z_fechamento"),
+                        "results": ("friction", "q_cobertura_kgfm2", "q_fechamento_kgfm2")}),
+    (zoning_section, {"results": ("zoning",)}),
+    (probabilistic_section, {"results": ("probabilistic",)}),
+    (combination_section, {"results": ("combinations",)}),
+)
+
+# Seções já montadas (LRU), pela chave de conteúdo
+_section_cache = OrderedDict()
+_section_cache_lock = threading.Lock()
+_section_cache_size = 256
+
+def _section_key(section, fields, sources):
+    selected = {}
+    for source, names in fields.items():
+        value = sources[source]
+        selected[source] = value if names is None else {name: value.get(name) for name in names}
+    payload = json.dumps(selected, sort_keys=True, ensure_ascii=False, default=json_default)
+    return section.__name__, hashlib.sha256(payload.encode("utf-8")).digest()
+
+# Flowables de uma seção; cada documento recebe cópias, pois o ReportLab guarda o
+# resultado da diagramação nos próprios flowables
+def build_section(section, fields, data, results, project_info, wind_forces, uploaded_image=None):
+    with span(f"report.{section.__name__}") as trace:
+        story = _build_section(section, fields, data, results, project_info, wind_forces, uploaded_image, trace)
+        if enabled():
+            trace.count("flowables", len(story))
+            trace.count("table_rows", sum(flowable._nrows for flowable in story if isinstance(flowable, Table)))
+    return story
+
+def _build_section(section, fields, data, results, project_info, wind_forces, uploaded_image, trace):
+    if fields is None:
+        return section(data, results, project_info, wind_forces, uploaded_image)
+    sources = {"data": data, "results": results, "project_info": project_info, "wind_forces": wind_forces}
+    key = _section_key(section, fields, sources)
+    with _section_cache_lock:
+        story = _section_cache.get(key)
+        if story is not None:
+            _section_cache.move_to_end(key)
+    trace.set(cached=story is not None)
+    if story is None:
+        story = section(data, results, project_info, wind_forces, uploaded_image)
+        with _section_cache_lock:
+            _section_cache[key] = story
+            while len(_section_cache) > _section_cache_size:
+                _section_cache.popitem(last=False)
+    return [copy.copy(flowable) for flowable in story]
+
+# Função para gerar o PDF
+# generated_at fixa a data do rodapé; com ela o PDF é reprodutível byte a byte (invariant)
+def generate_pdf(data, results, project_info, wind_forces, uploaded_image=None, generated_at=None):
+    with span("report.generate_pdf"):
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=2*cm,
+            leftMargin=2*cm,
+            topMargin=3*cm,
+            bottomMargin=2*cm,
+            invariant=generated_at is not None
+        )
+        doc.generated_at = generated_at or datetime.now()
+        story = []
+        for section, fields in report_sections:
+            story += build_section(section, fields, data, results, project_info, wind_forces, uploaded_image)
+
+        with span("report.doc_build") as trace:
+            doc.build(story, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
+            trace.count("pages", doc.page)
+            trace.count("pdf_bytes", buffer.tell())
+        buffer.seek(0)
+        return buffer
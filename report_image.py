@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from reportlab.lib.units import cm, inch
+
+from tracing import timed
+
+# Resolução de impressão da imagem no memorial
+PRINT_DPI = 200
+
+# Área máxima da imagem na página (a proporção original é mantida)
+MAX_WIDTH = 12*cm
+MAX_HEIGHT = 8*cm
+
+# Qualidade JPEG para fotografias
+JPEG_QUALITY = 85
+
+# Imagens com até esta quantidade de cores (desenhos, capturas de tela) ficam em PNG
+PNG_MAX_COLORS = 256
+
+# Imagens já processadas, pelo hash do conteúdo (LRU)
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_size = 32
+
+# Função para preparar a imagem enviada para o PDF: corrige a orientação (EXIF), reduz à
+# resolução de impressão dentro da área máxima e escolhe o formato: PNG para transparência
+# e imagens com poucas cores, JPEG para fotografias.
+# Retorna (bytes, largura, altura) com as dimensões em pontos.
+def prepare_image(image_bytes, max_width=MAX_WIDTH, max_height=MAX_HEIGHT, dpi=PRINT_DPI):
+    key = (hashlib.sha256(image_bytes).digest(), max_width, max_height, dpi)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    prepared = _process(image_bytes, max_width, max_height, dpi)
+    with _cache_lock:
+        _cache[key] = prepared
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    return prepared
+
+# Só executa quando a imagem não está no cache: o span aparece apenas nas falhas do cache
+@timed("report.image_process")
+def _process(image_bytes, max_width, max_height, dpi):
+    # Pillow só é carregado quando há imagem no relatório
+    from PIL import Image, ImageOps
+
+    image = Image.open(BytesIO(image_bytes))
+    image = ImageOps.exif_transpose(image)
+
+    scale = min(max_width / image.width, max_height / image.height)
+    width, height = image.width * scale, image.height * scale
+    pixels = (max(1, round(width / inch * dpi)), max(1, round(height / inch * dpi)))
+    if pixels[0] < image.width:
+        image = image.resize(pixels, Image.LANCZOS, reducing_gap=3.0)
+
+    buffer = BytesIO()
+    transparent = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    if transparent or image.mode in ("1", "P") or image.getcolors(PNG_MAX_COLORS) is not None:
+        if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+            image = image.convert("RGBA" if transparent else "RGB")
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue(), width, height
+
+# Bytes de uma imagem recebida como caminho, arquivo aberto ou bytes
+def read_image(uploaded_image):
+    if isinstance(uploaded_image, (bytes, bytearray)):
+        return bytes(uploaded_image)
+    if hasattr(uploaded_image, "read"):
+        if hasattr(uploaded_image, "seek"):
+            uploaded_image.seek(0)
+        return uploaded_image.read()
+    with open(uploaded_image, "rb") as f:
+        return f.read()
@@ -0,0 +1,89 @@
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Table, TableStyle
+
+# Estilos de parágrafo do memorial, criados uma única vez e compartilhados entre relatórios
+heading_style = ParagraphStyle(
+    name='Heading',
+    fontName='Helvetica-Bold',
+    fontSize=16,
+    textColor=colors.darkblue,
+    spaceAfter=12,
+    leading=18
+)
+subheading_style = ParagraphStyle(
+    name='Subheading',
+    fontName='Helvetica-Bold',
+    fontSize=12,
+    textColor=colors.darkslategray,
+    spaceAfter=10
+)
+body_style = ParagraphStyle(
+    name='Body',
+    fontName='Helvetica',
+    fontSize=10,
+    textColor=colors.black,
+    spaceAfter=8
+)
+table_title_style = ParagraphStyle(
+    name='TableTitle',
+    fontName='Helvetica-Oblique',
+    fontSize=10,
+    textColor=colors.darkblue,
+    spaceAfter=6
+)
+
+# Comandos comuns às tabelas de texto (fonte 10, com espaçamento lateral)
+_text_table_commands = [
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+    ('FONTSIZE', (0,0), (-1,-1), 10),
+    ('LEFTPADDING', (0,0), (-1,-1), 5),
+    ('RIGHTPADDING', (0,0), (-1,-1), 5),
+    ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+]
+
+# Tabela parâmetro/valor: primeira coluna destacada, linhas alternadas
+key_value_style = TableStyle(_text_table_commands + [
+    ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
+    ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.whitesmoke]),
+])
+
+# Tabela parâmetro/valor sem linhas alternadas
+plain_key_value_style = TableStyle(_text_table_commands + [
+    ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
+])
+
+# Tabela com cabeçalho na primeira linha
+header_style = TableStyle(_text_table_commands + [
+    ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+    ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
+])
+
+# Tabela numérica compacta (fonte 8, centralizada) com cabeçalho azul
+data_style = TableStyle([
+    ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+    ('FONTSIZE', (0,0), (-1,-1), 8),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    ('BACKGROUND', (0,0), (-1,0), colors.lightblue),
+    ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
+    ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
+])
+
+# Fábrica de tabelas usada pelas seções do memorial
+def key_value_table(rows, col_widths, striped=True):
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(key_value_style if striped else plain_key_value_style)
+    return table
+
+def header_table(rows, col_widths):
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(header_style)
+    return table
+
+def data_table(header, rows, col_widths):
+    table = Table([header] + rows, colWidths=col_widths)
+    table.setStyle(data_style)
+    return table
@@ -0,0 +1,289 @@
+import json
+import math
+import os
+from dataclasses import asdict, dataclass, field, fields
+
+import numpy as np
+
+from frame_loads import frame_load_columns, frame_loads as calculate_frame_loads
+
+# Esquema tipado dos resultados de uma edificação, para exportação (JSON, Parquet, XLSX).
+# Os valores são numéricos, sem formatação; forças não aplicáveis ficam como None.
+
+@dataclass
+class Inputs:
+    roof_type: str
+    length: float
+    width: float
+    height: float
+    slope: float
+    z_fechamento: float
+    z_cobertura: float
+    portico_distance: float
+    v0: float
+    category: str
+    class_: str
+    s1: float
+    s3: float
+    cpi_case: str
+
+@dataclass
+class SurfaceWind:
+    z: float
+    s2: float
+    vk: float
+    q_nm2: float
+    q_kgfm2: float
+
+@dataclass
+class PressureCase:
+    direction: str
+    ce: float
+    cpi: float
+    q_kgfm2: float
+    dp_kgfm2: float
+
+@dataclass
+class RoofForce:
+    direction: str
+    ce: float
+    cpi: float
+    dp_kgfm2: float
+    area_m2: float
+    force_kgf: float
+
+@dataclass
+class Friction:
+    l1: float
+    l2: float
+    h: float
+    cfr: float
+    condition_met: bool
+    F_cob: float = None
+    F_fec: float = None
+    F_prime: float = None
+
+# Cargas distribuídas (kgf/m) de um caso nos pórticos com a mesma largura de influência
+@dataclass
+class FrameLoad:
+    frames: str
+    tributary_width: float
+    case: str
+    direction: str
+    ce: float
+    cpi: float
+    left_column: float
+    left_rafter: float = None
+    right_rafter: float = None
+    right_column: float = None
+
+@dataclass
+class BuildingResult:
+    id: str
+    inputs: Inputs
+    b: float
+    p: float
+    fr: float
+    fechamento: SurfaceWind
+    cobertura: SurfaceWind
+    friction: Friction
+    area_per_water: float = None
+    pressures: list = field(default_factory=list)  # PressureCase
+    roof_forces: list = field(default_factory=list)  # RoofForce
+    frame_loads: list = field(default_factory=list)  # FrameLoad
+
+    # Monta o resultado a partir da saída de calculation.calculate_results
+    @classmethod
+    def from_calculation(cls, building_id, data, coefficients, results, wind_forces):
+        inputs = Inputs(**{f.name: _value(data.get(f.name, coefficients.get(f.name))) for f in fields(Inputs)})
+        surfaces = {
+            surface: SurfaceWind(
+                z=float(data[f"z_{surface}"]),
+                s2=results[f"s2_{surface}"],
+                vk=results[f"vk_{surface}"],
+                q_nm2=results[f"q_{surface}_nm2"],
+                q_kgfm2=results[f"q_{surface}_kgfm2"],
+            )
+            for surface in ("fechamento", "cobertura")
+        }
+
+        pressures_data = results["pressures"]
+        pressures = []
+        for i, direction in enumerate(pressures_data["directions"]):
+            for j, ce in enumerate(pressures_data["ce"][i]):
+                if np.isnan(ce):
+                    continue
+                for k, cpi in enumerate(pressures_data["cpi"]):
+                    pressures.append(PressureCase(
+                        direction, float(ce), float(cpi),
+                        float(pressures_data["q"][i]), float(pressures_data["dp"][i, j, k]),
+                    ))
+
+        roof_forces = []
+        for i, direction in enumerate(wind_forces["directions"]):
+            ce_values = pressures_data["ce"][pressures_data["directions"].index(direction)]
+            for j, ce in enumerate(ce_values):
+                if np.isnan(ce):
+                    continue
+                for k, cpi in enumerate(pressures_data["cpi"]):
+                    roof_forces.append(RoofForce(
+                        direction, float(ce), float(cpi), float(wind_forces["dp"][i, j, k]),
+                        float(wind_forces["area_per_water"]), float(wind_forces["force"][i, j, k]),
+                    ))
+
+        loads = frame_load_columns(
+            calculate_frame_loads(data["length"], data["width"], data["height"], data.get("portico_distance"),
+                                  pressures_data),
+            grouped=True,
+        )
+        frame_rows = [
+            FrameLoad(*(None if isinstance(v, float) and math.isnan(v) else v for v in row))
+            for row in zip(*(values.tolist() for values in loads.values()))
+        ]
+
+        friction = results["friction"]
+        return cls(
+            id=str(building_id),
+            inputs=inputs,
+            b=results["b"],
+            p=results["p"],
+            fr=results["fr"],
+            fechamento=surfaces["fechamento"],
+            cobertura=surfaces["cobertura"],
+            friction=Friction(
+                l1=float(friction["l1"]),
+                l2=float(friction["l2"]),
+                h=float(friction["h"]),
+                cfr=float(friction["Cfr"]),
+                condition_met=bool(friction["condition_met"]),
+                F_cob=_force(friction["F_cob"]),
+                F_fec=_force(friction["F_fec"]),
+                F_prime=_force(friction["F_prime"]),
+            ),
+            area_per_water=results["area_per_water"],
+            pressures=pressures,
+            roof_forces=roof_forces,
+            frame_loads=frame_rows,
+        )
+
+    def to_dict(self):
+        return asdict(self)
+
+    # Linha plana da tabela de edificações (uma coluna por grandeza escalar).
+    # vars() em vez de asdict(): os campos aninhados são escalares e não precisam de cópia profunda.
+    def summary_row(self):
+        row = {"id": self.id}
+        row.update(vars(self.inputs))
+        row.update({"b": self.b, "p": self.p, "fr": self.fr})
+        for surface in ("fechamento", "cobertura"):
+            for name, value in vars(getattr(self, surface)).items():
+                row[f"{name}_{surface}"] = value
+        row["area_per_water"] = self.area_per_water
+        for name, value in vars(self.friction).items():
+            row[f"friction_{name}"] = value
+        return row
+
+# Converte escalares numpy em tipos do Python
+def _value(value):
+    return value.item() if hasattr(value, "item") else value
+
+# "Não Aplicável" (texto do memorial) vira None
+def _force(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+# Tabelas colunares dos resultados: edificações, pressões (id, direção, Ce, Cpi), forças na cobertura
+# e cargas nos pórticos
+def result_tables(building_results):
+    tables = {"buildings": {}, "pressures": {}, "roof_forces": {}, "frame_loads": {}}
+    buildings = [result.summary_row() for result in building_results]
+    if buildings:
+        tables["buildings"] = {name: [row[name] for row in buildings] for name in buildings[0]}
+    for table, item_type, attribute in (
+        ("pressures", PressureCase, "pressures"),
+        ("roof_forces", RoofForce, "roof_forces"),
+        ("frame_loads", FrameLoad, "frame_loads"),
+    ):
+        columns = {"id": []}
+        columns.update({f.name: [] for f in fields(item_type)})
+        for result in building_results:
+            items = getattr(result, attribute)
+            columns["id"].extend([result.id] * len(items))
+            for f in fields(item_type):
+                columns[f.name].extend(getattr(item, f.name) for item in items)
+        tables[table] = columns
+    return tables
+
+# JSON (lista de edificações) ou JSON Lines (uma edificação por linha, para lotes grandes).
+# NaN e infinitos viram null.
+def write_json(building_results, target, lines=False):
+    def dump(result):
+        return json.dumps(_finite(result.to_dict()), ensure_ascii=False)
+
+    def write(f):
+        if lines:
+            for result in building_results:
+                f.write(dump(result) + "\n")
+        else:
+            f.write("[\n" + ",\n".join(dump(result) for result in building_results) + "\n]\n")
+
+    if hasattr(target, "write"):
+        write(target)
+    else:
+        with open(target, "w", encoding="utf-8") as f:
+            write(f)
+
+def _finite(value):
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_finite(v) for v in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+# Parquet: uma tabela por arquivo (buildings.parquet, pressures.parquet, roof_forces.parquet, frame_loads.parquet)
+def write_parquet(building_results, directory):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("A exportação em Parquet requer o pacote pyarrow (pip install pyarrow)")
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, columns in result_tables(building_results).items():
+        path = os.path.join(directory, f"{name}.parquet")
+        pq.write_table(pa.table(columns), path)
+        paths.append(path)
+    return paths
+
+# Planilha XLSX com uma aba por tabela (gravação em modo streaming do openpyxl)
+def write_xlsx(building_results, target):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("A exportação em XLSX requer o pacote openpyxl (pip install openpyxl)")
+
+    sheet_names = {"buildings": "Edificações", "pressures": "Pressões", "roof_forces": "Forças Cobertura",
+                   "frame_loads": "Cargas Pórticos"}
+    workbook = Workbook(write_only=True)
+    for name, columns in result_tables(building_results).items():
+        sheet = workbook.create_sheet(sheet_names[name])
+        sheet.append(list(columns))
+        for row in zip(*columns.values()):
+            sheet.append([None if isinstance(v, float) and not math.isfinite(v) else v for v in row])
+    workbook.save(target)
+
+# Exporta pela extensão: .json, .jsonl, .xlsx ou .parquet (pasta)
+def export_results(building_results, path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        write_json(building_results, path)
+    elif extension == ".jsonl":
+        write_json(building_results, path, lines=True)
+    elif extension == ".xlsx":
+        write_xlsx(building_results, path)
+    elif extension == ".parquet":
+        write_parquet(building_results, path)
+    else:
+        raise ValueError(f"Formato de exportação não suportado: {path} (use .json, .jsonl, .xlsx ou .parquet)")
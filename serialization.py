@@ -0,0 +1,7 @@
+# Conversão para JSON dos valores do cálculo que o módulo json não serializa, usada nas chaves
+# de cache e nos registros salvos: json.dumps(valor, default=json_default).
+# Arrays numpy entram pelo conteúdo completo (str() abreviaria arrays grandes); o resto, por str().
+def json_default(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
@@ -0,0 +1,411 @@
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from io import BytesIO
+
+from batch import ZipExport, build_inputs, failed_summary, process_building, with_probabilistic
+from calculation import calculate_results
+from parallel import _warm_up, default_workers
+
+# Tamanho dos blocos da resposta em PDF (streaming)
+PDF_CHUNK_SIZE = 64 * 1024
+
+# Limite do corpo das requisições (JSON com imagem em base64)
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+# Converte resultados (dicionários com arrays numpy) em JSON; NaN vira null
+def to_jsonable(value):
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if hasattr(value, "tolist"):
+        return to_jsonable(value.tolist())
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+# Entradas de uma requisição: os mesmos campos de uma linha do manifesto do lote,
+# mais a imagem opcional em base64 ("image_base64")
+def parse_request(body):
+    try:
+        row = json.loads(body or b"{}")
+    except ValueError as exc:
+        raise ValueError(f"JSON inválido: {exc}")
+    if not isinstance(row, dict):
+        raise ValueError("O corpo da requisição deve ser um objeto JSON")
+    image_bytes = None
+    if row.get("image_base64"):
+        try:
+            image_bytes = base64.b64decode(row.pop("image_base64"), validate=True)
+        except (binascii.Error, ValueError):
+            raise ValueError("image_base64 inválido")
+    row.pop("image", None)  # caminhos de arquivo só são aceitos no lote
+    data, project_info, coefficients = build_inputs(row)
+    return data, project_info, coefficients, image_bytes
+
+# Resultados como no lote e na linha de comando (com a análise probabilística, se pedida)
+def calculate(data, coefficients):
+    results, wind_forces = calculate_results(data, coefficients)
+    return with_probabilistic(data, coefficients, results), wind_forces
+
+# Função executada nos processos do pool: cálculo + memorial em PDF
+def render_pdf(data, project_info, coefficients, image_bytes=None, cache_dir=None):
+    results, wind_forces = calculate(data, coefficients)
+    if cache_dir:
+        from pdf_cache import PdfCache
+
+        return PdfCache(cache_dir).get_or_render(data, results, project_info, wind_forces, image_bytes)
+
+    from report import generate_pdf
+
+    image = BytesIO(image_bytes) if image_bytes is not None else None
+    return generate_pdf(data, results, project_info, wind_forces, image).getvalue()
+
+# Serviço HTTP local (ASGI) com o cálculo dos "Resultados" e a geração do memorial.
+#   GET  /health   estado do serviço e ocupação do pool
+#   POST /results  resultados em JSON
+#   POST /pdf      memorial em PDF (resposta em blocos)
+#   POST /batch    lista de edificações -> ZIP com os memoriais e o resumo, enviado à medida que
+#                  cada PDF fica pronto
+# Os PDFs são gerados em um pool de processos limitado; com `workers` renderizações em
+# andamento e `queue_size` na fila, novas requisições recebem 429 (Retry-After). Um lote ocupa
+# tantas vagas quantos processos usa ao mesmo tempo. O cálculo de /results roda em uma thread,
+# fora do laço de eventos e do pool. Se um processo do pool morre, o pool é recriado e os
+# trabalhos interrompidos são repetidos uma vez.
+class CalculationService:
+    def __init__(self, workers=None, queue_size=None, cache_dir=None, retry_after=1):
+        self.workers = max(1, workers or default_workers())
+        self.queue_size = self.workers * 2 if queue_size is None else queue_size
+        self.cache_dir = cache_dir
+        self.retry_after = retry_after
+        self.executor = None
+        self.active = 0
+        self.rejected = 0
+        self.completed = 0
+
+    @property
+    def capacity(self):
+        return self.workers + self.queue_size
+
+    def start(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_warm_up, initargs=(("report",),)
+            )
+
+    # Descarta o pool quebrado (um processo morreu); o próximo start() cria outro.
+    # Várias requisições podem receber o mesmo erro: só a primeira troca o pool.
+    def _discard(self, executor):
+        if self.executor is executor:
+            self.executor = None
+            executor.shutdown(wait=False)
+
+    # Executa func no pool; se o pool quebrar, tenta uma vez mais em um pool novo
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            self.start()
+            executor = self.executor
+            try:
+                return await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                self._discard(executor)
+                if attempt:
+                    raise
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        routes = {
+            ("GET", "/health"): self._health,
+            ("POST", "/results"): self._results,
+            ("POST", "/pdf"): self._pdf,
+            ("POST", "/batch"): self._batch,
+        }
+        handler = routes.get((method, path))
+        if handler is None:
+            allowed = [m for m, p in routes if p == path]
+            if allowed:
+                await _send_json(send, 405, {"error": "Método não permitido"}, [(b"allow", ", ".join(allowed).encode())])
+            else:
+                await _send_json(send, 404, {"error": "Recurso não encontrado"})
+            return
+
+        try:
+            body = await _read_body(receive)
+        except ValueError as exc:
+            await _send_json(send, 413, {"error": str(exc)})
+            return
+        await handler(body, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, self.shutdown)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _health(self, body, send):
+        await _send_json(send, 200, {
+            "status": "ok",
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "active": self.active,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        })
+
+    async def _results(self, body, send):
+        try:
+            data, project_info, coefficients, _ = parse_request(body)
+            results, wind_forces = await asyncio.get_running_loop().run_in_executor(
+                None, calculate, data, coefficients
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            await _send_json(send, 400, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+        except Exception as exc:
+            await _send_json(send, 500, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+        await _send_json(send, 200, to_jsonable({
+            "data": data,
+            "project_info": project_info,
+            "coefficients": coefficients,
+            "results": results,
+            "wind_forces": wind_forces,
+        }))
+
+    async def _pdf(self, body, send):
+        try:
+            data, project_info, coefficients, image_bytes = parse_request(body)
+        except (KeyError, TypeError, ValueError) as exc:
+            await _send_json(send, 400, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+
+        # Contrapressão: sem vaga no pool nem na fila, recusa em vez de acumular
+        if self.active >= self.capacity:
+            self.rejected += 1
+            await _send_json(send, 429, {"error": "Serviço ocupado, tente novamente"},
+                             [(b"retry-after", str(self.retry_after).encode())])
+            return
+
+        self.active += 1
+        try:
+            pdf = await self._run(render_pdf, data, project_info, coefficients, image_bytes, self.cache_dir)
+        except Exception as exc:
+            await _send_json(send, 500, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+        finally:
+            self.active -= 1
+        self.completed += 1
+
+        file_name = f"memorial_{datetime.now():%Y%m%d_%H%M%S}.pdf"
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/pdf"),
+                (b"content-length", str(len(pdf)).encode()),
+                (b"content-disposition", f'attachment; filename="{file_name}"'.encode()),
+            ],
+        })
+        for start in range(0, len(pdf), PDF_CHUNK_SIZE):
+            await send({
+                "type": "http.response.body",
+                "body": pdf[start:start + PDF_CHUNK_SIZE],
+                "more_body": start + PDF_CHUNK_SIZE < len(pdf),
+            })
+        if not pdf:
+            await send({"type": "http.response.body", "body": b""})
+
+    async def _batch(self, body, send):
+        try:
+            rows = json.loads(body or b"[]")
+        except ValueError as exc:
+            await _send_json(send, 400, {"error": f"JSON inválido: {exc}"})
+            return
+        if isinstance(rows, dict):
+            rows = rows.get("buildings")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            await _send_json(send, 400, {"error": "Envie uma lista de edificações ou {\"buildings\": [...]}"})
+            return
+        # O lote mantém até `workers` edificações em andamento: reserva essas vagas
+        slots = max(1, min(self.workers, len(rows)))
+        if self.active + slots > self.capacity:
+            self.rejected += 1
+            await _send_json(send, 429, {"error": "Serviço ocupado, tente novamente"},
+                             [(b"retry-after", str(self.retry_after).encode())])
+            return
+
+        self.active += slots
+        stream = _ChunkBuffer()
+        export = ZipExport(stream)
+        summaries = [None] * len(rows)
+        pending = {}
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/zip"),
+                    (b"content-disposition", f'attachment; filename="memoriais_{datetime.now():%Y%m%d_%H%M%S}.zip"'.encode()),
+                ],
+            })
+            # No máximo `workers` edificações em andamento ou esperando a vez: a memória não
+            # cresce com o lote. Os PDFs entram no ZIP na ordem da lista.
+            next_row = written = 0
+            while next_row < len(rows) or pending:
+                while next_row < len(rows) and next_row < written + slots:
+                    pending[self._process(rows, next_row)] = next_row
+                    next_row += 1
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    index = pending.pop(future)
+                    try:
+                        summaries[index] = future.result()
+                    except Exception as exc:
+                        summaries[index] = failed_summary(rows, index, exc)
+                while written < len(rows) and summaries[written] is not None:
+                    export.add(summaries[written])
+                    written += 1
+                await _send_chunks(send, stream.take())
+            export.close(summaries)
+            await _send_chunks(send, stream.take())
+            await send({"type": "http.response.body", "body": b""})
+            self.completed += 1
+        finally:
+            for future in pending:
+                future.cancel()
+            self.active -= slots
+
+    def _process(self, rows, index):
+        row = {k: v for k, v in rows[index].items() if k not in ("image", "image_base64")}
+        return asyncio.ensure_future(self._run(process_building, index, row, None, True, self.cache_dir))
+
+# Destino do ZIP em memória, esvaziado a cada envio (o ZipFile grava sem seek)
+class _ChunkBuffer:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+async def _send_chunks(send, data):
+    for start in range(0, len(data), PDF_CHUNK_SIZE):
+        await send({"type": "http.response.body", "body": data[start:start + PDF_CHUNK_SIZE], "more_body": True})
+
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise ValueError("Corpo da requisição muito grande")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+async def _send_json(send, status, payload, headers=()):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode())] + list(headers),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+# Cliente em processo: chama o app ASGI diretamente, sem rede.
+# Retorna (status, cabeçalhos, corpo) e o número de blocos recebidos.
+async def asgi_request(app, method, path, body=b"", headers=()):
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")] + list(headers),
+    }
+    request = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {"status": None, "headers": {}, "body": [], "chunks": 0}
+
+    async def receive():
+        if request:
+            return request.pop()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        else:
+            response["body"].append(message.get("body", b""))
+            response["chunks"] += 1
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], b"".join(response["body"]), response["chunks"]
+
+def request(app, method, path, body=b"", headers=()):
+    return asyncio.run(asgi_request(app, method, path, body, headers))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local do cálculo e do memorial em PDF.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço (padrão: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Porta (padrão: 8000)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Processos para gerar PDFs (padrão: um por núcleo)")
+    parser.add_argument("--queue", type=int, default=None, help="PDFs aguardando além dos processos antes de responder 429 (padrão: 2 por processo)")
+    parser.add_argument("--cache-dir", default=None, help="Pasta do cache de PDFs (padrão: sem cache)")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("O servidor requer o pacote uvicorn (pip install uvicorn).", file=sys.stderr)
+        return 1
+
+    service = CalculationService(args.workers, args.queue, args.cache_dir)
+    uvicorn.run(service, host=args.host, port=args.port, lifespan="on")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
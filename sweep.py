@@ -0,0 +1,186 @@
+import numpy as np
+
+from calculation import automatic_ce, friction_force_array, roof_coefficients_array
+from ce_tables import roof_coefficients, wall_coefficients
+from wind_profile import CATEGORIES, CLASSES, wind_profile
+
+# Entradas que podem variar no estudo paramétrico (a altura só influi com Ce automático)
+numeric_parameters = ("length", "width", "height", "z_fechamento", "z_cobertura", "slope", "v0", "s1", "s3")
+categorical_parameters = {"category": CATEGORIES, "class_": CLASSES}
+sweep_parameters = numeric_parameters + tuple(categorical_parameters)
+
+# Direções de fechamento e os coeficientes Ce correspondentes
+wall_directions = {
+    "fechamento_0": "ce_fechamento_0",
+    "fechamento_90": "ce_fechamento_90",
+}
+
+# Valores de um eixo: números em float; categoria/classe em índices das tabelas normativas
+def _axis_values(name, values):
+    if name in categorical_parameters:
+        options = categorical_parameters[name]
+        return np.array([options.index(v) if isinstance(v, str) else int(v) for v in values], dtype=np.intp)
+    return np.asarray(values, dtype=float)
+
+# Valores entre start e stop com `steps` pontos (atalho para montar a grade)
+def linear_range(start, stop, steps):
+    return np.linspace(start, stop, int(steps))
+
+# Função para executar o estudo paramétrico sobre o produto cartesiano da grade.
+# grid: {entrada: valores}. Cada entrada variada vira uma dimensão; as demais vêm de `data`.
+# Os arrays de entrada são combinados por broadcasting, sem materializar a grade.
+def run_sweep(data, coefficients, grid):
+    names = [name for name in grid if name in sweep_parameters]
+    unknown = set(grid) - set(sweep_parameters)
+    if unknown:
+        raise ValueError(f"Entradas não suportadas no estudo paramétrico: {', '.join(sorted(unknown))}")
+
+    axes = {}
+    inputs = {}
+    for dim, name in enumerate(names):
+        axes[name] = _axis_values(name, grid[name])
+        shape = [1] * len(names)
+        shape[dim] = -1
+        inputs[name] = axes[name].reshape(shape)
+    for name in sweep_parameters:
+        if name not in inputs:
+            inputs[name] = _axis_values(name, [data[name]])[0]
+    shape = tuple(len(axes[name]) for name in names)
+
+    def full(values):
+        return np.broadcast_to(values, shape)
+
+    # S2, Vk e q no fechamento e na cobertura
+    profile = {}
+    for surface in ("fechamento", "cobertura"):
+        profile[surface] = wind_profile(
+            inputs[f"z_{surface}"], inputs["v0"], inputs["s1"], inputs["s3"],
+            inputs["category"], inputs["class_"]
+        )
+
+    columns = {}
+    for surface in ("fechamento", "cobertura"):
+        columns[f"s2_{surface}"] = full(profile[surface]["s2"])
+        columns[f"vk_{surface}"] = full(profile[surface]["vk"])
+        columns[f"q_{surface}_nm2"] = full(profile[surface]["q_nm2"])
+        columns[f"q_{surface}_kgfm2"] = full(profile[surface]["q_kgfm2"])
+
+    # DP extremo por direção: como q >= 0, basta o maior e o menor (Ce - Cpi).
+    # Com Ce automático, os Ce de cada ponto vêm das tabelas da NBR 6123 (ce_tables.py).
+    cpi = np.asarray(coefficients["cpi"], dtype=float)
+    automatic = automatic_ce(coefficients)
+    if automatic:
+        wall = wall_coefficients(inputs["height"], inputs["length"], inputs["width"])
+    q_fec = profile["fechamento"]["q_kgfm2"]
+    q_cob = profile["cobertura"]["q_kgfm2"]
+    for direction, key in wall_directions.items():
+        if automatic and len(cpi):
+            ce = np.round(wall[key], 4)
+            columns[f"dp_max_{direction}"] = full(q_fec * (ce.max(axis=-1) - cpi.min()))
+            columns[f"dp_min_{direction}"] = full(q_fec * (ce.min(axis=-1) - cpi.max()))
+            continue
+        ce = np.asarray(coefficients[key], dtype=float)
+        if len(ce) and len(cpi):
+            delta = ce[:, None] - cpi[None, :]
+            columns[f"dp_max_{direction}"] = full(q_fec * delta.max())
+            columns[f"dp_min_{direction}"] = full(q_fec * delta.min())
+
+    # Cobertura de duas águas: CPb/CPs dependem da inclinação (e, com Ce automático, de h/b);
+    # F = DP * área de cada água
+    if data["roof_type"] == "Duas Águas" and len(cpi):
+        theta, cpb, cps = roof_coefficients_array(inputs["slope"])
+        if automatic:
+            # EF/GH (90°/270°) e EG/FH (0°/180°): os extremos entre as duas direções
+            roof_ce = roof_coefficients(inputs["height"], inputs["length"], inputs["width"], inputs["slope"])
+            roof_ce = np.round(np.concatenate([roof_ce["ce_cobertura_90"], roof_ce["ce_cobertura_0"]], axis=-1), 4)
+            delta_max = roof_ce.max(axis=-1) - cpi.min()
+            delta_min = roof_ce.min(axis=-1) - cpi.max()
+        else:
+            delta_max = np.maximum(cpb, cps) - cpi.min()
+            delta_min = np.minimum(cpb, cps) - cpi.max()
+        area_per_water = inputs["length"] * (inputs["width"] / 2) / np.cos(theta)
+        columns["dp_max_cobertura"] = full(q_cob * delta_max)
+        columns["dp_min_cobertura"] = full(q_cob * delta_min)
+        columns["area_per_water"] = full(area_per_water)
+        columns["F_max_cobertura"] = full(q_cob * delta_max * area_per_water)
+        columns["F_min_cobertura"] = full(q_cob * delta_min * area_per_water)
+
+    # Força de atrito longitudinal F' (seção 14)
+    F_cob, F_fec, F_prime = friction_force_array(
+        inputs["length"], inputs["width"], inputs["z_fechamento"], q_cob, q_fec
+    )
+    columns["F_cob"] = full(F_cob)
+    columns["F_fec"] = full(F_fec)
+    columns["F_prime"] = full(F_prime)
+
+    return {"parameters": names, "axes": axes, "shape": shape, "size": int(np.prod(shape)), "columns": columns}
+
+# Tabela colunar (uma linha por ponto da grade), com as entradas variadas e os resultados.
+# rows seleciona apenas alguns pontos (índices na grade achatada) sem materializar o resto.
+def sweep_columns(result, rows=None):
+    names = result["parameters"]
+    shape = result["shape"]
+    if not names:
+        return {name: np.atleast_1d(values) for name, values in result["columns"].items()}
+
+    index = np.arange(result["size"]) if rows is None else np.asarray(rows)
+    coords = np.unravel_index(index, shape)
+    table = {}
+    for dim, name in enumerate(names):
+        values = result["axes"][name][coords[dim]]
+        if name in categorical_parameters:
+            values = np.asarray(categorical_parameters[name])[values]
+        table[name] = values
+    for name, values in result["columns"].items():
+        table[name] = values[coords]
+    return table
+
+def sweep_frame(result, rows=None):
+    import pandas as pd
+
+    return pd.DataFrame(sweep_columns(result, rows))
+
+# Matriz 2D de um resultado para mapa de calor: reduz as demais entradas
+# (máximo por padrão, ignorando pontos NaN como F' não aplicável)
+def heatmap_data(result, column, x, y, reduce=np.fmax.reduce):
+    names = result["parameters"]
+    values = np.asarray(result["columns"][column])
+    others = tuple(i for i, name in enumerate(names) if name not in (x, y))
+    if others:
+        values = reduce(values, axis=others)
+    remaining = [name for name in names if name in (x, y)]
+    if remaining != [y, x]:
+        values = values.T
+    return values
+
+# Rótulos dos eixos (textos para categoria/classe)
+def axis_labels(result, name):
+    values = result["axes"][name]
+    if name in categorical_parameters:
+        return [categorical_parameters[name][i] for i in values]
+    return values.tolist()
+
+# Figura do mapa de calor (API orientada a objetos do matplotlib, sem pyplot)
+def heatmap_figure(result, column, x, y, labels=None):
+    from matplotlib.figure import Figure
+
+    labels = labels or {}
+    values = heatmap_data(result, column, x, y)
+    fig = Figure(figsize=(7, 4.5), dpi=100)
+    ax = fig.add_subplot()
+    x_labels, y_labels = axis_labels(result, x), axis_labels(result, y)
+    image = ax.imshow(values, origin="lower", aspect="auto", cmap="viridis")
+    # No máximo ~12 rótulos por eixo
+    for set_ticks, tick_labels in ((ax.set_xticks, x_labels), (ax.set_yticks, y_labels)):
+        step = max(1, int(np.ceil(len(tick_labels) / 12)))
+        positions = range(0, len(tick_labels), step)
+        set_ticks(positions, [_tick(tick_labels[i]) for i in positions], fontsize=7)
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.set_xlabel(labels.get(x, x))
+    ax.set_ylabel(labels.get(y, y))
+    fig.colorbar(image, ax=ax, label=labels.get(column, column))
+    fig.tight_layout()
+    return fig
+
+def _tick(value):
+    return value if isinstance(value, str) else f"{value:.4g}".replace(".", ",")
@@ -0,0 +1,40 @@
+import io
+import zipfile
+from datetime import datetime
+
+from batch import export_zip, run_batch
+
+rows = [
+    {"id": "A", "length": "80", "width": "40", "height": "30"},
+    {"id": "B", "length": "20", "width": "10", "height": "5"},
+    {"id": "C", "length": "abc"},
+    {"id": "D", "length": "30", "width": "12", "height": "6"},
+]
+
+def zip_bytes(workers):
+    target = io.BytesIO()
+    export_zip(rows, target, workers=workers, generated_at=datetime(2024, 1, 1))
+    return target.getvalue()
+
+# Com data fixa, o ZIP tem as entradas na ordem do manifesto e os mesmos bytes com 1 ou mais processos
+def test_zip_is_reproducible_in_manifest_order():
+    archive = zip_bytes(workers=2)
+    with zipfile.ZipFile(io.BytesIO(archive)) as f:
+        assert f.namelist() == ["memorial_A.pdf", "memorial_B.pdf", "memorial_D.pdf", "resumo.csv"]
+    assert zip_bytes(workers=2) == archive
+    assert zip_bytes(workers=1) == archive
+
+# Com o banco de projetos, linhas sem projeto viram projetos separados (pelo id), não revisões
+# do projeto padrão
+def test_store_keys_rows_without_project_by_id(tmp_path):
+    from project_store import ProjectStore
+
+    path = str(tmp_path / "projetos.sqlite3")
+    rows_with_project = rows + [{"id": "E", "project": "Galpão", "length": "30"}, {"id": "F", "project": "Galpão"}]
+    run_batch(rows_with_project, None, write_pdf=False, store_path=path)
+    store = ProjectStore(path)
+    projects, _ = store.list_projects()
+    store.close()
+    assert sorted((row["project"], row["revisions"]) for row in projects) == [
+        ("A", 1), ("B", 1), ("D", 1), ("Galpão", 2),
+    ]
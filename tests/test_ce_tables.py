@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+import pytest
+
+from ce_tables import (
+    frame_wall_coefficients, roof_coefficients, roof_table, wall_coefficients, wall_force_coefficients, wall_table,
+)
+
+def slope_for(theta):
+    return 100 * math.tan(math.radians(theta))
+
+def walls(height, length, width):
+    ce = wall_coefficients(height, length, width)
+    return np.concatenate([ce["ce_fechamento_0"], ce["ce_fechamento_90"]])
+
+# Pontos da tabela de paredes (l1 >= l2: 0° é o α = 0° da norma)
+@pytest.mark.parametrize("height, length, width, key", [
+    (8.0, 16.0, 16.0, (0.5, 1.5)),    # h/b = 1/2, a/b = 1
+    (4.0, 24.0, 16.0, (0.5, 1.5)),    # a/b = 3/2
+    (8.0, 64.0, 16.0, (0.5, 4.0)),    # a/b = 4
+    (24.0, 32.0, 16.0, (1.5, 4.0)),   # h/b = 3/2, a/b = 2
+    (96.0, 16.0, 16.0, (6.0, 1.5)),   # h/b = 6
+    (200.0, 80.0, 16.0, (6.0, 4.0)),  # acima da tabela: valor da borda
+])
+def test_wall_table_points(height, length, width, key):
+    assert walls(height, length, width) == pytest.approx(wall_table[key])
+
+# Entre a/b = 3/2 e 2 a norma interpola linearmente
+def test_wall_interpolates_between_plan_ratios():
+    expected = (np.array(wall_table[0.5, 1.5]) + np.array(wall_table[0.5, 4.0])) / 2
+    assert walls(8.0, 28.0, 16.0) == pytest.approx(expected)
+
+# A faixa de h/b inclui o limite; logo acima dele já vale a faixa seguinte, sem interpolação
+@pytest.mark.parametrize("limit, below, above", [(0.5, (0.5, 1.5), (1.5, 1.5)), (1.5, (1.5, 1.5), (6.0, 1.5))])
+def test_wall_band_edges(limit, below, above):
+    width = 16.0
+    assert walls(limit * width, width, width) == pytest.approx(wall_table[below])
+    assert walls(limit * width * (1 + 1e-9), width, width) == pytest.approx(wall_table[above])
+    assert walls(limit * width * 0.6, width, width) == pytest.approx(wall_table[below])
+    assert walls(limit * width * 1.2, width, width) == pytest.approx(wall_table[above])
+
+# Com l2 > l1 a norma chama de α = 0° a direção 90° do cálculo
+def test_wall_directions_swap_when_width_is_larger():
+    ce, swapped = wall_coefficients(10.0, 48.0, 16.0), wall_coefficients(10.0, 16.0, 48.0)
+    assert swapped["ce_fechamento_0"] == pytest.approx(ce["ce_fechamento_90"])
+    assert swapped["ce_fechamento_90"] == pytest.approx(ce["ce_fechamento_0"])
+    assert wall_force_coefficients(10.0, 16.0, 48.0) == pytest.approx(wall_force_coefficients(10.0, 48.0, 16.0)[::-1])
+
+def test_wall_force_coefficients():
+    c, d, a, b = np.array(wall_table[0.5, 4.0])[[2, 3, 4, 5]]
+    assert wall_force_coefficients(8.0, 64.0, 16.0) == pytest.approx([c - d, a - b])
+
+def test_frame_wall_coefficients():
+    a1, a2, _, _, a, b, c1, c2 = wall_table[0.5, 4.0]
+    assert frame_wall_coefficients(8.0, 64.0, 16.0) == {
+        "ce_fechamento_0": [(a1, a1), (a2, a2)], "ce_fechamento_90": [(a, b)],
+    }
+    _, _, c, d, _, _, _, _ = wall_table[0.5, 4.0]
+    assert frame_wall_coefficients(8.0, 16.0, 64.0) == {
+        "ce_fechamento_0": [(c1, c1), (c2, c2)], "ce_fechamento_90": [(c, d)],
+    }
+
+# Pontos da tabela de telhados: (EF, GH) a 90° e (EG, FH) a 0°
+@pytest.mark.parametrize("band, theta", [(0.5, 0), (0.5, 10), (0.5, 45), (1.5, 20), (6.0, 30), (6.0, 50)])
+def test_roof_table_points(band, theta):
+    width = 16.0
+    ce = roof_coefficients(band * width, 48.0, width, slope_for(theta))
+    assert np.concatenate([ce["ce_cobertura_90"], ce["ce_cobertura_0"]]) == pytest.approx(roof_table[band][theta])
+
+# Ângulos intermediários e ausentes em uma faixa: interpolação linear entre os da própria faixa
+def test_roof_interpolates_angles():
+    ce = roof_coefficients(8.0, 48.0, 16.0, slope_for(7.5))
+    expected = (np.array(roof_table[0.5][5]) + np.array(roof_table[0.5][10])) / 2
+    assert np.concatenate([ce["ce_cobertura_90"], ce["ce_cobertura_0"]]) == pytest.approx(expected)
+    ce = roof_coefficients(8.0, 48.0, 16.0, slope_for(40))
+    expected = np.array(roof_table[0.5][30]) + (np.array(roof_table[0.5][45]) - np.array(roof_table[0.5][30])) * 10 / 15
+    assert np.concatenate([ce["ce_cobertura_90"], ce["ce_cobertura_0"]]) == pytest.approx(expected)
+
+def test_roof_band_edges():
+    ce = roof_coefficients(24.0, 48.0, 16.0, slope_for(10))
+    assert ce["ce_cobertura_90"] == pytest.approx(roof_table[1.5][10][:2])
+    ce = roof_coefficients(24.0 * (1 + 1e-9), 48.0, 16.0, slope_for(10))
+    assert ce["ce_cobertura_90"] == pytest.approx(roof_table[6.0][10][:2])
+
+# Arrays dão os mesmos valores das chamadas escalares
+def test_vectorized_lookup():
+    heights, slopes = np.array([4.0, 8.0, 8.1, 30.0, 120.0]), np.array([5.0, 10.0, 17.6, 30.0, 80.0])
+    ce = roof_coefficients(heights, 48.0, 16.0, slopes)
+    for i, (height, slope) in enumerate(zip(heights, slopes)):
+        assert ce["ce_cobertura_90"][i] == pytest.approx(roof_coefficients(height, 48.0, 16.0, slope)["ce_cobertura_90"])
+    assert wall_coefficients(heights, 48.0, 16.0)["ce_fechamento_0"][2] == pytest.approx(walls(8.1, 48.0, 16.0)[:4])
@@ -0,0 +1,37 @@
+import math
+
+import pytest
+
+from calculation import calculate_results, complete_data, default_coefficients, default_data
+from frame_loads import frame_layout
+
+# A envoltória nunca fica abaixo (acima) das combinações sem vento: com sucção aliviando a
+# cobertura, o máximo de ELU ainda é o de γg G + γq Q
+@pytest.mark.parametrize("permanent_load, live_load, slope", [(15.0, 25.0, 10.0), (40.0, 0.0, 25.0), (0.0, 50.0, 5.0)])
+def test_envelope_covers_wind_free_combinations(permanent_load, live_load, slope):
+    data = complete_data(dict(default_data, permanent_load=permanent_load, live_load=live_load, slope=slope))
+    results, _ = calculate_results(data, default_coefficients)
+    combinations = results["combinations"]
+    cos_theta = math.cos(math.atan(slope / 100))
+    roof = (permanent_load * cos_theta, live_load * cos_theta ** 2)
+    _, tributary = frame_layout(data["length"], data["portico_distance"])
+
+    for state in ("ELU", "ELS"):
+        wind_free = [row["g"] * roof[0] + row["q"] * roof[1]
+                     for row in combinations["combinations"] if row["state"] == state]
+        envelope = combinations["surfaces"][state]["Cobertura"]
+        assert envelope["max"]["value"] >= max(wind_free) - 1e-9
+        assert envelope["min"]["value"] <= min(wind_free) + 1e-9
+        for member in ("left_rafter", "right_rafter"):
+            envelope = combinations["members"][state][member]
+            width = tributary[1] if len(tributary) > 2 else tributary[0]
+            assert envelope["max"]["value"] >= max(wind_free) * width - 1e-6
+            assert envelope["min"]["value"] <= min(wind_free) * width + 1e-6
+
+def test_favorable_wind_is_left_out():
+    data = complete_data(dict(default_data, permanent_load=15.0, live_load=25.0, slope=10.0))
+    results, _ = calculate_results(data, default_coefficients)
+    governing = results["combinations"]["surfaces"]["ELU"]["Cobertura"]["max"]
+    cos_theta = math.cos(math.atan(0.1))
+    assert governing["value"] == pytest.approx(1.25 * 15.0 * cos_theta + 1.5 * 25.0 * cos_theta ** 2)
+    assert governing["direction"] is None
@@ -0,0 +1,10 @@
+import pytest
+
+from import_budget import check_import_budget, import_budgets
+
+# Cada módulo é medido em um interpretador novo; o tempo e as dependências pesadas carregadas
+# precisam ficar dentro do orçamento de import_budget.py
+@pytest.mark.parametrize("module", list(import_budgets))
+def test_import_budget(module):
+    _, failures = check_import_budget({module: import_budgets[module]})
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,41 @@
+import os
+import time
+
+from parallel import run_parallel
+
+# Job que derruba o próprio processo (como um encerramento por falta de memória)
+def _job(index, crash):
+    if index == crash:
+        os._exit(1)
+    return index * index
+
+# Os primeiros jobs demoram mais: terminam depois dos seguintes
+def _slow_first(index):
+    time.sleep(0.2 if index < 2 else 0.0)
+    return index
+
+def _error(index, exc):
+    return f"erro {type(exc).__name__}"
+
+def test_results_keep_job_order():
+    results = run_parallel(_job, [(index, -1) for index in range(20)], workers=2)
+    assert results == [index * index for index in range(20)]
+
+# Um processo morto quebra o pool; só o job que o derrubou vira falha
+def test_dead_worker_fails_only_its_job():
+    results = run_parallel(_job, [(index, 3) for index in range(20)], workers=2, on_error=_error)
+    assert results[3] == "erro BrokenProcessPool"
+    assert results[:3] + results[4:] == [index * index for index in range(20) if index != 3]
+
+def test_progress_counts_every_job_once():
+    seen = []
+    run_parallel(_job, [(index, 5) for index in range(12)], workers=3, on_error=_error,
+                 progress=lambda done, total, result: seen.append((done, total)))
+    assert seen == [(done, 12) for done in range(1, 13)]
+
+# Com ordered, progress segue a ordem dos jobs e no máximo max_pending resultados ficam esperando
+def test_ordered_progress():
+    seen = []
+    results = run_parallel(_slow_first, [(index,) for index in range(12)], workers=2, max_pending=4, ordered=True,
+                           progress=lambda done, total, result: seen.append(result))
+    assert seen == results == list(range(12))
@@ -0,0 +1,47 @@
+import os
+import signal
+import time
+
+import pytest
+
+import pdf_jobs
+from pdf_cache import PdfCache
+from pdf_jobs import PdfJobQueue
+
+# Renderização de teste: devolve as entradas, ou derruba o processo (como falta de memória)
+def _render(directory, data, results, project_info, wind_forces, image_bytes):
+    if data.get("crash"):
+        os._exit(1)
+    return repr(sorted(data.items())).encode()
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_jobs, "_render", _render)
+    queue = PdfJobQueue(max_workers=1, cache=PdfCache(str(tmp_path)))
+    yield queue
+    queue.shutdown()
+
+def submit(queue, **data):
+    return queue.submit(data, {}, {}, {})
+
+def wait(queue, job_ids, timeout=30):
+    deadline = time.monotonic() + timeout
+    while any(queue.status(job_id)["state"] in ("queued", "running") for job_id in job_ids):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    return [queue.status(job_id)["state"] for job_id in job_ids]
+
+# Os jobs na fila atrás do que derrubou o processo são repetidos e terminam normalmente
+def test_dead_worker_fails_only_its_job(queue):
+    job_ids = [submit(queue, n=1), submit(queue, n=2, crash=True), submit(queue, n=3), submit(queue, n=4)]
+    assert wait(queue, job_ids) == ["done", "error", "done", "done"]
+    assert "BrokenProcessPool" in queue.status(job_ids[1])["error"]
+    assert queue.result(job_ids[2]) == _render(None, {"n": 3}, None, None, None, None)
+    assert wait(queue, [submit(queue, n=5)]) == ["done"]
+
+def test_killed_idle_worker_is_replaced(queue):
+    assert wait(queue, [submit(queue, n=1)]) == ["done"]
+    for pid in list(queue.executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    time.sleep(0.2)
+    assert wait(queue, [submit(queue, n=2), submit(queue, n=3)]) == ["done", "done"]
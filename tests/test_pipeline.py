@@ -0,0 +1,64 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from calculation import calculate_results, complete_data, default_coefficients, default_cpi_values, default_data
+from pipeline import evaluate_results
+
+def assert_same(expected, actual, path="results"):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), path
+        for key in expected:
+            assert_same(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, (list, tuple)):
+        assert type(expected) is type(actual) and len(expected) == len(actual), path
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            assert_same(a, b, f"{path}[{i}]")
+    elif isinstance(expected, np.ndarray):
+        assert np.array_equal(expected, actual, equal_nan=True), path
+    elif isinstance(expected, float) and math.isnan(expected):
+        assert isinstance(actual, float) and math.isnan(actual), path
+    else:
+        assert expected == actual, path
+
+def random_inputs(rnd, i):
+    data = dict(default_data)
+    data.update(
+        length=rnd.uniform(10, 200), width=rnd.uniform(5, 60), height=rnd.uniform(3, 20), slope=rnd.uniform(2, 30),
+        roof_type=rnd.choice(["Duas Águas", "Uma Água"]), category=rnd.choice(["I", "II", "III", "IV", "V"]),
+        class_=rnd.choice("ABC"), v0=rnd.choice([30.0, 35.0, 42.0, 45.0]), s1=rnd.choice([0.9, 1.0, 1.1]),
+        s3=rnd.choice([1.11, 1.0, 0.95]), portico_distance=rnd.uniform(4, 8),
+    )
+    data["z_fechamento"] = rnd.uniform(3, 15)
+    data["z_cobertura"] = data["z_fechamento"] + rnd.uniform(0, 2)
+    if i % 4 == 0:
+        data.update(storeys=rnd.randint(5, 40), storey_height=3.0)
+    if i % 5 == 0:
+        data.update(permanent_load=rnd.uniform(0, 40), live_load=rnd.uniform(0, 50))
+    coefficients = dict(default_coefficients)
+    coefficients["cpi_case"] = rnd.choice(sorted(default_cpi_values))
+    coefficients["cpi"] = list(default_cpi_values[coefficients["cpi_case"]])
+    if i % 2:
+        coefficients["ce_mode"] = "auto"
+    return complete_data(data), coefficients
+
+# O grafo reaproveita etapas entre chamadas; em uma sequência de entradas diferentes (e
+# repetidas), o resultado tem de ser sempre o mesmo do cálculo direto
+def test_graph_matches_direct_calculation():
+    rnd = random.Random(1)
+    inputs = [random_inputs(rnd, i) for i in range(60)]
+    for data, coefficients in inputs + inputs[::7]:
+        assert_same(calculate_results(data, coefficients), evaluate_results(data, coefficients))
+
+# Trocar um campo de cada vez: só as etapas afetadas são refeitas
+@pytest.mark.parametrize("field, value", [
+    ("v0", 30.0), ("category", "III"), ("length", 90.0), ("slope", 25.0), ("roof_type", "Uma Água"),
+    ("z_cobertura", 20.0), ("storeys", 12),
+])
+def test_single_field_change(field, value):
+    data, coefficients = complete_data(default_data), default_coefficients
+    evaluate_results(data, coefficients)
+    changed = complete_data(dict(default_data, **{field: value}))
+    assert_same(calculate_results(changed, coefficients), evaluate_results(changed, coefficients))
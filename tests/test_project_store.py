@@ -0,0 +1,91 @@
+import io
+import shutil
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+from calculation import calculate_results, complete_data, default_coefficients, default_data, default_project_info
+from pdf_cache import PdfCache, pdf_cache_key
+from project_store import ProjectStore
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def inputs(**changes):
+    data = complete_data(dict(default_data, **changes))
+    results, wind_forces = calculate_results(data, default_coefficients)
+    return data, default_coefficients, dict(default_project_info), results, wind_forces
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProjectStore(str(tmp_path / "projetos.sqlite3"))
+    yield store
+    store.close()
+
+def test_same_inputs_reuse_the_revision(store):
+    first = store.save(*inputs(), image_bytes=png("red"))
+    again = store.save(*inputs(), image_bytes=png("red"))
+    assert first["created"] and not again["created"]
+    assert again["revision_id"] == first["revision_id"]
+
+    other_image = store.save(*inputs(), image_bytes=png("blue"))
+    other_inputs = store.save(*inputs(v0=45.0), image_bytes=png("blue"))
+    assert (other_image["created"], other_image["number"]) == (True, 2)
+    assert (other_inputs["created"], other_inputs["number"]) == (True, 3)
+    assert store.image(other_image["revision_id"]) == png("blue")
+    assert [row["number"] for row in store.revisions(first["project_id"])] == [3, 2, 1]
+
+def test_cursor_pagination(store):
+    for number in range(5):
+        data, coefficients, project_info, results, wind_forces = inputs()
+        store.save(data, coefficients, dict(project_info, project=f"P{number}"), results, wind_forces)
+    pages, cursor = [], None
+    while True:
+        rows, cursor = store.list_projects(limit=2, after=cursor)
+        pages.append([row["project"] for row in rows])
+        if cursor is None:
+            break
+    assert pages == [["P4", "P3"], ["P2", "P1"], ["P0"]]
+
+    # Com o total múltiplo do limite, a última página vem vazia
+    rows, cursor = store.list_projects(project="p", limit=5)
+    assert len(rows) == 5 and cursor is not None
+    assert store.list_projects(project="p", limit=5, after=cursor) == ([], None)
+
+# _ e % no prefixo são literais, e a busca não diferencia maiúsculas (NOCASE: só letras ASCII)
+@pytest.mark.parametrize("prefix, expected", [("GALPAO_", ["Galpao_1"]), ("50%", ["50% norte"]), ("galp", ["Galpao_1", "GalpaoX"])])
+def test_prefix_search(store, prefix, expected):
+    for name in ("Galpao_1", "GalpaoX", "50% norte", "50x sul"):
+        data, coefficients, project_info, results, wind_forces = inputs()
+        store.save(data, coefficients, dict(project_info, project=name), results, wind_forces)
+    rows, _ = store.list_projects(project=prefix)
+    assert sorted(row["project"] for row in rows) == sorted(expected)
+
+def test_diff(store):
+    first = store.save(*inputs())
+    store.save(*inputs(v0=45.0))
+    changes = {field: (old, new) for field, old, new in store.diff(first["project_id"], 1, 2)}
+    assert changes["data.v0"] == (default_data["v0"], 45.0)
+    assert changes["results.vk_fechamento"][1] > changes["results.vk_fechamento"][0]
+    assert not any(field.startswith("coefficients.") for field in changes)
+    assert store.diff(first["project_id"], 2, 2) == []
+    with pytest.raises(KeyError):
+        store.diff(first["project_id"], 1, 9)
+
+# Memorial reemitido sem o PDF no cache: mesmos bytes, com a imagem guardada na revisão
+def test_reissue_after_cache_is_cleared(store, tmp_path):
+    cache = PdfCache(str(tmp_path / "cache"))
+    generated_at = datetime(2024, 1, 1)
+    image_bytes = png("green")
+    data, coefficients, project_info, results, wind_forces = inputs()
+    original = cache.get_or_render(data, results, project_info, wind_forces, image_bytes, generated_at=generated_at)
+    saved = store.save(data, coefficients, project_info, results, wind_forces, image_bytes=image_bytes,
+                       pdf_key=pdf_cache_key(data, results, project_info, wind_forces, image_bytes))
+
+    shutil.rmtree(cache.directory)
+    cache = PdfCache(cache.directory)
+    assert cache.get(store.open(saved["revision_id"])["pdf_key"]) is None
+    assert store.reissue(saved["revision_id"], cache=cache, generated_at=generated_at) == original
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+
+import report
+from batch import with_probabilistic
+from calculation import (
+    calculate_results, complete_data, default_coefficients, default_cpi_values, default_data, default_project_info,
+)
+
+generated_at = datetime(2024, 1, 1)
+
+def pdf(data, coefficients, project_info):
+    results, wind_forces = calculate_results(data, coefficients)
+    results = with_probabilistic(data, coefficients, results)
+    return report.generate_pdf(data, results, project_info, wind_forces, generated_at=generated_at).getvalue()
+
+# Cada variação muda um campo em relação à base. Com o cache de seções ainda cheio da base
+# (e das variações anteriores), o PDF tem de ser igual ao gerado com o cache vazio: uma seção
+# que lê um campo não declarado em report_sections imprimiria o conteúdo antigo.
+variations = [
+    ("data", "v0", 30.0), ("data", "s1", 1.1), ("data", "s3", 0.95), ("data", "category", "IV"),
+    ("data", "class_", "C"), ("data", "length", 90.0), ("data", "width", 30.0), ("data", "height", 6.0),
+    ("data", "slope", 25.0), ("data", "z_fechamento", 8.0), ("data", "z_cobertura", 20.0),
+    ("data", "roof_type", "Uma Água"), ("data", "portico_distance", 7.5), ("data", "storeys", 12),
+    ("data", "permanent_load", 20.0), ("data", "mc_samples", 2000),
+    ("coefficients", "ce_mode", "auto"), ("coefficients", "cpi_case", "b"),
+    ("project_info", "client", "Outro Cliente"), ("project_info", "project", "Galpão"),
+    ("project_info", "location", "Recife, PE"), ("project_info", "calculator", "Maria Souza"),
+]
+
+@pytest.fixture(scope="module")
+def warm_cache():
+    report._section_cache.clear()
+    pdf(complete_data(default_data), default_coefficients, default_project_info)
+
+@pytest.mark.parametrize("source, field, value", variations)
+def test_warm_cache_matches_cold_cache(warm_cache, source, field, value):
+    inputs = {"data": dict(default_data), "coefficients": dict(default_coefficients),
+              "project_info": dict(default_project_info)}
+    inputs[source][field] = value
+    if field == "cpi_case":
+        inputs["coefficients"]["cpi"] = list(default_cpi_values[value])
+    inputs["data"] = complete_data(inputs["data"])
+
+    warm = pdf(**inputs)
+    saved = dict(report._section_cache)
+    report._section_cache.clear()
+    try:
+        cold = pdf(**inputs)
+    finally:
+        report._section_cache.update(saved)
+    assert warm == cold
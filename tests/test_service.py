@@ -0,0 +1,70 @@
+import csv
+import io
+import os
+import signal
+import zipfile
+
+import pytest
+
+from service import PDF_CHUNK_SIZE, CalculationService, request
+
+building = {"length": 50, "width": 20}
+
+@pytest.fixture
+def app():
+    service = CalculationService(workers=2)
+    yield service
+    service.shutdown()
+
+def test_health(app):
+    status, headers, body, _ = request(app, "GET", "/health")
+    assert status == 200
+    assert headers["content-type"].startswith("application/json")
+    assert b'"status": "ok"' in body
+
+def test_results(app):
+    status, _, body, _ = request(app, "POST", "/results", building)
+    assert status == 200
+    assert b'"vk_fechamento"' in body
+
+@pytest.mark.parametrize("body", [b"{", b"[]", {"length": "abc"}])
+def test_results_bad_input(app, body):
+    status, _, body, _ = request(app, "POST", "/results", body)
+    assert status == 400
+    assert b'"error"' in body
+
+def test_pdf_is_sent_in_chunks(app):
+    status, headers, body, chunks = request(app, "POST", "/pdf", building)
+    assert status == 200
+    assert headers["content-type"] == "application/pdf"
+    assert int(headers["content-length"]) == len(body)
+    assert body.startswith(b"%PDF")
+    assert chunks == -(-len(body) // PDF_CHUNK_SIZE)
+
+def test_busy_service_answers_429(app):
+    app.active = app.capacity
+    for path, body in (("/pdf", building), ("/batch", [building])):
+        status, headers, _, _ = request(app, "POST", path, body)
+        assert status == 429
+        assert headers["retry-after"] == str(app.retry_after)
+    assert app.rejected == 2
+
+def test_batch_zip(app):
+    rows = [dict(building, id="A"), dict(building, id="B", width=25), {"id": "C", "length": "abc"}]
+    status, headers, body, _ = request(app, "POST", "/batch", rows)
+    assert status == 200
+    assert headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        assert archive.namelist() == ["memorial_A.pdf", "memorial_B.pdf", "resumo.csv"]
+        summary = list(csv.DictReader(io.TextIOWrapper(archive.open("resumo.csv"), encoding="utf-8"), delimiter=";"))
+    assert [row["id"] for row in summary] == ["A", "B", "C"]
+    assert summary[2]["status"] == "erro"
+    assert app.active == 0
+
+# Um processo do pool encerrado pelo sistema não deixa o serviço respondendo 500
+def test_dead_worker_is_replaced(app):
+    assert request(app, "POST", "/pdf", building)[0] == 200
+    for pid in list(app.executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    assert request(app, "POST", "/pdf", building)[0] == 200
+    assert request(app, "POST", "/pdf", building)[0] == 200
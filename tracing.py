@@ -0,0 +1,257 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Instrumentação dos trechos críticos (etapas do cálculo, seções do memorial, doc.build, imagens).
+# Cada trecho é um span com duração, atributos e contadores; os spans aninhados formam uma árvore
+# e, quando o span raiz termina, a árvore vai para os destinos (sinks) configurados.
+# Sem destino e sem captura ativa, span() devolve um objeto nulo: o custo é uma verificação.
+#
+# Destinos pela variável de ambiente C_VENTO_TRACE (herdada pelos processos do pool), separados
+# por vírgula: "log" (linhas no logging), "json:ARQUIVO" (JSON Lines, uma árvore por linha) e
+# "otlp:ARQUIVO" (OTLP/JSON, o formato do file exporter do OpenTelemetry Collector).
+
+_sinks = []
+_sinks_lock = threading.Lock()
+_current = contextvars.ContextVar("tracing_span", default=None)
+_collector = contextvars.ContextVar("tracing_collector", default=None)
+
+# logging só é carregado quando usado (log ou falha de um destino), para não pesar na importação
+def _logger():
+    import logging
+
+    return logging.getLogger("c_vento.tracing")
+
+class Span:
+    __slots__ = ("name", "attributes", "counters", "children", "parent", "trace_id", "span_id",
+                 "start_ns", "end_ns", "_started", "_token")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.counters = {}
+        self.children = []
+
+    def __enter__(self):
+        self.parent = _current.get()
+        self.trace_id = self.parent.trace_id if self.parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._started
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        if self.parent is not None:
+            self.parent.children.append(self)
+        else:
+            _emit(self)
+        return False
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self):
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def walk(self, depth=0):
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "counters": self.counters,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def count(self, name, value=1):
+        pass
+
+    def set(self, **attributes):
+        pass
+
+_null_span = _NullSpan()
+
+def enabled():
+    return bool(_sinks) or _collector.get() is not None
+
+# Trecho medido: with span("report.doc_build") as trace: ...; trace.count("pages", n)
+def span(name, **attributes):
+    if not _sinks and _collector.get() is None:
+        return _null_span
+    return Span(name, attributes)
+
+# Soma ao contador do span atual (sem efeito fora de um span)
+def count(name, value=1):
+    current = _current.get()
+    if current is not None:
+        current.count(name, value)
+
+# Decorador: mede cada chamada da função como um span
+def timed(name):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _sinks and _collector.get() is None:
+                return function(*args, **kwargs)
+            with Span(name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# Guarda na lista retornada os spans raiz concluídos neste contexto (painel de depuração da interface)
+@contextmanager
+def capture():
+    spans = []
+    token = _collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _collector.reset(token)
+
+def _emit(root):
+    collected = _collector.get()
+    if collected is not None:
+        collected.append(root)
+    for sink in list(_sinks):
+        try:
+            sink.emit(root)
+        except Exception:
+            # Um destino com problema não interrompe o cálculo
+            _logger().exception("Falha ao gravar spans em %r", sink)
+
+def add_sink(sink):
+    with _sinks_lock:
+        _sinks.append(sink)
+    return sink
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+# Linhas planas da árvore de spans: (nível, nome, duração em ms, atributos e contadores)
+def span_rows(roots):
+    rows = []
+    for root in roots:
+        for depth, item in root.walk():
+            details = {**item.attributes, **item.counters}
+            rows.append((depth, item.name, (item.end_ns - item.start_ns) / 1e6, details))
+    return rows
+
+# Uma linha de log por span, indentada pelo nível
+class LogSink:
+    def __init__(self, target=None, level=None):
+        import logging
+
+        self.logger = target or _logger()
+        self.level = logging.INFO if level is None else level
+
+    def emit(self, root):
+        for depth, name, duration_ms, details in span_rows([root]):
+            extra = " ".join(f"{key}={value}" for key, value in details.items())
+            self.logger.log(self.level, "%s%s %.3f ms %s", "  " * depth, name, duration_ms, extra)
+
+# Gravação por linha em modo append: vários processos podem escrever no mesmo arquivo
+class _FileSink:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def emit(self, root):
+        line = json.dumps(self.payload(root), ensure_ascii=False, default=str) + "\n"
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+# JSON Lines: uma árvore de spans por linha
+class JsonSink(_FileSink):
+    def payload(self, root):
+        return root.to_dict()
+
+# OTLP/JSON (ExportTraceServiceRequest por linha), legível pelo OpenTelemetry Collector
+# (receiver otlpjsonfile) sem depender do SDK do OpenTelemetry
+class OtlpJsonSink(_FileSink):
+    def __init__(self, path, service_name="c_vento"):
+        super().__init__(path)
+        self.service_name = service_name
+
+    def payload(self, root):
+        spans = []
+        for _, item in root.walk():
+            attributes = {**item.attributes, **item.counters}
+            span_data = {
+                "traceId": item.trace_id,
+                "spanId": item.span_id,
+                "name": item.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(item.start_ns),
+                "endTimeUnixNano": str(item.end_ns),
+                "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            }
+            if item.parent is not None:
+                span_data["parentSpanId"] = item.parent.span_id
+            if "error" in item.attributes:
+                span_data["status"] = {"code": 2, "message": item.attributes["error"]}
+            spans.append(span_data)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "c_vento"}, "spans": spans}],
+        }]}
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+# Configura os destinos a partir de uma especificação como "log,otlp:/tmp/spans.json"
+def configure(spec):
+    sinks = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, path = item.partition(":")
+        if kind == "log":
+            import logging
+
+            if not logging.getLogger().handlers:
+                logging.basicConfig(level=logging.INFO, format="%(message)s")
+            sinks.append(LogSink())
+        elif kind == "json" and path:
+            sinks.append(JsonSink(path))
+        elif kind == "otlp" and path:
+            sinks.append(OtlpJsonSink(path))
+        else:
+            raise ValueError(f"Destino de instrumentação inválido: {item!r} (use log, json:ARQUIVO ou otlp:ARQUIVO)")
+    for sink in sinks:
+        add_sink(sink)
+    return sinks
+
+try:
+    configure(os.environ.get("C_VENTO_TRACE", ""))
+except ValueError as exc:
+    _logger().warning("%s", exc)
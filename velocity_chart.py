@@ -0,0 +1,110 @@
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing, Group, Line, String, UserNode
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+
+from wind_profile import wind_profile
+
+# Número de pontos do perfil de velocidade
+PROFILE_POINTS = 100
+
+# Alturas e velocidades do perfil entre 0 e z_max
+def velocity_profile(v0, s1, s3, category, class_, z_max, points=PROFILE_POINTS):
+    z_values = np.linspace(0, z_max, points)
+    vk_values = wind_profile(z_values, v0, s1, s3, category, class_)["vk"]
+    return z_values, vk_values
+
+# Função para criar gráfico de velocidade do vento em função da altura (PNG).
+# Usa a API orientada a objetos do Agg, sem o estado global do pyplot, e pode ser chamada de várias threads.
+def create_velocity_height_graph(z_values, vk_values):
+    # matplotlib só é importado quando um PNG é realmente pedido
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 4), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(vk_values, z_values, 'b-', label='Velocidade do Vento (Vk)')
+    ax.set_xlabel('Velocidade do Vento (Vk) [m/s]', fontsize=10)
+    ax.set_ylabel('Altura (z) [m]', fontsize=10)
+    ax.set_title('Perfil de Velocidade do Vento em Função da Altura', fontsize=12, pad=15)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+
+    fig.tight_layout()
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=100)
+    buf.seek(0)
+    return buf
+
+# Desenho vetorial (ReportLab) do perfil, com as formas já resolvidas
+@lru_cache(maxsize=128)
+def _velocity_profile_drawing(v0, s1, s3, category, class_, z_max, width, height):
+    z_values, vk_values = velocity_profile(v0, s1, s3, category, class_, z_max)
+    drawing = Drawing(width, height)
+
+    plot = LinePlot()
+    plot.x = 1.6*cm
+    plot.y = 1.3*cm
+    plot.width = width - 2.1*cm
+    plot.height = height - 2.5*cm
+    plot.data = [list(zip(vk_values.tolist(), z_values.tolist()))]
+    plot.lines[0].strokeColor = colors.blue
+    plot.lines[0].strokeWidth = 1.2
+    plot.xValueAxis.valueMin = 0
+    plot.yValueAxis.valueMin = 0
+    plot.yValueAxis.valueMax = z_max if z_max > 0 else 1
+    if vk_values.max() <= 0:
+        plot.xValueAxis.valueMax = 1
+    for axis in (plot.xValueAxis, plot.yValueAxis):
+        axis.labels.fontName = 'Helvetica'
+        axis.labels.fontSize = 7
+        axis.visibleGrid = 1
+        axis.gridStrokeColor = colors.lightgrey
+        axis.gridStrokeDashArray = (2, 2)
+    drawing.add(plot)
+
+    drawing.add(String(width / 2, height - 0.5*cm, 'Perfil de Velocidade do Vento em Função da Altura',
+                       fontName='Helvetica-Bold', fontSize=9, textAnchor='middle'))
+    drawing.add(String(plot.x + plot.width / 2, 0.3*cm, 'Velocidade do Vento (Vk) [m/s]',
+                       fontName='Helvetica', fontSize=8, textAnchor='middle'))
+    drawing.add(_rotated(String(0, 0, 'Altura (z) [m]', fontName='Helvetica', fontSize=8, textAnchor='middle'),
+                         0.4*cm, plot.y + plot.height / 2))
+
+    # Legenda
+    legend_x = plot.x + 0.3*cm
+    legend_y = plot.y + plot.height - 0.4*cm
+    drawing.add(Line(legend_x, legend_y, legend_x + 0.6*cm, legend_y, strokeColor=colors.blue, strokeWidth=1.2))
+    drawing.add(String(legend_x + 0.8*cm, legend_y - 2.5, 'Velocidade do Vento (Vk)',
+                       fontName='Helvetica', fontSize=7))
+
+    # Resolve os widgets em formas simples uma única vez; o desenho em cache fica estático
+    drawing.contents = [_primitive(node) for node in drawing.contents]
+    return drawing
+
+# Expande widgets (UserNode) recursivamente até restarem apenas formas primitivas
+def _primitive(node):
+    while isinstance(node, UserNode):
+        node = node.provideNode()
+    if isinstance(node, Group):
+        node.contents = [_primitive(child) for child in node.contents]
+    return node
+
+# Texto girado 90° (rótulo do eixo vertical)
+def _rotated(shape, x, y):
+    group = Group(shape)
+    group.translate(x, y)
+    group.rotate(90)
+    return group
+
+# Função para obter o perfil de velocidade como desenho vetorial para o PDF.
+# Perfis iguais (mesmos v0, s1, s3, categoria, classe e z_max) são montados uma única vez;
+# cada chamada recebe uma cópia, para que documentos diferentes não compartilhem o flowable.
+def velocity_profile_drawing(v0, s1, s3, category, class_, z_max, width=12*cm, height=8*cm):
+    return _velocity_profile_drawing(
+        float(v0), float(s1), float(s3), category, class_, float(z_max), width, height
+    ).copy()
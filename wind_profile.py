@@ -0,0 +1,85 @@
+import numpy as np
+
+# Constantes da pressão dinâmica (NBR 6123:2023)
+AIR_FACTOR = 0.613  # q = 0,613 * Vk² (N/m²)
+GRAVITY = 9.81      # conversão N/m² -> kgf/m²
+
+# Tabela de valores normativos
+CATEGORIES = ("I", "II", "III", "IV", "V")
+CLASSES = ("A", "B", "C")
+
+zg_values = {"I": 250, "II": 300, "III": 350, "IV": 420, "V": 500}
+b_values = {
+    "I": {"A": 1.100, "B": 1.110, "C": 1.120},
+    "II": {"A": 1.000, "B": 1.000, "C": 1.000},
+    "III": {"A": 0.940, "B": 0.940, "C": 0.930},
+    "IV": {"A": 0.860, "B": 0.850, "C": 0.840},
+    "V": {"A": 0.740, "B": 0.730, "C": 0.710}
+}
+p_values = {
+    "I": {"A": 0.060, "B": 0.065, "C": 0.070},
+    "II": {"A": 0.085, "B": 0.090, "C": 0.100},
+    "III": {"A": 0.100, "B": 0.105, "C": 0.115},
+    "IV": {"A": 0.120, "B": 0.125, "C": 0.135},
+    "V": {"A": 0.150, "B": 0.160, "C": 0.175}
+}
+fr_values = {
+    "I": {"A": 1.000, "B": 0.980, "C": 0.950},  # Usa os valores da categoria II para I
+    "II": {"A": 1.000, "B": 0.980, "C": 0.950},
+    "III": {"A": 1.000, "B": 0.980, "C": 0.950},  # Assumindo Fr igual a II para III, IV, V onde não especificado
+    "IV": {"A": 1.000, "B": 0.980, "C": 0.950},
+    "V": {"A": 1.000, "B": 0.980, "C": 0.950}
+}
+
+# Tabelas em forma de matriz (categoria x classe), montadas uma única vez
+ZG_TABLE = np.array([zg_values[c] for c in CATEGORIES], dtype=float)
+B_TABLE = np.array([[b_values[c][k] for k in CLASSES] for c in CATEGORIES])
+P_TABLE = np.array([[p_values[c][k] for k in CLASSES] for c in CATEGORIES])
+FR_TABLE = np.array([[fr_values[c][k] for k in CLASSES] for c in CATEGORIES])
+
+_CATEGORY_INDEX = {c: i for i, c in enumerate(CATEGORIES)}
+_CLASS_INDEX = {k: i for i, k in enumerate(CLASSES)}
+
+
+# Converte categoria/classe (texto ou array de textos) em índices das tabelas
+def _table_index(values, index):
+    if isinstance(values, str):
+        return index[values]
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values
+    uniques, inverse = np.unique(values, return_inverse=True)
+    lookup = np.array([index[u] for u in uniques.tolist()], dtype=np.intp)
+    return lookup[inverse].reshape(values.shape)
+
+
+# Parâmetros b, p, Fr e zg para categorias/classes (escalares ou arrays)
+def s2_parameters(category, class_):
+    i = _table_index(category, _CATEGORY_INDEX)
+    j = _table_index(class_, _CLASS_INDEX)
+    return B_TABLE[i, j], P_TABLE[i, j], FR_TABLE[i, j], ZG_TABLE[i]
+
+
+# Motor vetorizado do perfil de vento: S2, Vk e q para arrays de alturas,
+# categorias e classes em uma única passada com broadcasting
+def wind_profile(z, v0, s1, s3, category, class_):
+    z = np.asarray(z, dtype=float)
+    b, p, fr, _ = s2_parameters(category, class_)
+    s2 = np.where(z > 0, b * (np.maximum(z, 0.0) / 10) ** p * fr, 0.0)
+    vk = np.asarray(v0, dtype=float) * s1 * s2 * s3
+    q_nm2 = AIR_FACTOR * vk**2
+    return {
+        "s2": s2,
+        "b": b,
+        "p": p,
+        "fr": fr,
+        "vk": vk,
+        "q_nm2": q_nm2,
+        "q_kgfm2": q_nm2 / GRAVITY,
+    }
+
+
+# Função para calcular S2 com valores normativos corrigidos (versão escalar)
+def calculate_s2(z, v0, category, class_):
+    profile = wind_profile(z, v0, 1.0, 1.0, category, class_)
+    return float(profile["s2"]), float(profile["b"]), float(profile["p"]), float(profile["fr"])
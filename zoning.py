@@ -0,0 +1,105 @@
+import numpy as np
+
+from ce_tables import wall_force_coefficients
+from wind_profile import wind_profile
+
+# Valores padrão do modo edifício alto
+default_storey_height = 3.0
+default_zone_tolerance = 0.05  # variação máxima de q dentro de uma zona (5%)
+default_max_zones = 20
+
+# Direções do vento para as forças globais: (nome, dimensão da fachada)
+# A 0°/180° o vento sopra ao longo do comprimento l1 e incide na fachada de largura l2;
+# a 90°/270°, ao longo de l2, na fachada de comprimento l1 (mesma convenção do Ce das paredes).
+zoning_directions = (
+    ("0°/180°", "width"),
+    ("90°/270°", "length"),
+)
+
+# Cotas dos pisos (0 até o topo) a partir do número de pavimentos e do pé-direito
+# (um valor para todos ou uma lista com um valor por pavimento)
+def storey_levels(storeys, storey_height=default_storey_height):
+    heights = np.broadcast_to(np.asarray(storey_height, dtype=float), (int(storeys),))
+    if (heights <= 0).any():
+        raise ValueError("O pé-direito dos pavimentos deve ser positivo")
+    return np.concatenate([[0.0], np.cumsum(heights)])
+
+# Função para agrupar os pavimentos em zonas: q varia no máximo `tolerance` dentro de cada zona.
+# Como q cresce com a altura, as zonas são faixas de log(q) de largura log(1 + tolerance),
+# calculadas de uma vez para todos os pavimentos. Com mais de max_zones faixas, a tolerância
+# é aumentada até caberem max_zones zonas.
+def zone_index(q_top, tolerance=default_zone_tolerance, max_zones=default_max_zones):
+    if tolerance <= 0:
+        raise ValueError("A tolerância do zoneamento deve ser positiva")
+    if not (q_top > 0).all():
+        raise ValueError("O zoneamento vertical requer q positivo em todos os pavimentos (V0, S1 e S3 maiores que zero)")
+    log_q = np.log(q_top / q_top[0])
+    step = np.log1p(tolerance)
+    span = log_q[-1]
+    if max_zones and span / step >= max_zones:
+        step = span / max_zones * (1 + 1e-9)
+    bands = np.floor(log_q / step).astype(np.intp)
+    return np.unique(bands, return_inverse=True)[1].reshape(-1)
+
+# Cortante na base de cada pavimento e momento de tombamento em relação à base de cada pavimento,
+# a partir das forças por pavimento (somas acumuladas de cima para baixo)
+def shear_and_moment(forces, z_center, z_base):
+    shear = np.cumsum(forces[..., ::-1], axis=-1)[..., ::-1]
+    first_moment = np.cumsum((forces * z_center)[..., ::-1], axis=-1)[..., ::-1]
+    return shear, first_moment - z_base * shear
+
+# Função para calcular o zoneamento vertical de um edifício alto.
+# S2 e q são avaliados no topo de cada zona (a favor da segurança) e aplicados a todos os
+# pavimentos da zona; a força de cada pavimento é Ca * q * b * pé-direito, com Ca = Ce barlavento
+# - Ce sotavento (o Cpi se anula na força global) e b a dimensão da fachada. Ca vem da tabela de
+# Ce das paredes (ce_tables) pela geometria, porque os Ce informados à mão não identificam as paredes.
+def vertical_zoning(data, storeys, storey_height=default_storey_height,
+                    tolerance=default_zone_tolerance, max_zones=default_max_zones):
+    levels = storey_levels(storeys, storey_height)
+    z_base, z_top = levels[:-1], levels[1:]
+    z_center = (z_base + z_top) / 2
+    heights = z_top - z_base
+
+    q_top = wind_profile(z_top, data["v0"], data["s1"], data["s3"], data["category"], data["class_"])["q_kgfm2"]
+    zone = zone_index(q_top, tolerance, max_zones)
+
+    # Limites das zonas (os pavimentos de uma zona são contíguos)
+    starts = np.flatnonzero(np.r_[True, zone[1:] != zone[:-1]])
+    ends = np.r_[starts[1:], len(zone)] - 1
+    zone_profile = wind_profile(z_top[ends], data["v0"], data["s1"], data["s3"], data["category"], data["class_"])
+    storey_q = zone_profile["q_kgfm2"][zone]
+
+    directions = [name for name, _ in zoning_directions]
+    force_coefficient = wall_force_coefficients(levels[-1], data["length"], data["width"])
+    breadth = np.array([data[dimension] for _, dimension in zoning_directions], dtype=float)
+
+    # Forças por pavimento: forma (direção, pavimento)
+    forces = (force_coefficient * breadth)[:, None] * (storey_q * heights)[None, :]
+    shear, moment = shear_and_moment(forces, z_center, z_base)
+
+    return {
+        "storeys": int(storeys),
+        "height": float(levels[-1]),
+        "tolerance": float(tolerance),
+        "levels": levels,
+        "zone": zone,
+        "directions": directions,
+        "force_coefficient": force_coefficient,
+        "breadth": breadth,
+        "storey_force": forces,
+        "storey_shear": shear,
+        "storey_moment": moment,
+        "zones": {
+            "z_bottom": z_base[starts],
+            "z_top": z_top[ends],
+            "storeys": ends - starts + 1,
+            "s2": zone_profile["s2"],
+            "vk": zone_profile["vk"],
+            "q_kgfm2": zone_profile["q_kgfm2"],
+            "force": np.add.reduceat(forces, starts, axis=1),
+            "shear": shear[:, starts],
+            "moment": moment[:, starts],
+        },
+        "base_shear": shear[:, 0],
+        "base_moment": moment[:, 0],
+    }